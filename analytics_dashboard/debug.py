@@ -1,6 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
+from src.catalog import ResultsCatalog
+
 symbol = "xauusd"
 
 base_path = Path(fr"C:\Users\zak\Desktop\workspace\datalake\gold\{symbol}\backtest")
@@ -52,25 +54,21 @@ trades = {
     },
 }
 
-all_dfs = []
+catalog = ResultsCatalog(str(base_path))
+print(catalog.top_k("return_to_dd", k=50, columns=["return_to_dd", "net_profit", "nbr_trades", "sharpe"]))
 
-for indicator, timeframes in trades.items():
-    path_indicator = base_path / indicator / "simple"
-    for timeframe, strategy_list in timeframes.items():
-        for strategy_name in strategy_list:
-            file_path = path_indicator / timeframe / f"{strategy_name}_trades.parquet"
-            if file_path.exists():
-                df = pd.read_parquet(file_path)
-                df["indicator"] = indicator
-                df["timeframe"] = timeframe
-                df["strategy_name"] = strategy_name
-                all_dfs.append(df)
-            else:
-                print(f"⚠ File not found: {file_path}")
+selection = pd.DataFrame(
+    [
+        {"indicator": indicator, "strategy_type": "simple", "timeframe": timeframe, "strategy_name": strategy_name}
+        for indicator, timeframes in trades.items()
+        for timeframe, strategy_list in timeframes.items()
+        for strategy_name in strategy_list
+    ]
+)
+df_result = catalog.trades(selection)
 
 # Merge all into one DataFrame
-if all_dfs:
-    df_result = pd.concat(all_dfs, ignore_index=True)
+if not df_result.empty:
     df_result.to_parquet(save_path, index=False)
     print(f"✅ Saved merged DataFrame with {len(df_result)} rows to {save_path}")
 else:
@@ -0,0 +1,109 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import pandas as pd
+import pyarrow.parquet as pq
+import yaml
+
+from src.configuration import read_yaml_config
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """Summed RSS of a process and all its descendants"""
+    try:
+        import psutil
+        root = psutil.Process(pid)
+        return sum(p.memory_info().rss for p in [root] + root.children(recursive=True)) / 2 ** 20
+    except ImportError:
+        pass
+    except Exception:
+        return 0.0
+
+    total, stack = 0.0, [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            continue
+        stack.extend(_children(current))
+    return total / 2 ** 20
+
+
+def _run_pipeline(symbol: str, indicators: List[str], strategy_type: str, config_path: str, backend: str) -> None:
+    import parallel
+    parallel.run_all_indicators_global_streaming(symbol, indicators, strategy_type, config_path, resume=False, backend=backend)
+
+
+def benchmark_backend(symbol: str, indicators: List[str], strategy_type: str, config_path: str, backend: str) -> Dict[str, float]:
+    """Run one sweep in a fresh process and sample its whole process tree's memory"""
+    process = multiprocessing.Process(target=_run_pipeline, args=(symbol, indicators, strategy_type, config_path, backend))
+    peak_mb = 0.0
+    start = time.perf_counter()
+    process.start()
+    while process.is_alive():
+        peak_mb = max(peak_mb, process_tree_rss_mb(process.pid))
+        process.join(0.1)
+    elapsed = time.perf_counter() - start
+
+    return {"backend": backend, "elapsed_s": elapsed, "peak_rss_mb": peak_mb, "exit_code": process.exitcode}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare memory and throughput of the process and thread backends")
+    parser.add_argument("--config", default="config/backtester_default.yaml")
+    parser.add_argument("--symbol", default="xauusd")
+    parser.add_argument("--indicators", nargs="+", default=["macd"])
+    parser.add_argument("--strategy-type", default="simple")
+    parser.add_argument("--backends", nargs="+", default=["process", "thread"])
+    args = parser.parse_args()
+
+    config_data = read_yaml_config(args.config)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in args.backends:
+            # Fresh output folder and no result cache, so every run computes every strategy
+            config_data["paths"]["base_save_path"] = os.path.join(tmp_dir, backend)
+            config_data["system"]["cache_enabled"] = False
+            config_path = os.path.join(tmp_dir, f"{backend}.yaml")
+            with open(config_path, "w") as f:
+                yaml.safe_dump(config_data, f)
+
+            logger.info(f"=== Benchmarking {backend} backend ===")
+            row = benchmark_backend(args.symbol, args.indicators, args.strategy_type, config_path, backend)
+
+            n_strategies = 0
+            for indicator in args.indicators:
+                summary_path = os.path.join(
+                    tmp_dir, backend, args.symbol, "backtest", indicator, args.strategy_type,
+                    f"summary_{args.strategy_type}_{indicator}.parquet"
+                )
+                if os.path.exists(summary_path):
+                    n_strategies += pq.ParquetFile(summary_path).metadata.num_rows
+            row["strategies"] = n_strategies
+            row["strategies_per_s"] = n_strategies / row["elapsed_s"]
+            rows.append(row)
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
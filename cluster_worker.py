@@ -0,0 +1,34 @@
+import argparse
+import logging
+import multiprocessing
+
+from src.cluster import cluster_authkey, run_cluster_node
+from src.configuration import read_yaml_config, create_cluster_config
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run backtest workers for a cluster coordinator")
+    parser.add_argument("--config", default="config/backtester_default.yaml", help="config with the cluster section")
+    parser.add_argument("--host", required=True, help="coordinator host")
+    parser.add_argument("--port", type=int, help="coordinator port, defaults to cluster.port")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count(), help="worker processes on this node")
+    args = parser.parse_args()
+
+    cluster_config = create_cluster_config(read_yaml_config(args.config))
+    port = args.port or cluster_config.port
+    logger.info(f"Starting {args.processes} workers for coordinator {args.host}:{port}")
+
+    run_cluster_node(
+        args.host,
+        port,
+        cluster_authkey(cluster_config),
+        cluster_config.heartbeat_interval_s,
+        args.processes
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,16 @@
 import logging
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from src.backtest import run_backtest
-from src.configuration import read_yaml_config, extract_indicator_config, create_backtest_config
+from src.cluster import ClusterExecutor
+from src.configuration import read_yaml_config, extract_indicator_config, create_backtest_config, create_system_config, \
+    create_cluster_config
 from src.file_identifier import build_file_column_reference
 from src.results import save_all_results, save_summary_statistics
 from src.statistics import create_summary_statistics
-from src.strategy_generation import (
-    generate_all_strategies,
-    generate_simple_strategy_contexts,
-    generate_combined_strategy_contexts
-)
+from src.pipeline import iter_background
+from src.scheduling import iter_bounded_completions
+from src.strategy_generation import iter_all_strategies, strategy_context_grid
 from src.template_parser import load_all_strategy_templates
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,6 +28,7 @@ def run_functional_backtest_pipeline(symbol: str, indicator: str, strategy_type:
         config_data = read_yaml_config(config_path)
         indicator_config = extract_indicator_config(config_data, indicator)
         backtest_config = create_backtest_config(symbol, indicator, strategy_type, config_data)
+        system_config = create_system_config(config_data)
 
         # Step 2: Load strategy templates
         logger.info("Step 2: Loading strategy templates...")
@@ -35,14 +36,12 @@ def run_functional_backtest_pipeline(symbol: str, indicator: str, strategy_type:
 
         # Step 3: Generate strategy contexts
         logger.info("Step 3: Generating strategy contexts...")
-        if strategy_type == "combined":
-            contexts = generate_combined_strategy_contexts(indicator_config)
-        else:
-            contexts = generate_simple_strategy_contexts(indicator_config)
+        contexts = strategy_context_grid(indicator_config, strategy_type)
 
-        # Step 4: Generate all strategies
+        # Step 4: Generate strategies lazily, rendering them as backtests run
         logger.info("Step 4: Generating strategies...")
-        strategies = generate_all_strategies(templates, contexts, backtest_config.template_path)
+        strategies = iter_all_strategies(templates, contexts, backtest_config.template_path)
+        n_strategies = len(templates) * len(contexts)
 
         # Step 5: Build file reference
         logger.info("Step 5: Building file reference...")
@@ -53,20 +52,27 @@ def run_functional_backtest_pipeline(symbol: str, indicator: str, strategy_type:
         )
 
         # Step 6: Run all backtests in parallel
-        logger.info(f"Step 6: Running {len(strategies)} backtests in parallel...")
+        logger.info(f"Step 6: Running {n_strategies} backtests in parallel on the {system_config.backend} backend...")
         results = []
-        with ProcessPoolExecutor() as executor:
-            future_to_strategy = {
-                executor.submit(run_backtest, strategy_type, strategy_yaml, file_reference, backtest_config): i
-                for i, strategy_yaml in enumerate(strategies, 1)
-            }
-
-            for future in as_completed(future_to_strategy):
-                i = future_to_strategy[future]
+        if system_config.backend == "cluster":
+            executor = ClusterExecutor(create_cluster_config(config_data))
+        elif system_config.backend == "thread":
+            executor = ThreadPoolExecutor(max_workers=system_config.max_workers)
+        else:
+            executor = ProcessPoolExecutor(max_workers=system_config.max_workers)
+        max_in_flight = 2 * system_config.max_workers
+        with executor:
+            submissions = iter_bounded_completions(
+                executor,
+                enumerate(iter_background(strategies, depth=max_in_flight), 1),
+                lambda ex, item: ex.submit(run_backtest, strategy_type, item[1], file_reference, backtest_config),
+                max_in_flight
+            )
+            for (i, _), future in submissions:
                 try:
                     result = future.result()
                     results.append(result)
-                    logger.info(f"Backtest {i}/{len(strategies)} completed")
+                    logger.info(f"Backtest {i}/{n_strategies} completed")
                 except Exception as e:
                     logger.error(f"Backtest {i} failed: {e}")
 
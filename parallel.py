@@ -1,21 +1,43 @@
 import logging
 import multiprocessing
-from concurrent.futures import ProcessPoolExecutor, as_completed
-import gc
+import pickle
+from itertools import chain
 import pandas as pd
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from src.backtest import run_backtest
-from src.configuration import read_yaml_config, extract_indicator_config, create_backtest_config
-from src.file_identifier import build_file_column_reference
-from src.results import save_all_results, save_summary_statistics, append_parquet_files
+from src.configuration import read_yaml_config, extract_indicator_config, create_backtest_config, create_system_config, \
+    create_cluster_config
+from src.file_identifier import build_file_manifest, file_reference_from_manifest, merge_required_files
+from src.results import save_all_results, save_summary_statistics, consolidated_summary_path, save_worker_rss_report
+from src.pipeline import iter_background
+from src.scheduling import (
+    build_sweep_task,
+    locality_key,
+    estimate_memory_mb,
+    balanced_batch_size,
+    iter_locality_batches,
+    iter_bounded_completions,
+    iter_task_groups,
+    dedupe_key,
+    MemoryBudget,
+    TaskDeduplicator
+)
 from src.statistics import create_summary_statistics
 from src.strategy_generation import (
-    generate_all_strategies,
-    generate_simple_strategy_contexts,
-    generate_combined_strategy_contexts
+    iter_parsed_strategies,
+    strategy_parameters,
+    strategy_parameter_schema,
+    strategy_context_grid
 )
 from src.template_parser import load_all_strategy_templates
+from src.checkpoint import open_run_manifests, task_key
+from src.cache import ResultCache, resolve_cache_dir, file_fingerprints
+from src.data_structure import WorkerContext, SweepTask, SystemConfig, TaskRecord
+from src.worker import init_worker, run_backtest_batch_task, run_backtest_batch_thread_task, WorkerPool, ThreadWorkerPool
+from src.cluster import ClusterExecutor
+from src.dataset import DatasetWriter, dataset_root, clear_partitions, consolidate_dataset_summary, with_parameter_columns, \
+    alias_summary_batches, with_task_key
+from src.catalog import ResultsCatalog
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -27,61 +49,249 @@ def prepare_backtest_tasks(symbol: str, indicator: str, strategy_type: str, conf
     config_data = read_yaml_config(config_path)
     indicator_config = extract_indicator_config(config_data, indicator)
     backtest_config = create_backtest_config(symbol, indicator, strategy_type, config_data)
+    system_config = create_system_config(config_data)
 
     templates = load_all_strategy_templates(backtest_config.template_path, indicator_config.templates)
 
-    contexts = (
-        generate_combined_strategy_contexts(indicator_config)
-        if strategy_type == "combined"
-        else generate_simple_strategy_contexts(indicator_config)
-    )
-
-    strategies = generate_all_strategies(templates, contexts, backtest_config.template_path)
+    # Lazy grid: contexts are generated on each pass, never held as a list
+    contexts = strategy_context_grid(indicator_config, strategy_type)
 
-    file_reference = build_file_column_reference(
+    manifest = build_file_manifest(
         backtest_config.symbol,
         backtest_config.data_path,
         backtest_config.timeframe_names
     )
+    file_reference = file_reference_from_manifest(manifest, backtest_config.timeframe_names)
 
-    tasks = [
-        (strategy_type, strategy_yaml, file_reference, backtest_config)
-        for strategy_yaml in strategies
-    ]
-    return tasks, {"indicator": indicator, "backtest_config": backtest_config}
+    # Tasks only carry the indicator and parsed strategy to workers; the rest ships once per worker.
+    # Strategies are rendered and parsed lazily as the executor pulls them.
+    tasks = (
+        build_sweep_task(indicator, strategy_type, strategy, file_reference, strategy_parameters(template, context))
+        for template, context, strategy in iter_parsed_strategies(templates, contexts, backtest_config.template_path)
+    )
+    context = WorkerContext(
+        strategy_type=strategy_type,
+        file_reference=file_reference,
+        backtest_config=backtest_config,
+        cache_dir=resolve_cache_dir(system_config, backtest_config),
+        file_fingerprints=file_fingerprints(manifest),
+        write_queue_size=system_config.write_queue_size,
+        result_layout=system_config.result_layout
+    )
+    meta = {
+        "indicator": indicator,
+        "backtest_config": backtest_config,
+        "context": context,
+        "manifest": manifest,
+        "parameter_schema": strategy_parameter_schema(templates, contexts),
+        "n_tasks": len(templates) * len(contexts)
+    }
+    return tasks, meta
+
+
+def _estimate_batch_memory_mb(batch: List[SweepTask], indicator_meta: Dict[str, dict]) -> float:
+    files_needed = merge_required_files([task.files_needed for task in batch])
+    return estimate_memory_mb(batch[0].timeframes, files_needed, indicator_meta[batch[0].indicator]["manifest"])
 
 
-def run_all_indicators_global_streaming(symbol: str, indicators: List[str], strategy_type: str, config_path: str):
+def _estimate_group_memory_mb(group: List[List[SweepTask]], indicator_meta: Dict[str, dict]) -> float:
+    # A worker holds the batch it computes plus the one it prefetches
+    estimates = sorted((_estimate_batch_memory_mb(batch, indicator_meta) for batch in group), reverse=True)
+    return sum(estimates[:2])
+
+
+def _skip_completed(tasks: Iterable[SweepTask], completed: Dict[str, Set[str]], skipped: List[int]) -> Iterator[SweepTask]:
+    for task in tasks:
+        done = completed[task.indicator]
+        # Manifests written before task keys were recorded only know the name
+        if task_key(task) in done or task.strategy_name in done:
+            skipped[0] += 1
+            continue
+        yield task
+
+
+def _report_result_cache(contexts: Dict[str, WorkerContext], system_config: SystemConfig, hits: int, misses: int) -> None:
+    cache_dirs = {context.cache_dir for context in contexts.values() if context.cache_dir}
+    if not cache_dirs:
+        return
+
+    hit_rate = 100 * hits / max(1, hits + misses)
+    logger.info(f"Result cache: {hits} hits, {misses} misses ({hit_rate:.1f}% hit rate)")
+    for cache_dir in cache_dirs:
+        kept, evicted = ResultCache(cache_dir).evict(system_config.cache_size)
+        logger.info(f"Result cache {cache_dir}: {kept} entries kept, {evicted} evicted")
+
+
+def run_all_indicators_global_streaming(
+        symbol: str,
+        indicators: List[str],
+        strategy_type: str,
+        config_path: str,
+        resume: bool = True,
+        backend: Optional[str] = None
+):
     logger.info("=== Preparing tasks for all indicators ===")
-    all_tasks = []
+    task_streams = []
     indicator_meta = {}
 
     for ind in indicators:
         tasks, meta = prepare_backtest_tasks(symbol, ind, strategy_type, config_path)
-        all_tasks.extend([(ind, *t) for t in tasks])
+        task_streams.append(tasks)
         indicator_meta[ind] = meta
 
-    logger.info(f"Prepared {len(all_tasks)} total backtests across {len(indicators)} indicators.")
-
-    logger.info("=== Running all backtests in parallel (streaming save) ===")
-    with ProcessPoolExecutor(max_workers=multiprocessing.cpu_count()) as executor:
-        future_to_task = {
-            executor.submit(run_backtest, strategy_type, strategy_yaml, file_reference, backtest_config): (
-                indicator, idx)
-            for idx, (indicator, strategy_type, strategy_yaml, file_reference, backtest_config) in
-            enumerate(all_tasks, 1)
-        }
-
-        for i, future in enumerate(as_completed(future_to_task), 1):
-            indicator, idx = future_to_task[future]
-            try:
-                summary = future.result()  # now a dict
-                logger.info(f"[{indicator}] Completed {summary['strategy_name']} ({idx}/{len(all_tasks)})")
-            except Exception as e:
-                logger.error(f"[{indicator}] Task {idx} failed: {e}")
+    contexts = {ind: meta["context"] for ind, meta in indicator_meta.items()}
+    n_tasks = sum(meta["n_tasks"] for meta in indicator_meta.values())
+
+    logger.info(f"Prepared {n_tasks} total backtests across {len(indicators)} indicators.")
 
+    config_data = read_yaml_config(config_path)
+    system_config = create_system_config(config_data)
+    backend = backend or system_config.backend
+    layout = system_config.result_layout
+
+    manifests, completed_before = open_run_manifests(
+        {ind: meta["backtest_config"] for ind, meta in indicator_meta.items()}, resume
+    )
+    skipped = [0]
+
+    writer = None
+    if layout == "dataset":
+        root = dataset_root(indicator_meta[indicators[0]]["backtest_config"])
+        for ind in indicators:
+            clear_partitions(root, ind, strategy_type, keep=manifests[ind].completed_outputs())
+        # The writer thread is the only one recording completions in this layout
+        writer = DatasetWriter(
+            root,
+            on_commit=lambda ind, record: manifests[ind].record(record),
+            row_group_size=system_config.dataset_row_group_size,
+            flush_interval_s=system_config.dataset_flush_interval_s
+        )
+    if backend == "cluster":
+        cluster_config = create_cluster_config(config_data)
+        n_workers = cluster_config.expected_workers
+    else:
+        n_workers = min(system_config.max_workers, multiprocessing.cpu_count())
+    batch_size = balanced_batch_size(n_tasks, n_workers, system_config.max_batch_size)
+    max_in_flight = 2 * n_workers
+    # Strategies are rendered and parsed on a producer thread while the parent waits on workers
+    generated = iter_background(
+        _skip_completed(chain.from_iterable(task_streams), completed_before, skipped),
+        depth=batch_size * n_workers
+    )
+    lookahead = max_in_flight * system_config.pipeline_batches * batch_size
+
+    completed = 0
+    cache_hits = cache_misses = 0
+
+    def record_completion(task: SweepTask, record: TaskRecord, alias: bool = False) -> None:
+        nonlocal completed, cache_hits, cache_misses
+        completed += 1
+        if record.success:
+            key = task_key(task)
+            batches = with_parameter_columns(
+                record.batches,
+                dict(task.parameters),
+                indicator_meta[task.indicator]["parameter_schema"]
+            )
+            record = record._replace(task_key=key, batches=with_task_key(batches, key))
+            if writer is not None:
+                writer.submit(task.indicator, strategy_type, record)
+            else:
+                manifests[task.indicator].record(record)
+            if not alias:
+                cache_hits += record.cache_hit
+                cache_misses += not record.cache_hit
+        logger.info(f"[{task.indicator}] Completed {record.strategy_name} ({completed}/{n_tasks})")
+
+    def fan_out(alias: SweepTask, record: TaskRecord) -> None:
+        # An alias gets its primary's summary under its own name and parameters, without the trades
+        if record.success:
+            record = record._replace(cache_hit=False, batches=alias_summary_batches(record.batches, alias.strategy_name))
+        record_completion(alias, record._replace(strategy_name=alias.strategy_name), alias=True)
+
+    # Strategies computing the same thing run once; their aliases share the outcome
+    deduplicator = TaskDeduplicator(dedupe_key, fan_out, max_outcomes=lookahead)
+    batches = iter_locality_batches(deduplicator.filter(generated), locality_key, batch_size, lookahead=lookahead)
+    groups = iter_task_groups(batches, system_config.pipeline_batches, key_fn=lambda batch: batch[0].indicator)
+    estimated_groups = ((group, _estimate_group_memory_mb(group, indicator_meta)) for group in groups)
+    # Only process workers each hold their own copy of the data; threads share one
+    # and cluster nodes are outside this machine's memory limit
+    budget = MemoryBudget(system_config.memory_limit_mb) if backend == "process" else None
+    task_fn = run_backtest_batch_thread_task if backend == "thread" else run_backtest_batch_task
+    ipc_bytes = 0
+
+    def submit_group(executor: WorkerPool, item: Tuple[List[List[SweepTask]], float]):
+        nonlocal ipc_bytes
+        group, _ = item
+        args = (group[0][0].indicator, [[task.strategy for task in batch] for batch in group])
+        ipc_bytes += len(pickle.dumps(args))
+        return executor.submit(task_fn, *args)
+
+    logger.info(f"Shared worker context: {len(pickle.dumps(contexts)) / 1024:.1f} KB, shipped once per worker")
+    logger.info(
+        f"=== Running all backtests on {n_workers} {backend} workers "
+        f"({max_in_flight} tasks of up to {system_config.pipeline_batches} batches in flight, {system_config.memory_limit_mb} MB budget) ==="
+    )
+    if backend == "cluster":
+        pool = ClusterExecutor(cluster_config, initializer=init_worker, initargs=(contexts,))
+    elif backend == "thread":
+        pool = ThreadWorkerPool(max_workers=n_workers, contexts=contexts, shared_data_mb=system_config.shared_data_mb)
+    else:
+        pool = WorkerPool(
+            max_workers=n_workers,
+            initializer=init_worker,
+            initargs=(contexts,),
+            max_tasks_per_worker=system_config.max_tasks_per_worker,
+            rss_high_water_mb=system_config.worker_rss_high_water_mb
+        )
+    try:
+        with pool as executor:
+            for (group, estimate), future in iter_bounded_completions(
+                    executor, estimated_groups, submit_group, max_in_flight,
+                    estimate_fn=lambda item: item[1], budget=budget):
+                indicator = group[0][0].indicator
+                try:
+                    result = future.result()
+                    pool.record(result)
+                    if budget is not None:
+                        budget.observe(result.pid, estimate, result.rss_start_mb, result.rss_peak_mb)
+                    # Records come back in task order
+                    for task, record in zip((task for batch in group for task in batch), result.records):
+                        record_completion(task, record)
+                        # Aliases only need the summary of the outcome
+                        deduplicator.complete(task, record._replace(
+                            outputs=(), batches=tuple(item for item in record.batches if item[0] == "summary")
+                        ))
+                except Exception as e:
+                    n_group = sum(len(batch) for batch in group)
+                    completed += n_group
+                    logger.error(f"[{indicator}] Task of {n_group} strategies failed: {e}")
+                    for batch in group:
+                        for task in batch:
+                            deduplicator.complete(task, TaskRecord(task.strategy_name, "unknown", False, str(e)))
+    finally:
+        if writer is not None:
+            writer.close()
+        for manifest in manifests.values():
+            manifest.close()
+
+    logger.info(f"Skipped {skipped[0]} strategies already completed by a previous run")
+    logger.info(
+        f"Deduplicated {deduplicator.n_tasks} strategies to {deduplicator.n_dispatched} distinct ones "
+        f"(collapse ratio {deduplicator.collapse_ratio:.2f})"
+    )
+    if budget is not None:
+        logger.info(f"Memory estimate scale after run: {budget.scale:.2f}")
+    save_worker_rss_report(pool.rss_report(), indicator_meta[indicators[0]]["backtest_config"])
+    logger.info(f"Task payloads: {ipc_bytes / max(1, completed):.0f} bytes per task")
+    _report_result_cache(contexts, system_config, cache_hits, cache_misses)
     logger.info("=== Generate Summary ===")
-    append_parquet_files(indicator_meta[indicator]["backtest_config"])
+    for ind in indicators:
+        if layout == "dataset":
+            consolidate_dataset_summary(root, indicator_meta[ind]["backtest_config"])
+        else:
+            manifests[ind].write_summary(consolidated_summary_path(indicator_meta[ind]["backtest_config"]))
+    ResultsCatalog(indicator_meta[indicators[0]]["backtest_config"].save_path).refresh()
 
 if __name__ == "__main__":
     symbol = "xauusd"
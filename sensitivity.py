@@ -0,0 +1,38 @@
+import logging
+
+from src.configuration import read_yaml_config, create_backtest_config, extract_sensitivity_config
+from src.repricing import build_cost_scenarios, run_cost_sensitivity
+from src.results import save_cost_sensitivity
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def run_cost_sensitivity_pipeline(symbol: str, indicator: str, strategy_type: str, config_path: str) -> bool:
+    """Re-price the saved trades of an indicator across the configured cost grid."""
+    logger.info(f"=== Cost sensitivity: {symbol} {indicator} ({strategy_type}) ===")
+
+    try:
+        config_data = read_yaml_config(config_path)
+        backtest_config = create_backtest_config(symbol, indicator, strategy_type, config_data)
+        scenarios = build_cost_scenarios(extract_sensitivity_config(config_data, backtest_config))
+        logger.info(f"Re-pricing across {len(scenarios)} scenarios...")
+
+        sensitivity_df = run_cost_sensitivity(backtest_config, scenarios)
+        save_cost_sensitivity(sensitivity_df, backtest_config)
+        return True
+
+    except Exception as e:
+        logger.error(f"Cost sensitivity failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    symbol = "xauusd"
+    indicators = ["keltner"]
+
+    config_path: str = "config/backtester_default.yaml"
+    strategy_type: str = "simple"
+
+    for indicator in indicators:
+        run_cost_sensitivity_pipeline(symbol, indicator, strategy_type, config_path)
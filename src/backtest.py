@@ -1,19 +1,34 @@
-from typing import Dict, List, Tuple, Any
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple, Any
+import numpy as np
 import pandas as pd
 import logging
+import threading
 import yaml
 
-from src.data_structure import BacktestConfig, BacktestResult
-from src.file_identifier import identify_required_columns, find_files_for_strategy, remove_matching_suffix
+from src.cache import ResultCache
+from src.checkpoint import checksum_outputs
+from src.dataset import summary_record_batch
+from src.data_structure import BacktestConfig, BacktestResult, BatchPlan
+from src.file_identifier import identify_required_columns, find_files_for_strategy, remove_matching_suffix, \
+    merge_required_files
 from src.loader import load_strategy_data
-from src.results import save_all_results, save_summary_statistics
-from src.statistics import create_summary_statistics
-from src.timeframe_merge import merge_timeframes
+from src.online_stats import accumulate_trades, accumulate_values, accumulator_statistics, new_accumulator
+from src.pipeline import WriteBehind
+from src.results import save_all_results
+from src.statistics import create_summary_statistics, summary_rows_by_result
+from src.strategy_generation import parse_rendered_strategy
+from src.strategy_ir import CombineMode, Condition, Operator, ParsedStrategy, SignalRule
+from src.timeframe_merge import alignment_cache_dir, merge_timeframes
+from src.trade_records import empty_trade_records, trade_records_from_vbt, trades_to_arrow
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+SIMULATION_FREQ = "1min"
+
 # ============================================================================
 # 6. BACKTEST EXECUTION FUNCTIONS
 # ============================================================================
@@ -153,75 +168,158 @@ def combine_conditions(condition_results: List[pd.Series], mode: str) -> pd.Seri
     return result
 
 
-def execute_backtest(
+def _previous(values: np.ndarray) -> np.ndarray:
+    """Values one bar back with NaN on the first bar, as Series.shift(1) gives them"""
+    kind = values.dtype.kind
+    dtype = values.dtype if kind in "fc" else np.float64 if kind in "iub" else object
+    previous = np.empty(len(values), dtype=dtype)
+    previous[:1] = np.nan
+    previous[1:] = values[:-1]
+    return previous
+
+
+# Condition kernels on numpy arrays, indexed by Operator; arguments are
+# (signal, previous signal, value, previous value)
+SIGNAL_OPERATORS = (
+    lambda s, ps, v, pv: (ps <= pv) & (s > v),
+    lambda s, ps, v, pv: (ps >= pv) & (s < v),
+    lambda s, ps, v, pv: (s == v) & (ps != v),
+    lambda s, ps, v, pv: (s == v) & (ps == v),
+    lambda s, ps, v, pv: s > v,
+    lambda s, ps, v, pv: s >= v,
+    lambda s, ps, v, pv: s < v,
+    lambda s, ps, v, pv: s <= v,
+    lambda s, ps, v, pv: s == v,
+    lambda s, ps, v, pv: s != v,
+)
+
+
+def evaluate_condition(cond: Condition, df: pd.DataFrame) -> np.ndarray:
+    """Boolean array of a parsed condition, with the same semantics as build_condition"""
+    if cond.signal not in df.columns:
+        raise KeyError(f"Signal '{cond.signal}' not found in DataFrame columns")
+
+    signal = df[cond.signal].to_numpy()
+    if cond.reference is not None and cond.reference in df.columns:
+        value = df[cond.reference].to_numpy()
+        previous_value = _previous(value) if cond.operator <= Operator.CROSSES_BELOW else value
+    else:
+        value = previous_value = cond.literal
+
+    previous_signal = _previous(signal) if cond.operator <= Operator.REMAINS else signal
+    return SIGNAL_OPERATORS[cond.operator](signal, previous_signal, value, previous_value)
+
+
+def evaluate_signal_rule(rule: SignalRule, df: pd.DataFrame) -> pd.Series:
+    """Signal of a parsed rule's conditions combined by its mode"""
+    results = [evaluate_condition(cond, df) for cond in rule.conditions]
+    combine = np.logical_and if rule.mode == CombineMode.ALL else np.logical_or
+    result = results[0]
+    for condition in results[1:]:
+        result = combine(result, condition)
+    return pd.Series(result, index=df.index)
+
+
+def build_strategy_signals(strategy: ParsedStrategy, data: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """Entry and exit signals of a parsed strategy"""
+    try:
+        return evaluate_signal_rule(strategy.entry, data), evaluate_signal_rule(strategy.exit, data)
+    except Exception as e:
+        logger.error(f"Failed to build trading signals: {e}")
+        raise
+
+
+def simulate_portfolio(
         entries: pd.Series,
         exits: pd.Series,
         data: pd.DataFrame,
         config: BacktestConfig
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """Execute backtest using VectorBT"""
+) -> "Portfolio":
+    """Simulate the signals with VectorBT"""
     from vectorbt import Portfolio
 
+    return Portfolio.from_signals(
+        close=data["close"],
+        entries=entries,
+        exits=exits,
+        size=config.point_value,
+        direction="longonly",
+        freq=SIMULATION_FREQ,
+        init_cash=config.initial_capital,
+        fees=config.fees,
+        slippage=config.slippage
+    )
+
+
+def execute_backtest(
+        entries: pd.Series,
+        exits: pd.Series,
+        data: pd.DataFrame,
+        config: BacktestConfig
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Execute backtest using VectorBT; returns the portfolio stats and compact trade records"""
     try:
         # Create portfolio
-        pf = Portfolio.from_signals(
-            close=data["close"],
-            entries=entries,
-            exits=exits,
-            size=config.point_value,
-            direction="longonly",
-            freq="1min",
-            init_cash=config.initial_capital,
-            fees=0.0,
-            slippage=0.0
-        )
+        pf = simulate_portfolio(entries, exits, data, config)
 
         # Get results
         stats_df = pf.stats()
-        trades_df = pf.trades.records_readable
+        trades = trade_records_from_vbt(pf.trades.values, pf.wrapper.index)
 
-        return stats_df, trades_df
+        return stats_df, trades
 
     except Exception as e:
         logger.error(f"Failed to execute backtest: {e}")
         raise
 
 
-def process_trade_results(trades_df: pd.DataFrame) -> pd.DataFrame:
-    """Process and clean trade results"""
-    if trades_df.empty:
-        return trades_df
-
-    # Convert timestamps
-    trades_df["Entry Timestamp"] = pd.to_datetime(trades_df["Entry Timestamp"])
-    trades_df["Exit Timestamp"] = pd.to_datetime(trades_df["Exit Timestamp"])
-
-    # Calculate duration in minutes
-    trades_df["Duration"] = (
-                                    trades_df["Exit Timestamp"] - trades_df["Entry Timestamp"]
-                            ).dt.total_seconds() / 60
-
-    # Rename columns to standard format
-    column_map = {
-        "Exit Trade Id": "exit_trade_id",
-        "Column": "column",
-        "Size": "size",
-        "Entry Timestamp": "entry_timestamp",
-        "Avg Entry Price": "entry_price",
-        "Entry Fees": "entry_fees",
-        "Exit Timestamp": "exit_timestamp",
-        "Avg Exit Price": "exit_price",
-        "Exit Fees": "exit_fees",
-        "PnL": "pnl",
-        "Return": "return",
-        "Direction": "direction",
-        "Status": "status",
-        "Position Id": "position_id",
-        "Duration": "duration"
-    }
+def execute_backtest_online(
+        entries: pd.Series,
+        exits: pd.Series,
+        data: pd.DataFrame,
+        config: BacktestConfig,
+        strategy_name: str,
+        timeframe: str
+) -> Optional[Dict[str, Any]]:
+    """Execute backtest using VectorBT and fold it straight into its summary row, without trades or stats"""
+    from vectorbt import settings as vbt_settings
+    from vectorbt.portfolio.enums import TradeStatus
+
+    try:
+        pf = simulate_portfolio(entries, exits, data, config)
+        index = pf.wrapper.index
+        times = index.as_unit("ns").asi8
+        records = pf.trades.values
+        if len(records) > 1 and not (records["exit_idx"][1:] >= records["exit_idx"][:-1]).all():
+            records = records[np.argsort(records["exit_idx"], kind="stable")]
+
+        state, dd_times = new_accumulator(config.initial_capital)
+        accumulate_trades(
+            state,
+            dd_times,
+            records["pnl"],
+            records["return"],
+            times[records["entry_idx"]],
+            times[records["exit_idx"]],
+            records["status"] == TradeStatus.Closed
+        )
+        accumulate_values(state, pf.value().to_numpy())
+
+        freq = pd.Timedelta(SIMULATION_FREQ)
+        return accumulator_statistics(
+            state,
+            dd_times,
+            strategy_name,
+            timeframe,
+            index,
+            freq,
+            pd.Timedelta(vbt_settings.returns["year_freq"]) / freq,
+            pf.benchmark_rets().vbt.returns.total() * 100
+        )
 
-    trades_df = trades_df.rename(columns=column_map)
-    return trades_df
+    except Exception as e:
+        logger.error(f"Failed to execute backtest: {e}")
+        raise
 
 
 def run_single_backtest_legacy(
@@ -256,15 +354,12 @@ def run_single_backtest_legacy(
         entries, exits = build_trading_signals(strategy, data)
 
         # 6. Execute backtest
-        stats_df, trades_df = execute_backtest(entries, exits, data, config)
-
-        # 7. Process results
-        trades_df = process_trade_results(trades_df)
+        stats_df, trades = execute_backtest(entries, exits, data, config)
 
         return BacktestResult(
             strategy_name=strategy_name,
             timeframe=main_timeframe,
-            trades_df=trades_df,
+            trades=trades,
             stats_df=stats_df,
             success=True
         )
@@ -274,86 +369,267 @@ def run_single_backtest_legacy(
         return BacktestResult(
             strategy_name="failed_strategy",
             timeframe="unknown",
-            trades_df=pd.DataFrame(),
+            trades=empty_trade_records(),
             stats_df=pd.DataFrame(),
             success=False,
             error_message=str(e)
         )
 
-import gc
 
 def run_backtest(
     strategy_type: str,
     strategy_yaml: str,
     file_reference: Dict[str, Dict[str, List[str]]],
-    config: BacktestConfig
+    config: BacktestConfig,
+    cache: Optional[ResultCache] = None,
+    layout: str = "files"
 ) -> dict:
     """Run backtest, save inside worker, return only lightweight summary."""
     try:
-        strategy, strategy_name, timeframes = _parse_strategy(strategy_yaml)
+        strategy = parse_rendered_strategy(strategy_yaml)
+        strategy_name, timeframes = strategy.name, list(strategy.timeframes)
+        files_needed = _determine_required_files(strategy_type, strategy, file_reference)
+
+        key = cache.key(strategy, files_needed, config) if cache is not None else None
+        cached = cache.restore(key, config) if cache is not None else None
+        if cached is not None:
+            return cached
+
         logger.info(f"#################### Compute {strategy_name} ####################")
-        files_needed = _determine_required_files(strategy_type, strategy_yaml, file_reference)
-        timeframe_data = _load_timeframe_data(strategy_type, files_needed, timeframes)
-        data, main_timeframe = _prepare_main_timeframe_data(timeframe_data, timeframes)
+        data, main_timeframe = load_prepared_data(strategy_type, files_needed, timeframes, alignment_cache_dir(config))
+
+        result = _compute_strategy(strategy, data, main_timeframe, config, layout)
+        return _save_strategy_outputs(result, config, cache, key, layout)
+
+    except Exception as e:
+        logger.error(f"Backtest failed: {e}")
+        return build_failure_summary(str(e))
 
-        entries, exits = build_trading_signals(strategy, data)
-        stats_df, trades_df = execute_backtest(entries, exits, data, config)
-        trades_df = process_trade_results(trades_df)
 
-        # Build result object for saving
-        result = _build_success_result(strategy_name, main_timeframe, trades_df, stats_df)
+def plan_backtest_batch(
+    strategy_type: str,
+    strategies: List[ParsedStrategy],
+    file_reference: Dict[str, Dict[str, List[str]]],
+    config: BacktestConfig,
+    cache: Optional[ResultCache] = None
+) -> BatchPlan:
+    """Plan a batch of parsed strategies and restore its cached ones without touching the data"""
+    files_needed = [_determine_required_files(strategy_type, strategy, file_reference) for strategy in strategies]
+
+    plan = BatchPlan(
+        strategy_type=strategy_type,
+        timeframes=list(strategies[0].timeframes),
+        parsed=list(strategies),
+        files_needed=files_needed,
+        cache_keys=[None] * len(strategies),
+        summaries=[None] * len(strategies)
+    )
+    if cache is not None:
+        for i, (strategy, strategy_files) in enumerate(zip(strategies, files_needed)):
+            plan.cache_keys[i] = cache.key(strategy, strategy_files, config)
+            plan.summaries[i] = cache.restore(plan.cache_keys[i], config)
 
-        # Save full results and summary inside worker
-        save_all_results([result], config)
-        summary_df = create_summary_statistics([result])
-        save_summary_statistics(result.strategy_name, summary_df, config)
+    return plan
 
-        # Build minimal return object
-        summary = {
-            "strategy_name": strategy_name,
-            "timeframe": main_timeframe,
-            "success": True,
-            "error_message": None
-        }
 
-        # Memory cleanup
-        del strategy, files_needed, timeframe_data, data
-        del entries, exits, trades_df, stats_df, result
-        gc.collect()
+def prepare_backtest_batch(
+    strategy_type: str,
+    strategies: List[ParsedStrategy],
+    file_reference: Dict[str, Dict[str, List[str]]],
+    config: BacktestConfig,
+    cache: Optional[ResultCache] = None,
+    shared_data: Optional["SharedDataStore"] = None
+) -> Tuple[BatchPlan, Optional[Tuple[pd.DataFrame, str]]]:
+    """Read stage: plan a batch and load the data its uncached strategies need"""
+    plan = plan_backtest_batch(strategy_type, strategies, file_reference, config, cache)
+    pending = plan.pending
+    if not pending:
+        return plan, None
 
-        return summary
+    try:
+        logger.info(f"#################### Compute batch of {len(pending)} strategies on {plan.timeframes} ####################")
+        files_needed = merge_required_files([plan.files_needed[i] for i in pending])
+        if shared_data is not None:
+            prepared = shared_data.get(
+                config.indicator, strategy_type, plan.timeframes, files_needed, file_reference, alignment_cache_dir(config)
+            )
+        else:
+            prepared = load_prepared_data(strategy_type, files_needed, plan.timeframes, alignment_cache_dir(config))
+        return plan, prepared
 
     except Exception as e:
-        logger.error(f"Backtest failed: {e}")
-        gc.collect()
-        return {
-            "strategy_name": "failed_strategy",
-            "timeframe": "unknown",
-            "success": False,
-            "error_message": str(e)
-        }
+        logger.error(f"Batch data preparation failed: {e}")
+        for i in pending:
+            plan.summaries[i] = build_failure_summary(str(e))
+        return plan, None
+
+
+def compute_backtest_batch(
+    plan: BatchPlan,
+    prepared: Optional[Tuple[pd.DataFrame, str]],
+    config: BacktestConfig,
+    cache: Optional[ResultCache] = None,
+    writer: Optional[WriteBehind] = None,
+    layout: str = "files"
+) -> List[dict]:
+    """Compute stage: run the uncached strategies, handing their outputs to the writer when there is one"""
+    if prepared is None:
+        return plan.summaries
+
+    data, main_timeframe = prepared
+    results: Dict[int, BacktestResult] = {}
+    writes: Dict[int, Any] = {}
+    for i in plan.pending:
+        strategy = plan.parsed[i]
+        strategy_name = strategy.name
+        try:
+            logger.info(f"#################### Compute {strategy_name} ####################")
+            results[i] = _compute_strategy(strategy, data, main_timeframe, config, layout)
+            if writer is not None:
+                writes[i] = writer.submit(_save_strategy_trades, results[i], config, layout)
+            else:
+                writes[i] = _save_strategy_trades(results[i], config, layout)
+        except Exception as e:
+            logger.error(f"Backtest {strategy_name} failed: {e}")
+            plan.summaries[i] = build_failure_summary(str(e))
 
-# --- Helper Functions ---
+    # Statistics of the whole batch in one pass while the trades are written
+    summary_rows = dict(zip(results, summary_rows_by_result(list(results.values()))))
+
+    # Flush: every output is on disk before the batch is reported
+    for i, write in writes.items():
+        strategy_name = results[i].strategy_name
+        try:
+            summary = write.result() if isinstance(write, Future) else write
+            summary_df = summary_rows.get(i, pd.DataFrame())
+            plan.summaries[i] = _finish_strategy_outputs(
+                summary, summary_df, config, cache, plan.cache_keys[i], layout
+            )
+        except Exception as e:
+            logger.error(f"Saving {strategy_name} failed: {e}")
+            plan.summaries[i] = build_failure_summary(str(e))
+
+    return plan.summaries
+
+
+def run_backtest_batch(
+    strategy_type: str,
+    strategies: List[ParsedStrategy],
+    file_reference: Dict[str, Dict[str, List[str]]],
+    config: BacktestConfig,
+    cache: Optional[ResultCache] = None,
+    shared_data: Optional["SharedDataStore"] = None,
+    layout: str = "files"
+) -> List[dict]:
+    """Run a batch of strategies sharing the same timeframes and files, loading the data once."""
+    try:
+        plan, prepared = prepare_backtest_batch(strategy_type, strategies, file_reference, config, cache, shared_data)
+    except Exception as e:
+        logger.error(f"Batch planning failed: {e}")
+        return [build_failure_summary(str(e)) for _ in strategies]
+
+    return compute_backtest_batch(plan, prepared, config, cache, layout=layout)
 
-def _parse_strategy(strategy_yaml: str) -> Tuple[dict, str, List[str]]:
-    strategy = parse_strategy_yaml(strategy_yaml)
-    strategy_name = strategy.get("name", "unknown_strategy")
-    timeframes = strategy.get("timeframes", [])
-    return strategy, strategy_name, timeframes
 
+def load_prepared_data(
+    strategy_type: str,
+    files_needed: Dict[str, Dict[str, List[str]]],
+    timeframes: List[str],
+    alignment_dir: Optional[str] = None
+) -> Tuple[pd.DataFrame, str]:
+    """Load, merge and index the data of a timeframe combination"""
+    timeframe_data = _load_timeframe_data(strategy_type, files_needed, timeframes, alignment_dir)
+    return _prepare_main_timeframe_data(timeframe_data, timeframes)
+
+
+class SharedDataStore:
+    """
+    Prepared data shared by the threads of one process.
+
+    Each (indicator, strategy type, timeframes, files) combination is loaded
+    once with every column of those files, so any strategy reading them can
+    use it. Only the files a batch resolved are loaded, never the whole
+    timeframe. Frames are treated as read-only; least recently used
+    combinations are dropped once the cached frames exceed max_mb.
+    """
+
+    def __init__(self, max_mb: float = 1024):
+        self.max_mb = max_mb
+        self._data: Dict[Tuple, Tuple[pd.DataFrame, str]] = OrderedDict()
+        self._sizes: Dict[Tuple, int] = {}
+        self._loading: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size_mb(self) -> float:
+        return sum(self._sizes.values()) / 2 ** 20
+
+    def _evict(self) -> None:
+        # The newest entry is kept even alone above the limit: a batch is reading it
+        while len(self._data) > 1 and self.size_mb > self.max_mb:
+            key, _ = self._data.popitem(last=False)
+            self._sizes.pop(key, None)
+
+    def get(
+        self,
+        indicator: str,
+        strategy_type: str,
+        timeframes: List[str],
+        files_needed: Dict[str, Dict[str, List[str]]],
+        file_reference: Dict[str, Dict[str, List[str]]],
+        alignment_dir: Optional[str] = None
+    ) -> Tuple[pd.DataFrame, str]:
+        files = tuple((tf, tuple(sorted(files_needed.get(tf, {})))) for tf in timeframes)
+        key = (indicator, strategy_type, tuple(timeframes), files)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        # Threads asking for the same combination wait for a single load
+        with loading:
+            with self._lock:
+                if key in self._data:
+                    return self._data[key]
+
+            all_columns = {
+                tf: {fp: file_reference.get(tf, {}).get(fp, columns) for fp, columns in files_needed[tf].items()}
+                for tf in timeframes if tf in files_needed
+            }
+            prepared = load_prepared_data(strategy_type, all_columns, timeframes, alignment_dir)
+
+            with self._lock:
+                self._data[key] = prepared
+                self._sizes[key] = int(prepared[0].memory_usage(index=True).sum())
+                self._loading.pop(key, None)
+                self._evict()
+
+        logger.info(
+            f"Loaded shared data for {indicator} {strategy_type} {timeframes}: {len(prepared[0])} rows, "
+            f"{self.size_mb:.1f}/{self.max_mb} MB cached"
+        )
+        return prepared
+
+# --- Helper Functions ---
 
-def _determine_required_files(strategy_type:str, strategy_yaml: str, file_reference: Dict[str, Dict[str, List[str]]]) -> Dict:
-    required_columns = identify_required_columns(strategy_yaml)
+def _determine_required_files(strategy_type:str, strategy: ParsedStrategy, file_reference: Dict[str, Dict[str, List[str]]]) -> Dict:
+    required_columns = list(strategy.required_columns)
     if strategy_type == "combined":
         required_columns = remove_matching_suffix(required_columns)
 
     return find_files_for_strategy(required_columns, file_reference)
 
 
-def _load_timeframe_data(strategy_type:str, files_needed: Dict, timeframes: List[str]) -> Dict[str, pd.DataFrame]:
+def _load_timeframe_data(
+    strategy_type: str,
+    files_needed: Dict,
+    timeframes: List[str],
+    alignment_dir: Optional[str] = None
+) -> Dict[str, pd.DataFrame]:
     timeframe_data = load_strategy_data(files_needed, timeframes)
     if strategy_type == "combined":
-        timeframe_data = merge_timeframes(timeframe_data)
+        timeframe_data = merge_timeframes(timeframe_data, alignment_dir)
 
     return timeframe_data
 
@@ -371,18 +647,88 @@ def _prepare_main_timeframe_data(
     return data.set_index("time"), main_timeframe
 
 
+def _compute_strategy(
+    strategy: ParsedStrategy,
+    data: pd.DataFrame,
+    main_timeframe: str,
+    config: BacktestConfig,
+    layout: str = "files"
+) -> BacktestResult:
+    strategy_name = strategy.name
+    entries, exits = build_strategy_signals(strategy, data)
+    if layout == "summary":
+        # No trade-level output: only the summary row leaves the simulation
+        summary = execute_backtest_online(entries, exits, data, config, strategy_name, main_timeframe)
+        return _build_success_result(strategy_name, main_timeframe, empty_trade_records(), pd.DataFrame(), summary)
+
+    stats_df, trades = execute_backtest(entries, exits, data, config)
+    return _build_success_result(strategy_name, main_timeframe, trades, stats_df)
+
+
+def _save_strategy_trades(result: BacktestResult, config: BacktestConfig, layout: str = "files") -> dict:
+    summary = {
+        "strategy_name": result.strategy_name,
+        "timeframe": result.timeframe,
+        "success": True,
+        "error_message": None,
+        "outputs": (),
+        "cache_hit": False,
+        "batches": ()
+    }
+
+    if layout == "dataset":
+        # The parent's dataset writer persists the batches
+        if len(result.trades):
+            summary["batches"] = (("trades", trades_to_arrow(result.trades, result.strategy_name)),)
+    elif layout != "summary":
+        # Save trades inside worker; the summary row goes back to the parent's manifest
+        summary["outputs"] = checksum_outputs(save_all_results([result], config))
+    return summary
+
+
+def _finish_strategy_outputs(
+    summary: dict,
+    summary_df: pd.DataFrame,
+    config: BacktestConfig,
+    cache: Optional[ResultCache] = None,
+    cache_key: Optional[str] = None,
+    layout: str = "files"
+) -> dict:
+    if not summary_df.empty:
+        # Dataset summaries take their timeframe from the partition
+        drop_columns = ("timeframe",) if layout == "dataset" else ()
+        summary["batches"] += (("summary", summary_record_batch(summary_df, drop_columns=drop_columns)),)
+
+    if cache is not None:
+        cache.store(cache_key, summary, config)
+    return summary
+
+
+def _save_strategy_outputs(
+    result: BacktestResult,
+    config: BacktestConfig,
+    cache: Optional[ResultCache] = None,
+    cache_key: Optional[str] = None,
+    layout: str = "files"
+) -> dict:
+    summary = _save_strategy_trades(result, config, layout)
+    return _finish_strategy_outputs(summary, create_summary_statistics([result]), config, cache, cache_key, layout)
+
+
 def _build_success_result(
     strategy_name: str,
     timeframe: str,
-    trades_df: pd.DataFrame,
-    stats_df: pd.DataFrame
+    trades: np.ndarray,
+    stats_df: pd.DataFrame,
+    summary: Optional[Dict[str, Any]] = None
 ) -> BacktestResult:
     return BacktestResult(
         strategy_name=strategy_name,
         timeframe=timeframe,
-        trades_df=trades_df,
+        trades=trades,
         stats_df=stats_df,
-        success=True
+        success=True,
+        summary=summary
     )
 
 
@@ -390,8 +736,17 @@ def _build_failure_result(error_message: str) -> BacktestResult:
     return BacktestResult(
         strategy_name="failed_strategy",
         timeframe="unknown",
-        trades_df=pd.DataFrame(),
+        trades=empty_trade_records(),
         stats_df=pd.DataFrame(),
         success=False,
         error_message=error_message
     )
+
+
+def build_failure_summary(error_message: str) -> dict:
+    return {
+        "strategy_name": "failed_strategy",
+        "timeframe": "unknown",
+        "success": False,
+        "error_message": error_message
+    }
@@ -0,0 +1,209 @@
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.checkpoint import file_checksum, results_dir
+from src.data_structure import BacktestConfig, SystemConfig
+from src.strategy_ir import ParsedStrategy
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bump when a change to signal building or the simulation alters results
+CACHE_VERSION = 4
+
+# Backtest settings a cached result depends on; paths are deliberately left out
+CACHE_CONFIG_FIELDS = (
+    "symbol", "indicator", "strategy_type", "initial_capital", "point_value", "fees", "slippage"
+)
+
+ENTRY_FILE = "entry.json"
+
+# ============================================================================
+# 13. RESULT CACHE FUNCTIONS
+# ============================================================================
+
+def resolve_cache_dir(system_config: SystemConfig, config: BacktestConfig) -> Optional[str]:
+    """Cache store location, or None when caching is disabled"""
+    if not system_config.cache_enabled:
+        return None
+    return system_config.cache_path or os.path.join(config.save_path, "result_cache")
+
+
+def file_fingerprints(manifest: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[int, int]]:
+    """(size, mtime) of every file in a manifest"""
+    return {path: (entry["size_bytes"], entry["mtime_ns"]) for path, entry in manifest.items()}
+
+
+def result_cache_key(
+        strategy: ParsedStrategy,
+        files_needed: Dict[str, Dict[str, List[str]]],
+        fingerprints: Dict[str, Tuple[int, int]],
+        config: BacktestConfig,
+        layout: str = "files"
+) -> Optional[str]:
+    """Content hash of a strategy, the files it reads and the backtest settings; None if a file is unknown"""
+    files = []
+    for tf, file_dict in files_needed.items():
+        for path, columns in file_dict.items():
+            if path not in fingerprints:
+                return None
+            files.append([tf, path, sorted(columns), *fingerprints[path]])
+
+    payload = {
+        "version": CACHE_VERSION,
+        "layout": layout,
+        "strategy": [strategy.name, strategy.content_hash],
+        "files": sorted(files),
+        "config": {name: getattr(config, name) for name in CACHE_CONFIG_FIELDS}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _copy_atomic(src: str, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ResultCache:
+    """
+    Store of strategy outputs keyed by result_cache_key.
+
+    An entry is a folder holding the strategy's output files under their
+    path relative to the results folder and one top-level file per table
+    the result returned as batches, plus an entry.json with their checksums.
+    The entry.json mtime doubles as the last-used time for LRU eviction,
+    which only the parent runs.
+    """
+
+    def __init__(self, root: str, fingerprints: Optional[Dict[str, Tuple[int, int]]] = None, layout: str = "files"):
+        self.root = root
+        self.fingerprints = fingerprints or {}
+        self.layout = layout
+
+    def key(self, strategy: ParsedStrategy, files_needed: Dict[str, Dict[str, List[str]]], config: BacktestConfig) -> Optional[str]:
+        return result_cache_key(strategy, files_needed, self.fingerprints, config, self.layout)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def restore(self, key: Optional[str], config: BacktestConfig) -> Optional[dict]:
+        """Copy a cached result's files into the results folder and return its summary with its batches, or None on a miss"""
+        if key is None:
+            return None
+
+        entry_dir = self._entry_dir(key)
+        entry_path = os.path.join(entry_dir, ENTRY_FILE)
+        try:
+            with open(entry_path, "r") as f:
+                entry = json.load(f)
+
+            base_dir = results_dir(config)
+            outputs, batches = [], []
+            for rel_path, checksum in entry["outputs"].items():
+                if os.path.dirname(rel_path) == "":
+                    # Table written from the result's batches
+                    table = pq.read_table(os.path.join(entry_dir, rel_path)).combine_chunks()
+                    batches.extend((rel_path[:-len(".parquet")], batch) for batch in table.to_batches())
+                else:
+                    path = os.path.join(base_dir, rel_path)
+                    _copy_atomic(os.path.join(entry_dir, rel_path), path)
+                    outputs.append((path, checksum))
+
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+        logger.info(f"Cache hit for {entry['strategy_name']}")
+        return {
+            "strategy_name": entry["strategy_name"],
+            "timeframe": entry["timeframe"],
+            "success": True,
+            "error_message": None,
+            "outputs": tuple(outputs),
+            "cache_hit": True,
+            "batches": tuple(batches)
+        }
+
+    def store(self, key: Optional[str], summary: dict, config: BacktestConfig) -> None:
+        """Add a successful result to the cache; a concurrent store of the same key wins"""
+        if key is None or not summary.get("success"):
+            return
+
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return
+
+        base_dir = results_dir(config)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            outputs = {}
+            os.makedirs(tmp_dir, exist_ok=True)
+            for table, batch in summary.get("batches", ()):
+                cached_path = os.path.join(tmp_dir, f"{table}.parquet")
+                pq.write_table(pa.Table.from_batches([batch]), cached_path)
+                outputs[f"{table}.parquet"] = file_checksum(cached_path)
+
+            for path, checksum in summary["outputs"]:
+                rel_path = os.path.relpath(path, base_dir)
+                cached_path = os.path.join(tmp_dir, rel_path)
+                os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+                shutil.copyfile(path, cached_path)
+                outputs[rel_path] = checksum
+
+            with open(os.path.join(tmp_dir, ENTRY_FILE), "w") as f:
+                json.dump({
+                    "strategy_name": summary["strategy_name"],
+                    "timeframe": summary["timeframe"],
+                    "outputs": outputs
+                }, f)
+
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            if not os.path.exists(entry_dir):
+                logger.warning(f"Could not cache {summary['strategy_name']}: {e}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _entries(self) -> List[Tuple[float, str]]:
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                entry_path = os.path.join(prefix_dir, name, ENTRY_FILE)
+                try:
+                    entries.append((os.path.getmtime(entry_path), os.path.join(prefix_dir, name)))
+                except OSError:
+                    # Incomplete entry or leftover temporary folder
+                    shutil.rmtree(os.path.join(prefix_dir, name), ignore_errors=True)
+
+        return entries
+
+    def evict(self, max_entries: int) -> Tuple[int, int]:
+        """Drop the least recently used entries beyond max_entries; returns (kept, evicted)"""
+        entries = sorted(self._entries(), reverse=True)
+        for _, entry_dir in entries[max_entries:]:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+        return min(len(entries), max_entries), max(0, len(entries) - max_entries)
@@ -0,0 +1,241 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.checkpoint import TASK_KEY_COLUMN
+from src.dataset import PARTITION_SCHEMA, partition_dir
+from src.results import read_unified_schema
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CATALOG_PARTITION_SCHEMA = pa.schema([
+    ("strategy_type", pa.string()),
+    ("indicator", pa.string())
+])
+CATALOG_ROW_GROUP_SIZE = 16_384
+SELECTION_COLUMNS = ["indicator", "strategy_type", "timeframe", "strategy_name"]
+
+# ============================================================================
+# 17. RESULTS CATALOG FUNCTIONS
+# ============================================================================
+
+def list_consolidated_summaries(backtest_path: str) -> Dict[Tuple[str, str], str]:
+    """(strategy_type, indicator) -> consolidated summary file of every indicator under a backtest folder"""
+    summaries = {}
+    if not os.path.isdir(backtest_path):
+        return summaries
+
+    for indicator in sorted(os.listdir(backtest_path)):
+        indicator_dir = os.path.join(backtest_path, indicator)
+        if not os.path.isdir(indicator_dir):
+            continue
+        for strategy_type in sorted(os.listdir(indicator_dir)):
+            path = os.path.join(indicator_dir, strategy_type, f"summary_{strategy_type}_{indicator}.parquet")
+            if os.path.exists(path):
+                summaries[(strategy_type, indicator)] = path
+
+    return summaries
+
+
+class ResultsCatalog:
+    """
+    Query layer over the results of a backtest folder.
+
+    The consolidated summary of every indicator is copied into
+    catalog/summary/strategy_type=/indicator=/summary.parquet, sorted by
+    strategy name in small row groups with statistics and a page index, so
+    name lookups skip row groups and metric scans read only the projected
+    columns. Trades are read from the result dataset when it exists, with
+    the strategy names pushed down, and otherwise straight from the
+    strategies' trades files. sql() runs DuckDB over the same files when it
+    is installed.
+    """
+
+    def __init__(self, backtest_path: str, refresh: bool = True):
+        self.backtest_path = backtest_path
+        self.root = os.path.join(backtest_path, "catalog")
+        if refresh:
+            self.refresh()
+
+    def _summary_part(self, strategy_type: str, indicator: str) -> str:
+        return os.path.join(
+            self.root, "summary", f"strategy_type={strategy_type}", f"indicator={indicator}", "summary.parquet"
+        )
+
+    def refresh(self) -> int:
+        """Re-catalog the summaries that changed since the last refresh; returns how many"""
+        sources = list_consolidated_summaries(self.backtest_path)
+        updated = 0
+        for (strategy_type, indicator), source in sources.items():
+            part = self._summary_part(strategy_type, indicator)
+            if os.path.exists(part) and os.stat(part).st_mtime_ns >= os.stat(source).st_mtime_ns:
+                continue
+
+            table = pq.read_table(source)
+            table = table.sort_by([("strategy_name", "ascending")]) if "strategy_name" in table.column_names else table
+            os.makedirs(os.path.dirname(part), exist_ok=True)
+            tmp_path = f"{part}.{os.getpid()}.tmp"
+            pq.write_table(
+                table, tmp_path, row_group_size=CATALOG_ROW_GROUP_SIZE, write_statistics=True, write_page_index=True
+            )
+            os.replace(tmp_path, part)
+            updated += 1
+
+        # Drop the entries of indicators whose results were removed
+        summary_dir = os.path.join(self.root, "summary")
+        for dirpath, _, filenames in os.walk(summary_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                keys = dict(part.split("=", 1) for part in os.path.relpath(dirpath, summary_dir).split(os.sep) if "=" in part)
+                if (keys.get("strategy_type"), keys.get("indicator")) not in sources:
+                    os.remove(path)
+
+        if updated:
+            logger.info(f"Catalogued {updated} summaries under {self.root}")
+        return updated
+
+    def _summary_dataset(self) -> Optional[ds.Dataset]:
+        files = sorted(
+            os.path.join(dirpath, filename)
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, "summary"))
+            for filename in filenames if filename.endswith(".parquet")
+        )
+        schema, _ = read_unified_schema(files)
+        if schema is None:
+            return None
+
+        partition_fields = [field for field in CATALOG_PARTITION_SCHEMA if field.name not in schema.names]
+        return ds.dataset(
+            files,
+            schema=pa.schema(list(schema) + partition_fields),
+            format="parquet",
+            partitioning=ds.partitioning(CATALOG_PARTITION_SCHEMA, flavor="hive"),
+            partition_base_dir=os.path.join(self.root, "summary")
+        )
+
+    def summaries(self, filter: Optional[ds.Expression] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Summary rows matching a pyarrow filter expression, with only the requested columns"""
+        dataset = self._summary_dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns)
+        return dataset.to_table(filter=filter, columns=columns).to_pandas()
+
+    def top_k(
+            self,
+            metric: str,
+            k: int = 50,
+            filter: Optional[ds.Expression] = None,
+            columns: Optional[List[str]] = None,
+            ascending: bool = False
+    ) -> pd.DataFrame:
+        """The k best summaries by a metric, ignoring strategies where it is null or NaN"""
+        dataset = self._summary_dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns)
+
+        valid = ds.field(metric).is_valid() & ~pc.is_nan(ds.field(metric))
+        filter = valid if filter is None else filter & valid
+        columns = columns or dataset.schema.names
+        # The task key rides along so trades() can tell same-named strategies apart
+        selection = SELECTION_COLUMNS + [TASK_KEY_COLUMN] * (TASK_KEY_COLUMN in dataset.schema.names)
+        scan_columns = list(dict.fromkeys(selection + [metric] + columns))
+
+        table = dataset.to_table(filter=filter, columns=scan_columns)
+        order = "ascending" if ascending else "descending"
+        indices = pc.select_k_unstable(table, k=k, sort_keys=[(metric, order)])
+        table = table.take(indices).sort_by([(metric, order)])
+        return table.select(list(dict.fromkeys(selection + columns))).to_pandas()
+
+    def trades(self, selection: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Trades of the selected strategies, tagged with their indicator, strategy
+        type, timeframe and name; selection needs those four columns, like the
+        frames summaries() and top_k() return. Its task_key column, when
+        present, keeps dataset trades of strategies sharing a name apart.
+        """
+        tables = []
+        dataset_root = os.path.join(self.backtest_path, "dataset")
+        for (indicator, strategy_type), group in selection.groupby(["indicator", "strategy_type"], sort=True):
+            if os.path.isdir(partition_dir(dataset_root, "trades", indicator, strategy_type)):
+                tables.append(self._dataset_trades(dataset_root, indicator, strategy_type, group, columns))
+            else:
+                tables.extend(self._file_trades(indicator, strategy_type, group, columns))
+
+        tables = [table for table in tables if table.num_rows]
+        if not tables:
+            return pd.DataFrame()
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    def _dataset_trades(
+            self,
+            dataset_root: str,
+            indicator: str,
+            strategy_type: str,
+            group: pd.DataFrame,
+            columns: Optional[List[str]]
+    ) -> pa.Table:
+        dataset = ds.dataset(
+            os.path.join(dataset_root, "trades"),
+            format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+        )
+        # Strategies sharing a name are told apart by task key when both sides have one
+        identity = TASK_KEY_COLUMN if TASK_KEY_COLUMN in group and TASK_KEY_COLUMN in dataset.schema.names else "strategy_name"
+        filter = (
+            (ds.field("indicator") == indicator)
+            & (ds.field("strategy_type") == strategy_type)
+            & ds.field("timeframe").isin(sorted(group["timeframe"].astype(str).unique()))
+            & ds.field(identity).isin(sorted(group[identity].unique()))
+        )
+        scan_columns = None if columns is None else list(dict.fromkeys(SELECTION_COLUMNS + [identity] + columns))
+        table = dataset.to_table(filter=filter, columns=scan_columns)
+
+        # A name can exist on several timeframes; keep only the selected pairs
+        wanted = set(zip(group["timeframe"].astype(str), group[identity]))
+        keep = [pair in wanted for pair in zip(table.column("timeframe").to_pylist(), table.column(identity).to_pylist())]
+        return table.filter(pa.array(keep, type=pa.bool_()))
+
+    def _file_trades(
+            self,
+            indicator: str,
+            strategy_type: str,
+            group: pd.DataFrame,
+            columns: Optional[List[str]]
+    ) -> Iterable[pa.Table]:
+        for timeframe, strategy_name in zip(group["timeframe"].astype(str), group["strategy_name"]):
+            path = os.path.join(self.backtest_path, indicator, strategy_type, timeframe, f"{strategy_name}_trades.parquet")
+            if not os.path.exists(path):
+                logger.warning(f"No trades file for {strategy_name} ({indicator} {strategy_type} {timeframe})")
+                continue
+
+            table = pq.read_table(path, columns=columns)
+            for name, value in zip(SELECTION_COLUMNS, (indicator, strategy_type, timeframe, strategy_name)):
+                table = table.append_column(name, pa.array([value] * table.num_rows, type=pa.string()))
+            yield table.select(SELECTION_COLUMNS + [name for name in table.column_names if name not in SELECTION_COLUMNS])
+
+    def sql(self, query: str) -> pd.DataFrame:
+        """Run a DuckDB query over the views `summary` and, for the dataset layout, `trades`"""
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("ResultsCatalog.sql needs duckdb: pip install duckdb") from e
+
+        with duckdb.connect() as connection:
+            summary_glob = os.path.join(self.root, "summary", "*", "*", "*.parquet")
+            connection.execute(
+                f"CREATE VIEW summary AS SELECT * FROM read_parquet('{summary_glob}', hive_partitioning = true, union_by_name = true)"
+            )
+            trades_dir = os.path.join(self.backtest_path, "dataset", "trades")
+            if os.path.isdir(trades_dir):
+                trades_glob = os.path.join(trades_dir, "*", "*", "*", "*.parquet")
+                connection.execute(
+                    f"CREATE VIEW trades AS SELECT * FROM read_parquet('{trades_glob}', hive_partitioning = true, union_by_name = true)"
+                )
+            return connection.execute(query).df()
@@ -0,0 +1,308 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import pyarrow as pa
+
+from src.data_structure import BacktestConfig, SweepTask, TaskRecord
+from src.results import RowGroupWriter, conform_batch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Identity column of result rows: several strategies of a sweep can share a name
+TASK_KEY_COLUMN = "task_key"
+
+# ============================================================================
+# 12. RUN CHECKPOINT FUNCTIONS
+# ============================================================================
+
+def file_checksum(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def checksum_outputs(paths: Iterable[str]) -> Tuple[Tuple[str, str], ...]:
+    """(path, checksum) pairs of the files a task wrote"""
+    return tuple((path, file_checksum(path)) for path in paths)
+
+
+def task_key(task: SweepTask) -> str:
+    """
+    Run manifest key of a task: its name and parameters. Names alone are not
+    unique, since several templates or thresholds can render the same name.
+    """
+    return json.dumps([task.strategy_name, [[name, value] for name, value in task.parameters]], default=str)
+
+
+def _entry_key(entry: dict) -> str:
+    # Entries written before task keys were recorded are known by name only
+    return entry.get("task_key", entry["strategy_name"])
+
+
+def results_dir(config: BacktestConfig) -> str:
+    """Root folder of an indicator's results"""
+    return os.path.join(config.save_path, config.indicator, config.strategy_type)
+
+
+class RunManifest:
+    """
+    Append-only record of the strategies a sweep has completed.
+
+    Each completion is one JSON line (task key, strategy name, timeframe and
+    the checksums of its outputs) flushed and fsynced before the next one. A
+    truncated last line from a crash is ignored, and on load the manifest is
+    rewritten atomically with only the entries whose outputs still verify.
+
+    Summary rows returned by the workers are appended to an Arrow stream
+    segment in summary_rows/ before their JSON line, one segment per run,
+    with their task key column. On load the segments are compacted to the
+    rows of the verified entries, and write_summary streams them into the
+    consolidated summary file.
+    """
+
+    def __init__(self, path: str, base_dir: str):
+        self.path = path
+        self.base_dir = base_dir
+        self.rows_dir = os.path.join(base_dir, "summary_rows")
+        self.valid_entries: List[dict] = []
+        self._file = None
+        self._rows_file = None
+        self._rows_writer = None
+        self._rows_schema: Optional[pa.Schema] = None
+        self._checksums: Dict[str, str] = {}
+
+    @classmethod
+    def for_config(cls, config: BacktestConfig) -> "RunManifest":
+        base_dir = results_dir(config)
+        return cls(os.path.join(base_dir, "run_manifest.jsonl"), base_dir)
+
+    def _read_entries(self) -> List[dict]:
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring truncated manifest line in {self.path}")
+
+        return entries
+
+    def _checksum(self, path: str) -> str:
+        # Dataset part files are shared by many strategies, so hash each file once
+        if path not in self._checksums:
+            self._checksums[path] = file_checksum(path) if os.path.exists(path) else ""
+        return self._checksums[path]
+
+    def _verify(self, entry: dict) -> bool:
+        for rel_path, checksum in entry.get("outputs", {}).items():
+            path = os.path.join(self.base_dir, rel_path)
+            if self._checksum(path) != checksum:
+                logger.warning(f"Output {rel_path} of {entry['strategy_name']} is missing or corrupt, will redo")
+                return False
+        return True
+
+    def _rewrite(self, entries: List[dict]) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load_completed(self, verify: bool = True) -> Set[str]:
+        """Task keys of the completed strategies whose outputs and summary rows are intact"""
+        entries = {_entry_key(entry): entry for entry in self._read_entries()}
+        valid = [entry for entry in entries.values() if not verify or self._verify(entry)]
+        self._checksums.clear()
+
+        with_rows = self._compact_summary_rows({_entry_key(entry) for entry in valid})
+        for entry in valid:
+            if self._summary_missing(entry, with_rows):
+                logger.warning(f"Summary of {entry['strategy_name']} is missing, will redo")
+        valid = [entry for entry in valid if not self._summary_missing(entry, with_rows)]
+        self.valid_entries = valid
+
+        if entries:
+            os.makedirs(self.base_dir, exist_ok=True)
+            self._rewrite(valid)
+            logger.info(f"Run manifest {self.path}: {len(valid)}/{len(entries)} completed strategies verified")
+
+        return {_entry_key(entry) for entry in valid}
+
+    @staticmethod
+    def _summary_missing(entry: dict, with_rows: Set[str]) -> bool:
+        if "summary_rows" not in entry:
+            # Written before summaries were returned to the parent: the row is in a per-strategy file
+            return any(rel_path.startswith("summary" + os.sep) for rel_path in entry.get("outputs", {}))
+        return entry["summary_rows"] > 0 and _entry_key(entry) not in with_rows
+
+    def _segments(self) -> List[str]:
+        if not os.path.isdir(self.rows_dir):
+            return []
+        return sorted(os.path.join(self.rows_dir, name) for name in os.listdir(self.rows_dir) if name.endswith(".arrow"))
+
+    def _iter_segment(self, path: str) -> Iterator[pa.RecordBatch]:
+        try:
+            with pa.OSFile(path, "rb") as f:
+                for batch in pa.ipc.open_stream(f):
+                    yield batch
+        except (pa.ArrowInvalid, OSError) as e:
+            # A crash can leave an empty segment or a truncated last batch
+            logger.warning(f"Ignoring the unreadable end of {path}: {e}")
+
+    def _segment_schema(self, path: str) -> Optional[pa.Schema]:
+        try:
+            with pa.OSFile(path, "rb") as f:
+                return pa.ipc.open_stream(f).schema
+        except (pa.ArrowInvalid, OSError):
+            return None
+
+    def _compact_summary_rows(self, keep: Set[str]) -> Set[str]:
+        """Rewrite the segments as one holding a row per kept task key; returns the keys it holds"""
+        segments = self._segments()
+        schemas = [schema for schema in map(self._segment_schema, segments) if schema is not None]
+        if not schemas:
+            return set()
+
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+        compacted = os.path.join(self.rows_dir, "rows-0-compacted.arrow")
+        tmp_path = f"{compacted}.tmp"
+        seen: Set[str] = set()
+        with pa.OSFile(tmp_path, "wb") as f, pa.ipc.new_stream(f, schema) as writer:
+            for path in segments:
+                for batch in self._iter_segment(path):
+                    names = batch.column("strategy_name").to_pylist()
+                    index = batch.schema.get_field_index(TASK_KEY_COLUMN)
+                    keys = batch.column(index).to_pylist() if index >= 0 else [None] * len(names)
+                    mask = []
+                    for key, name in zip(keys, names):
+                        key = name if key is None else key
+                        fresh = key in keep and key not in seen
+                        if fresh:
+                            seen.add(key)
+                        mask.append(fresh)
+                    if any(mask):
+                        writer.write_batch(conform_batch(batch.filter(pa.array(mask)), schema))
+
+        os.replace(tmp_path, compacted)
+        for path in segments:
+            if path != compacted:
+                os.remove(path)
+        return seen
+
+    def completed_outputs(self) -> Set[str]:
+        """Normalized paths of every file referenced by a verified entry"""
+        return {
+            os.path.normpath(os.path.join(self.base_dir, rel_path))
+            for entry in self.valid_entries
+            for rel_path in entry.get("outputs", {})
+        }
+
+    def _append_summary_rows(self, batches: Iterable[Tuple[str, pa.RecordBatch]], key: str) -> int:
+        rows = 0
+        for table, batch in batches:
+            if table != "summary":
+                continue
+            if TASK_KEY_COLUMN not in batch.schema.names:
+                batch = batch.append_column(TASK_KEY_COLUMN, pa.array([key] * batch.num_rows, type=pa.string()))
+            if self._rows_writer is None:
+                os.makedirs(self.rows_dir, exist_ok=True)
+                segment = f"rows-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}.arrow"
+                self._rows_file = open(os.path.join(self.rows_dir, segment), "wb")
+                self._rows_schema = batch.schema
+                self._rows_writer = pa.ipc.new_stream(self._rows_file, self._rows_schema)
+            self._rows_writer.write_batch(conform_batch(batch, self._rows_schema))
+            rows += batch.num_rows
+
+        if rows:
+            self._rows_file.flush()
+            os.fsync(self._rows_file.fileno())
+        return rows
+
+    def record(self, record: TaskRecord) -> None:
+        """Durably append a completed strategy, its summary rows first"""
+        key = record.task_key or record.strategy_name
+        summary_rows = self._append_summary_rows(record.batches, key)
+        if self._file is None:
+            os.makedirs(self.base_dir, exist_ok=True)
+            self._file = open(self.path, "a")
+
+        entry = {
+            "task_key": key,
+            "strategy_name": record.strategy_name,
+            "timeframe": record.timeframe,
+            "outputs": {os.path.relpath(path, self.base_dir): checksum for path, checksum in record.outputs},
+            "summary_rows": summary_rows,
+            "completed_at": time.time()
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def write_summary(self, output_path: str) -> int:
+        """Stream the summary rows of every completed strategy into one parquet file; returns the row count"""
+        self.close()
+        segments = self._segments()
+        schemas = [schema for schema in map(self._segment_schema, segments) if schema is not None]
+        if not schemas:
+            logger.warning(f"No summary rows in {self.rows_dir}")
+            return 0
+
+        schema = pa.unify_schemas(schemas, promote_options="permissive").remove_metadata()
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with RowGroupWriter(output_path, schema) as writer:
+            for path in segments:
+                for batch in self._iter_segment(path):
+                    writer.write_batch(batch)
+
+        logger.info(f"Consolidated {writer.rows} summaries to {output_path}")
+        return writer.rows
+
+    def reset(self) -> None:
+        """Forget every completed strategy"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        shutil.rmtree(self.rows_dir, ignore_errors=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._rows_writer is not None:
+            self._rows_writer.close()
+            self._rows_file.close()
+            self._rows_writer = self._rows_file = None
+
+    def __enter__(self) -> "RunManifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_run_manifests(configs: Dict[str, BacktestConfig], resume: bool) -> Tuple[Dict[str, RunManifest], Dict[str, Set[str]]]:
+    """Open one manifest per indicator and load what previous runs already completed"""
+    manifests = {indicator: RunManifest.for_config(config) for indicator, config in configs.items()}
+    completed = {
+        indicator: manifest.load_completed() if resume else set()
+        for indicator, manifest in manifests.items()
+    }
+    if not resume:
+        for manifest in manifests.values():
+            manifest.reset()
+
+    return manifests, completed
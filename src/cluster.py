@@ -0,0 +1,358 @@
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future
+from concurrent.futures import wait as wait_for_futures
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+import itertools
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import pandas as pd
+
+from src.data_structure import BatchResult, ClusterConfig
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# 14. CLUSTER EXECUTION FUNCTIONS
+# ============================================================================
+#
+# Protocol, one pickled tuple per message:
+#   worker -> coordinator: ("hello", name), ("heartbeat",),
+#                          ("result", task_id, ok, value), ("revoked", task_id, ok)
+#   coordinator -> worker: ("init", initializer, initargs),
+#                          ("task", task_id, fn, args, kwargs), ("revoke", task_id), ("stop",)
+#
+# Functions and results travel by pickle, so every node needs the same code,
+# and the data and results folders must be on a filesystem shared by all nodes.
+
+def cluster_authkey(config: ClusterConfig) -> bytes:
+    """Shared secret of the cluster"""
+    if not config.authkey:
+        raise ValueError("Cluster backend needs cluster.authkey or BACKTESTER_CLUSTER_AUTHKEY")
+    return config.authkey.encode()
+
+
+class _WorkerLink:
+    """Coordinator side of a worker connection"""
+
+    def __init__(self, name: str, conn: Connection):
+        self.name = name
+        self.conn = conn
+        # Assignment order: the first task is running, the rest are queued on the worker
+        self.assigned: Dict[int, None] = OrderedDict()
+        self.revoking: Set[int] = set()
+        self._send_lock = threading.Lock()
+
+    @property
+    def stealable(self) -> int:
+        return len(self.assigned) - len(self.revoking) - 1
+
+    def send(self, message: tuple) -> None:
+        with self._send_lock:
+            self.conn.send(message)
+
+
+class ClusterExecutor(Executor):
+    """
+    Executor whose tasks run on remote worker nodes.
+
+    Workers connect over TCP, receive the initializer once and keep up to
+    `prefetch` tasks queued behind the running one. When the queue runs dry a
+    worker that is about to go idle steals the last queued task of the most
+    loaded peer. Tasks of a worker that disconnects or misses its heartbeat
+    are re-queued.
+    """
+
+    def __init__(self, config: ClusterConfig, initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        self.config = config
+        self.initializer = initializer
+        self.initargs = initargs
+        self.rss_history: List[Tuple[float, str, int, float, float, float]] = []
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._tasks: Dict[int, Tuple[Callable, tuple, dict, Future]] = {}
+        self._pending: Deque[int] = deque()
+        self._workers: Dict[str, _WorkerLink] = {}
+        self._shutdown = False
+        self._listener = Listener((config.host, config.port), authkey=cluster_authkey(config))
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+        logger.info(f"Cluster coordinator listening on {self.address[0]}:{self.address[1]}")
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Bound (host, port); the actual port when config.port is 0"""
+        return self._listener.address
+
+    # --- Connections ---
+
+    def _accept_loop(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError as e:
+                logger.warning(f"Rejected cluster connection: {e}")
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        link = None
+        try:
+            _, name = conn.recv()
+            link = _WorkerLink(name, conn)
+            link.send(("init", self.initializer, self.initargs))
+            with self._lock:
+                self._workers[name] = link
+                n_workers = len(self._workers)
+            logger.info(f"Worker {name} joined ({n_workers} connected)")
+            self._dispatch()
+
+            while True:
+                if not conn.poll(self.config.heartbeat_timeout_s):
+                    raise TimeoutError(f"no heartbeat for {self.config.heartbeat_timeout_s}s")
+                self._handle(link, conn.recv())
+
+        except (EOFError, OSError, TimeoutError) as e:
+            if link is not None and not self._shutdown:
+                logger.warning(f"Lost worker {link.name}: {str(e) or type(e).__name__}")
+        finally:
+            conn.close()
+            if link is not None:
+                self._drop(link)
+
+    def _drop(self, link: _WorkerLink) -> None:
+        with self._lock:
+            self._workers.pop(link.name, None)
+            requeued = [task_id for task_id in link.assigned if task_id in self._tasks]
+            self._pending.extendleft(reversed(requeued))
+            link.assigned.clear()
+            n_workers = len(self._workers)
+
+        if requeued:
+            logger.warning(f"Re-queued {len(requeued)} tasks of {link.name} ({n_workers} workers left)")
+        self._dispatch()
+
+    # --- Scheduling ---
+
+    def _handle(self, link: _WorkerLink, message: tuple) -> None:
+        kind = message[0]
+        if kind == "result":
+            _, task_id, ok, value = message
+            with self._lock:
+                link.assigned.pop(task_id, None)
+                link.revoking.discard(task_id)
+                entry = self._tasks.pop(task_id, None)
+
+            if entry is not None:
+                future = entry[3]
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+            self._dispatch()
+            self._steal_for(link)
+
+        elif kind == "revoked":
+            _, task_id, ok = message
+            with self._lock:
+                link.revoking.discard(task_id)
+                if ok and task_id in link.assigned:
+                    del link.assigned[task_id]
+                    self._pending.appendleft(task_id)
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand pending tasks to the least loaded workers with free slots"""
+        sends = []
+        with self._lock:
+            while self._pending and self._workers:
+                link = min(self._workers.values(), key=lambda w: len(w.assigned))
+                if len(link.assigned) > self.config.prefetch:
+                    break
+
+                task_id = self._pending.popleft()
+                fn, args, kwargs, future = self._tasks[task_id]
+                if not future.running() and not future.set_running_or_notify_cancel():
+                    del self._tasks[task_id]
+                    continue
+
+                link.assigned[task_id] = None
+                sends.append((link, ("task", task_id, fn, args, kwargs)))
+
+        for link, message in sends:
+            try:
+                link.send(message)
+            except OSError:
+                # The serving thread notices the dead connection and re-queues
+                pass
+
+    def _steal_for(self, thief: _WorkerLink) -> None:
+        """Ask the most loaded peer to give up its last queued task to a worker running dry"""
+        with self._lock:
+            if self._pending or len(thief.assigned) > 1:
+                return
+            victims = [w for w in self._workers.values() if w is not thief and w.stealable > 0]
+            if not victims:
+                return
+            victim = max(victims, key=lambda w: w.stealable)
+            task_id = next(t for t in reversed(victim.assigned) if t not in victim.revoking)
+            victim.revoking.add(task_id)
+        logger.debug(f"Worker {thief.name} stealing task {task_id} from {victim.name}")
+
+        try:
+            victim.send(("revoke", task_id))
+        except OSError:
+            pass
+
+    # --- Executor interface ---
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            task_id = next(self._ids)
+            self._tasks[task_id] = (fn, args, kwargs, future)
+            self._pending.append(task_id)
+
+        self._dispatch()
+        return future
+
+    def record(self, result: BatchResult) -> None:
+        """Track a finished batch's worker RSS"""
+        self.rss_history.append((
+            time.monotonic() - self._started,
+            "cluster",
+            result.pid,
+            result.rss_start_mb,
+            result.rss_peak_mb,
+            result.rss_end_mb
+        ))
+
+    def rss_report(self) -> pd.DataFrame:
+        """Per-batch RSS samples of every worker over the run"""
+        return pd.DataFrame(
+            self.rss_history,
+            columns=["elapsed_s", "generation", "pid", "rss_start_mb", "rss_peak_mb", "rss_end_mb"]
+        )
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                for task_id in self._pending:
+                    self._tasks.pop(task_id)[3].cancel()
+                self._pending.clear()
+            futures = [entry[3] for entry in self._tasks.values()]
+
+        if wait:
+            wait_for_futures(futures)
+
+        with self._lock:
+            links = list(self._workers.values())
+        for link in links:
+            try:
+                link.send(("stop",))
+            except OSError:
+                pass
+        self._listener.close()
+
+
+def run_cluster_worker(host: str, port: int, authkey: bytes, heartbeat_interval_s: float) -> None:
+    """Worker node loop: pull tasks from the coordinator until it stops or goes away"""
+    conn = Client((host, port), authkey=authkey)
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    send_lock = threading.Lock()
+    ready = threading.Condition()
+    queue: Deque[tuple] = deque()
+    stopped = threading.Event()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def receive() -> None:
+        try:
+            while True:
+                message = conn.recv()
+                kind = message[0]
+                if kind == "init":
+                    _, initializer, initargs = message
+                    if initializer is not None:
+                        initializer(*initargs)
+                elif kind == "task":
+                    with ready:
+                        queue.append(message[1:])
+                        ready.notify()
+                elif kind == "revoke":
+                    with ready:
+                        entry = next((e for e in queue if e[0] == message[1]), None)
+                        if entry is not None:
+                            queue.remove(entry)
+                    send(("revoked", message[1], entry is not None))
+                elif kind == "stop":
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            with ready:
+                stopped.set()
+                ready.notify()
+
+    def heartbeat() -> None:
+        while not stopped.wait(heartbeat_interval_s):
+            try:
+                send(("heartbeat",))
+            except OSError:
+                return
+
+    send(("hello", name))
+    threading.Thread(target=receive, daemon=True).start()
+    threading.Thread(target=heartbeat, daemon=True).start()
+    logger.info(f"Worker {name} connected to {host}:{port}")
+
+    while True:
+        with ready:
+            while not queue and not stopped.is_set():
+                ready.wait()
+            if stopped.is_set():
+                break
+            task_id, fn, args, kwargs = queue.popleft()
+
+        try:
+            message = ("result", task_id, True, fn(*args, **kwargs))
+        except Exception as e:
+            message = ("result", task_id, False, e)
+
+        try:
+            send(message)
+        except OSError:
+            break
+        except Exception as e:
+            # Unpicklable result or exception
+            send(("result", task_id, False, RuntimeError(f"Task {task_id} result could not be sent: {e!r}")))
+
+    conn.close()
+    logger.info(f"Worker {name} stopped")
+
+
+def run_cluster_node(host: str, port: int, authkey: bytes, heartbeat_interval_s: float, processes: int) -> None:
+    """Start one cluster worker per process on this node and wait for them"""
+    workers = [
+        multiprocessing.Process(target=run_cluster_worker, args=(host, port, authkey, heartbeat_interval_s))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
@@ -3,12 +3,15 @@ import logging
 import os
 import yaml
 
-from src.data_structure import IndicatorConfig, BacktestConfig
+from src.data_structure import IndicatorConfig, BacktestConfig, SensitivityConfig, SystemConfig, ClusterConfig
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Environment variable holding the cluster secret when it is not in the config
+CLUSTER_AUTHKEY_ENV = "BACKTESTER_CLUSTER_AUTHKEY"
+
 # ============================================================================
 # 1. CONFIGURATION READING FUNCTIONS
 # ============================================================================
@@ -69,6 +72,67 @@ def create_backtest_config(
         template_path=os.path.join(template_dir_path, strategy_type, indicator),
         initial_capital=backtest.get('initial_capital', 100_000.0),
         point_value=backtest.get('point_value', 100.0),
+        fees=backtest.get('fees', 0.0),
+        slippage=backtest.get('slippage', 0.0),
         timeframe_names=backtest.get('timeframe_names', {}),
         frequency_map=backtest.get('frequency_map', {})
     )
+
+
+def create_system_config(config_data: Dict[str, Any]) -> SystemConfig:
+    """Create execution settings from config data"""
+    system = config_data.get('system', {})
+
+    return SystemConfig(
+        logging_level=system.get('logging_level', 'INFO'),
+        max_workers=system.get('max_workers') or os.cpu_count() or 1,
+        memory_limit_mb=system.get('memory_limit_mb', 4096),
+        cache_enabled=system.get('cache_enabled', False),
+        cache_size=system.get('cache_size', 100),
+        parallel_processing=system.get('parallel_processing', True),
+        max_batch_size=system.get('max_batch_size', 64),
+        max_tasks_per_worker=system.get('max_tasks_per_worker'),
+        worker_rss_high_water_mb=system.get('worker_rss_high_water_mb'),
+        cache_path=system.get('cache_path'),
+        backend=system.get('backend', 'process'),
+        pipeline_batches=system.get('pipeline_batches', 2),
+        write_queue_size=system.get('write_queue_size', 8),
+        result_layout=system.get('result_layout', 'files'),
+        dataset_row_group_size=system.get('dataset_row_group_size', 1_000_000),
+        dataset_flush_interval_s=system.get('dataset_flush_interval_s', 60.0),
+        shared_data_mb=system.get('shared_data_mb', 1024)
+    )
+
+
+def create_cluster_config(config_data: Dict[str, Any]) -> ClusterConfig:
+    """Create cluster backend settings from config data"""
+    cluster = config_data.get('cluster') or {}
+
+    return ClusterConfig(
+        host=cluster.get('host', '0.0.0.0'),
+        port=cluster.get('port', 6070),
+        authkey=cluster.get('authkey') or os.environ.get(CLUSTER_AUTHKEY_ENV),
+        expected_workers=cluster.get('expected_workers', 1),
+        prefetch=cluster.get('prefetch', 2),
+        heartbeat_interval_s=cluster.get('heartbeat_interval_s', 5.0),
+        heartbeat_timeout_s=cluster.get('heartbeat_timeout_s', 30.0)
+    )
+
+
+def extract_sensitivity_config(config_data: Dict[str, Any], backtest_config: BacktestConfig) -> SensitivityConfig:
+    """Extract the cost sensitivity grid, defaulting each axis to the backtest value"""
+    sensitivity = config_data.get('sensitivity') or {}
+
+    def as_list(key: str, default: float) -> list:
+        values = sensitivity.get(key)
+        if values is None:
+            return [default]
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        return [float(v) for v in values]
+
+    return SensitivityConfig(
+        fees=as_list('fees', backtest_config.fees),
+        slippages=as_list('slippage', backtest_config.slippage),
+        point_values=as_list('point_value', backtest_config.point_value)
+    )
@@ -1,8 +1,12 @@
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional, Any
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional, Any, NamedTuple
+import numpy as np
 import pandas as pd
 import logging
 
+from src.strategy_ir import ParsedStrategy
+from src.trade_records import trades_to_frame
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -23,10 +27,46 @@ class BacktestConfig:
     template_path: str
     initial_capital: float
     point_value: float
+    fees: float
+    slippage: float
     timeframe_names: Dict[str, str]
     frequency_map: Dict[str, str]
 
 
+@dataclass(frozen=True)
+class SystemConfig:
+    """Execution settings from the system section"""
+    logging_level: str
+    max_workers: int
+    memory_limit_mb: int
+    cache_enabled: bool
+    cache_size: int
+    parallel_processing: bool
+    max_batch_size: int
+    max_tasks_per_worker: Optional[int]
+    worker_rss_high_water_mb: Optional[float]
+    cache_path: Optional[str] = None
+    backend: str = "process"
+    pipeline_batches: int = 2
+    write_queue_size: int = 8
+    result_layout: str = "files"
+    dataset_row_group_size: int = 1_000_000
+    dataset_flush_interval_s: float = 60.0
+    shared_data_mb: float = 1024
+
+
+@dataclass(frozen=True)
+class ClusterConfig:
+    """Coordinator address and worker protocol settings of the cluster backend"""
+    host: str
+    port: int
+    authkey: Optional[str]
+    expected_workers: int
+    prefetch: int
+    heartbeat_interval_s: float
+    heartbeat_timeout_s: float
+
+
 @dataclass(frozen=True)
 class IndicatorConfig:
     """Indicator configuration from YAML"""
@@ -37,6 +77,14 @@ class IndicatorConfig:
     additional_params: Dict[str, Any]
 
 
+@dataclass(frozen=True)
+class SensitivityConfig:
+    """Cost and sizing grid used to re-price stored trades"""
+    fees: List[float]
+    slippages: List[float]
+    point_values: List[float]
+
+
 @dataclass(frozen=True)
 class StrategyTemplate:
     """Strategy template information"""
@@ -47,11 +95,79 @@ class StrategyTemplate:
 
 @dataclass(frozen=True)
 class BacktestResult:
-    """Result of a single backtest"""
+    """
+    Result of a single backtest; trades are compact TRADE_RECORD_DTYPE records.
+    Without trade-level output only summary is set, the strategy's summary row
+    computed during the simulation (None when it made no trades).
+    """
     strategy_name: str
     timeframe: str
-    trades_df: pd.DataFrame
+    trades: np.ndarray
     stats_df: pd.DataFrame
     success: bool
     error_message: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None
+
+    @property
+    def trades_df(self) -> pd.DataFrame:
+        """Trades as a readable DataFrame, built on demand"""
+        return trades_to_frame(self.trades)
+
+
+@dataclass(frozen=True)
+class WorkerContext:
+    """Per-indicator state shipped once to every pool worker"""
+    strategy_type: str
+    file_reference: Dict[str, Dict[str, List[str]]]
+    backtest_config: BacktestConfig
+    cache_dir: Optional[str] = None
+    file_fingerprints: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    write_queue_size: int = 8
+    result_layout: str = "files"
+
+
+class SweepTask(NamedTuple):
+    """A strategy queued in the parent, with the data it resolves to"""
+    indicator: str
+    strategy_name: str
+    strategy: ParsedStrategy
+    timeframes: Tuple[str, ...]
+    files_needed: Dict[str, Dict[str, List[str]]]
+    parameters: Tuple[Tuple[str, Any], ...] = ()
+
+
+class TaskRecord(NamedTuple):
+    """Fixed-schema outcome of a single strategy, returned by workers"""
+    strategy_name: str
+    timeframe: str
+    success: bool
+    error_message: Optional[str]
+    outputs: Tuple[Tuple[str, str], ...] = ()
+    cache_hit: bool = False
+    # (table, record batch) pairs for the dataset writer when results are not written by workers
+    batches: Tuple[Tuple[str, Any], ...] = ()
+    # Identity of the sweep task in the run manifest, set by the parent
+    task_key: Optional[str] = None
+
+
+class BatchResult(NamedTuple):
+    """Records of a worker batch plus the worker's memory footprint while running it"""
+    pid: int
+    rss_start_mb: float
+    rss_peak_mb: float
+    rss_end_mb: float
+    records: List[TaskRecord]
+
+
+class BatchPlan(NamedTuple):
+    """Parsed strategies of a batch; summaries already holds the cache hits"""
+    strategy_type: str
+    timeframes: List[str]
+    parsed: List[ParsedStrategy]
+    files_needed: List[Dict[str, Dict[str, List[str]]]]
+    cache_keys: List[Optional[str]]
+    summaries: List[Optional[dict]]
 
+    @property
+    def pending(self) -> List[int]:
+        return [i for i, summary in enumerate(self.summaries) if summary is None]
@@ -0,0 +1,347 @@
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.checkpoint import TASK_KEY_COLUMN, file_checksum
+from src.data_structure import BacktestConfig, TaskRecord
+from src.results import RowGroupWriter, consolidated_summary_path, read_unified_schema
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RESULT_TABLES = ("trades", "summary")
+PARTITION_SCHEMA = pa.schema([
+    ("indicator", pa.string()),
+    ("strategy_type", pa.string()),
+    ("timeframe", pa.string())
+])
+COMPRESSION = "zstd"
+INTEGER_SUMMARY_COLUMNS = {"nbr_trades"}
+
+# ============================================================================
+# 16. RESULT DATASET FUNCTIONS
+# ============================================================================
+
+def dataset_root(config: BacktestConfig) -> str:
+    """Root of the partitioned result dataset of a symbol"""
+    return os.path.join(config.save_path, "dataset")
+
+
+def partition_dir(root: str, table: str, indicator: str, strategy_type: str, timeframe: Optional[str] = None) -> str:
+    """Hive partition folder of a result table"""
+    path = os.path.join(root, table, f"indicator={indicator}", f"strategy_type={strategy_type}")
+    return os.path.join(path, f"timeframe={timeframe}") if timeframe is not None else path
+
+
+def open_result_dataset(root: str, table: str) -> ds.Dataset:
+    """Result table as a pyarrow dataset, with the partition keys as string columns"""
+    return ds.dataset(
+        os.path.join(root, table),
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+    )
+
+
+def summary_record_batch(summary_df: pd.DataFrame, drop_columns: Tuple[str, ...] = ()) -> pa.RecordBatch:
+    """Summary rows as a record batch with one schema whatever the statistics came out as"""
+    summary_df = summary_df.drop(columns=list(drop_columns), errors="ignore").reset_index(drop=True)
+    # Statistics fall back to integer 0 when a strategy has no wins/losses; keep one schema
+    for column in summary_df.columns:
+        if column not in INTEGER_SUMMARY_COLUMNS and pd.api.types.is_numeric_dtype(summary_df[column]):
+            summary_df[column] = summary_df[column].astype("float64")
+    return pa.RecordBatch.from_pandas(summary_df, preserve_index=False)
+
+
+def with_parameter_columns(
+        batches: Tuple[Tuple[str, pa.RecordBatch], ...],
+        parameters: Dict[str, object],
+        schema: pa.Schema
+) -> Tuple[Tuple[str, pa.RecordBatch], ...]:
+    """Append a strategy's typed parameter columns to its summary batch"""
+    tagged = []
+    for table, batch in batches:
+        if table == "summary":
+            fields, columns = list(batch.schema), batch.columns
+            for field in schema:
+                if field.name in batch.schema.names:
+                    continue
+                value = parameters.get(field.name)
+                if value is not None and pa.types.is_string(field.type):
+                    value = str(value)
+                fields.append(field)
+                columns.append(pa.array([value] * batch.num_rows, type=field.type))
+            batch = pa.RecordBatch.from_arrays(columns, schema=pa.schema(fields))
+        tagged.append((table, batch))
+    return tuple(tagged)
+
+
+def with_task_key(
+        batches: Tuple[Tuple[str, pa.RecordBatch], ...],
+        key: str
+) -> Tuple[Tuple[str, pa.RecordBatch], ...]:
+    """Tag every batch of a strategy with its task key, right after the strategy name"""
+    tagged = []
+    for table, batch in batches:
+        keys = pa.array([key] * batch.num_rows, type=pa.string())
+        index = batch.schema.get_field_index(TASK_KEY_COLUMN)
+        if index >= 0:
+            batch = batch.set_column(index, TASK_KEY_COLUMN, keys)
+        else:
+            batch = batch.add_column(batch.schema.get_field_index("strategy_name") + 1, TASK_KEY_COLUMN, keys)
+        tagged.append((table, batch))
+    return tuple(tagged)
+
+
+def alias_summary_batches(
+        batches: Tuple[Tuple[str, pa.RecordBatch], ...],
+        strategy_name: str
+) -> Tuple[Tuple[str, pa.RecordBatch], ...]:
+    """Summary batches of a strategy relabelled for an alias that computes the same thing; trades are not repeated"""
+    aliased = []
+    for table, batch in batches:
+        if table != "summary":
+            continue
+        index = batch.schema.get_field_index("strategy_name")
+        names = pa.array([strategy_name] * batch.num_rows, type=batch.schema.field(index).type)
+        batch = batch.set_column(index, batch.schema.field(index), names)
+        aliased.append((table, batch))
+    return tuple(aliased)
+
+
+def clear_partitions(root: str, indicator: str, strategy_type: str, keep: Set[str]) -> int:
+    """Remove the part files of an indicator that no completed strategy references; returns how many"""
+    removed = 0
+    for table in RESULT_TABLES:
+        base = partition_dir(root, table, indicator, strategy_type)
+        if not os.path.isdir(base):
+            continue
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                path = os.path.normpath(os.path.join(dirpath, filename))
+                if path not in keep:
+                    os.remove(path)
+                    removed += 1
+
+    if removed:
+        logger.info(f"Removed {removed} stale result files of {indicator} {strategy_type}")
+    return removed
+
+
+class DatasetWriter:
+    """
+    Single writer of the partitioned result dataset.
+
+    Strategy records are queued by the scheduling loop; a writer thread buffers
+    their record batches per (table, partition) and writes a zstd part file once
+    a buffer reaches row_group_size rows, when all buffers together pass
+    max_buffered_rows, after flush_interval_s, and on close. A part file is
+    written under a temporary name and renamed when complete. A strategy is
+    committed through on_commit once all of its batches are in renamed files.
+    """
+
+    def __init__(
+            self,
+            root: str,
+            on_commit: Callable[[str, TaskRecord], None],
+            row_group_size: int = 1_000_000,
+            max_buffered_rows: int = 4_000_000,
+            flush_interval_s: float = 60.0,
+            max_pending: int = 64
+    ):
+        self.root = root
+        self.on_commit = on_commit
+        self.row_group_size = row_group_size
+        self.max_buffered_rows = max_buffered_rows
+        self.flush_interval_s = flush_interval_s
+        self.run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self.files_written = 0
+        self.rows_written = 0
+        self._seq = itertools.count()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._buffers: Dict[Tuple, List[pa.RecordBatch]] = defaultdict(list)
+        self._buffer_rows: Dict[Tuple, int] = defaultdict(int)
+        self._waiting: Dict[Tuple, List[int]] = defaultdict(list)
+        self._records: Dict[int, List] = {}
+        self._last_flush = time.monotonic()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True, name="dataset-writer")
+        self._thread.start()
+
+    def submit(self, indicator: str, strategy_type: str, record: TaskRecord) -> None:
+        """Queue a successful record with its batches; blocks while the writer is behind"""
+        if self._error is not None:
+            raise RuntimeError("Dataset writer failed") from self._error
+        self._queue.put((indicator, strategy_type, record))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("Dataset writer failed") from self._error
+        logger.info(f"Dataset writer: {self.rows_written} rows in {self.files_written} files under {self.root}")
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- Writer thread ---
+
+    def _run(self) -> None:
+        item = ()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(0.1, self.flush_interval_s / 10))
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if item:
+                    self._add(*item)
+                if time.monotonic() - self._last_flush >= self.flush_interval_s:
+                    self._flush_all()
+            self._flush_all()
+        except BaseException as e:
+            logger.error(f"Dataset writer failed: {e}")
+            self._error = e
+            # Keep draining so producers never block on a dead writer
+            while item is not None:
+                item = self._queue.get()
+
+    def _add(self, indicator: str, strategy_type: str, record: TaskRecord) -> None:
+        record_id = next(self._seq)
+        keys = []
+        for table, batch in record.batches:
+            key = (table, indicator, strategy_type, record.timeframe)
+            self._buffers[key].append(batch)
+            self._buffer_rows[key] += batch.num_rows
+            self._waiting[key].append(record_id)
+            keys.append(key)
+
+        # [indicator, record without its batches, buffers left to write, outputs]
+        self._records[record_id] = [indicator, record._replace(batches=()), set(keys), []]
+        if not keys:
+            self._commit(record_id)
+
+        for key in set(keys):
+            if self._buffer_rows[key] >= self.row_group_size:
+                self._flush(key)
+
+        while sum(self._buffer_rows.values()) > self.max_buffered_rows:
+            self._flush(max(self._buffer_rows, key=self._buffer_rows.get))
+
+    def _flush_all(self) -> None:
+        for key in list(self._buffers):
+            self._flush(key)
+        self._last_flush = time.monotonic()
+
+    def _flush(self, key: Tuple) -> None:
+        batches = self._buffers.pop(key, [])
+        self._buffer_rows.pop(key, None)
+        waiting = self._waiting.pop(key, [])
+        if not batches:
+            return
+
+        table_name, indicator, strategy_type, timeframe = key
+        table = pa.concat_tables(
+            [pa.Table.from_batches([batch]) for batch in batches], promote_options="permissive"
+        )
+
+        directory = partition_dir(self.root, table_name, indicator, strategy_type, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        filename = f"part-{self.run_id}-{self.files_written:06d}.parquet"
+        path = os.path.join(directory, filename)
+        tmp_path = os.path.join(directory, f"_{filename}.tmp")
+        pq.write_table(table, tmp_path, compression=COMPRESSION, row_group_size=self.row_group_size)
+        os.replace(tmp_path, path)
+
+        self.files_written += 1
+        self.rows_written += table.num_rows
+        checksum = file_checksum(path)
+
+        for record_id in waiting:
+            entry = self._records[record_id]
+            entry[2].discard(key)
+            entry[3].append((path, checksum))
+            if not entry[2]:
+                self._commit(record_id)
+
+    def _commit(self, record_id: int) -> None:
+        indicator, record, _, outputs = self._records.pop(record_id)
+        self.on_commit(indicator, record._replace(outputs=tuple(outputs)))
+
+
+def iter_dataset_trades(
+        root: str,
+        indicator: str,
+        strategy_type: str,
+        columns: Optional[List[str]] = None
+) -> Iterable[Tuple[str, str, str, pd.DataFrame]]:
+    """
+    Yield (task_key, strategy_name, timeframe, trades) of an indicator from
+    the dataset, one partition at a time. Trades are grouped by task key, so
+    strategies sharing a name stay apart; partitions written before the key
+    column existed are grouped by name, which then stands in for the key.
+    """
+    base = partition_dir(root, "trades", indicator, strategy_type)
+    if not os.path.isdir(base):
+        return
+
+    for entry in sorted(os.listdir(base)):
+        if not entry.startswith("timeframe="):
+            continue
+        timeframe = entry.split("=", 1)[1]
+        partition = pq.ParquetDataset(os.path.join(base, entry))
+        identity = ["strategy_name"] + [TASK_KEY_COLUMN] * (TASK_KEY_COLUMN in partition.schema.names)
+        df = partition.read(columns=identity + columns if columns is not None else None).to_pandas()
+        for key, trades_df in df.groupby(identity[-1], sort=True):
+            strategy_name = trades_df["strategy_name"].iloc[0]
+            yield key, strategy_name, timeframe, trades_df.drop(columns=identity).reset_index(drop=True)
+
+
+def consolidate_dataset_summary(root: str, config: BacktestConfig, max_workers: int = 4) -> Optional[str]:
+    """Stream an indicator's summary partition into the single summary file the files layout produces"""
+    base = partition_dir(root, "summary", config.indicator, config.strategy_type)
+    if not os.path.isdir(base):
+        logger.warning(f"No summaries in {base}")
+        return None
+
+    partitioning = ds.partitioning(pa.schema([("timeframe", pa.string())]), flavor="hive")
+    files = sorted(ds.dataset(base, format="parquet", partitioning=partitioning).files)
+    schema, corrupt = read_unified_schema(files, max_workers)
+    if corrupt:
+        logger.error(f"Skipped {len(corrupt)} corrupt summary files of {config.indicator}: {corrupt}")
+    if schema is None:
+        return None
+
+    skipped = set(corrupt)
+    dataset = ds.dataset(
+        [path for path in files if path not in skipped],
+        schema=schema.append(pa.field("timeframe", pa.string())),
+        format="parquet",
+        partitioning=partitioning,
+        partition_base_dir=base
+    )
+    columns = ["strategy_name", "timeframe"] + [name for name in schema.names if name not in ("strategy_name", "timeframe")]
+    scanner = dataset.scanner(columns=columns, use_threads=True)
+
+    output_path = consolidated_summary_path(config)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with RowGroupWriter(output_path, scanner.projected_schema) as writer:
+        for batch in scanner.to_batches():
+            writer.write_batch(batch)
+
+    logger.info(f"Consolidated {writer.rows} summaries to {output_path}")
+    return output_path
@@ -26,13 +26,13 @@ def remove_matching_suffix(columns_with_tf):
     return cleaned
 
 
-def build_file_column_reference(symbol: str, data_path: str, timeframes:dict) -> Dict[str, Dict[str, List[str]]]:
-    """Build reference of which columns are in which files"""
-    column_reference = {tf: {} for tf in timeframes.keys()}
+def build_file_manifest(symbol: str, data_path: str, timeframes: dict) -> Dict[str, Dict[str, Any]]:
+    """Build a manifest of every indicator file: timeframe, columns, row count and fingerprint"""
+    manifest = {}
 
     if not os.path.exists(data_path):
         logger.warning(f"Data path does not exist: {data_path}")
-        return column_reference
+        return manifest
 
     for folder in os.listdir(data_path):
         folder_path = os.path.join(data_path, folder)
@@ -47,45 +47,71 @@ def build_file_column_reference(symbol: str, data_path: str, timeframes:dict) ->
                     try:
                         # Read parquet metadata only
                         parquet_file = pq.ParquetFile(file_path)
-                        columns = parquet_file.schema.names
-                        column_reference[timeframe][file_path] = columns
+                        stat = os.stat(file_path)
+                        manifest[file_path] = {
+                            "timeframe": timeframe,
+                            "columns": parquet_file.schema.names,
+                            "num_rows": parquet_file.metadata.num_rows,
+                            "size_bytes": stat.st_size,
+                            "mtime_ns": stat.st_mtime_ns
+                        }
                     except Exception as e:
                         logger.warning(f"Could not read metadata from {file_path}: {e}")
 
                     break
 
-    total_files = sum(len(files) for files in column_reference.values())
-    logger.info(f"Built file reference for {total_files} files")
+    logger.info(f"Built file manifest for {len(manifest)} files")
+    return manifest
+
+
+def file_reference_from_manifest(
+        manifest: Dict[str, Dict[str, Any]],
+        timeframes: dict
+) -> Dict[str, Dict[str, List[str]]]:
+    """Project a file manifest onto the timeframe -> file -> columns reference"""
+    column_reference = {tf: {} for tf in timeframes.keys()}
+    for file_path, info in manifest.items():
+        column_reference[info["timeframe"]][file_path] = info["columns"]
+
     return column_reference
 
 
-def identify_required_columns(strategy_yaml: str) -> List[Tuple[str, Optional[str]]]:
-    """Identify which columns are required by a strategy"""
-    try:
-        strategy = yaml.safe_load(strategy_yaml)
-        required = set()
+def build_file_column_reference(symbol: str, data_path: str, timeframes:dict) -> Dict[str, Dict[str, List[str]]]:
+    """Build reference of which columns are in which files"""
+    return file_reference_from_manifest(build_file_manifest(symbol, data_path, timeframes), timeframes)
+
+
+def strategy_required_columns(strategy: Dict[str, Any]) -> List[Tuple[str, Optional[str]]]:
+    """Columns, with their timeframe, read by the conditions of a parsed strategy"""
+    required = set()
 
-        def scan_conditions(conditions):
-            for cond in conditions:
-                signal_col = cond.get("signal")
-                value_ref = cond.get("value")
-                tf = cond.get("timeframe")
+    def scan_conditions(conditions):
+        for cond in conditions:
+            signal_col = cond.get("signal")
+            value_ref = cond.get("value")
+            tf = cond.get("timeframe")
 
-                if isinstance(signal_col, str):
-                    required.add((signal_col, tf))
+            if isinstance(signal_col, str):
+                required.add((signal_col, tf))
 
-                if isinstance(value_ref, str):
-                    required.add((value_ref, tf))
+            if isinstance(value_ref, str):
+                required.add((value_ref, tf))
 
-        # Scan entry and exit conditions
-        for side in ("long", "short"):
-            if "entry" in strategy and side in strategy["entry"]:
-                scan_conditions(strategy["entry"][side]["conditions"])
+    # Scan entry and exit conditions
+    for side in ("long", "short"):
+        if "entry" in strategy and side in strategy["entry"]:
+            scan_conditions(strategy["entry"][side]["conditions"])
 
-            if "exit" in strategy and side in strategy["exit"]:
-                scan_conditions(strategy["exit"][side]["conditions"])
+        if "exit" in strategy and side in strategy["exit"]:
+            scan_conditions(strategy["exit"][side]["conditions"])
 
-        return sorted(list(required))
+    return sorted(list(required))
+
+
+def identify_required_columns(strategy_yaml: str) -> List[Tuple[str, Optional[str]]]:
+    """Identify which columns are required by a strategy"""
+    try:
+        return strategy_required_columns(yaml.safe_load(strategy_yaml))
 
     except Exception as e:
         logger.error(f"Failed to identify required columns: {e}")
@@ -115,3 +141,16 @@ def find_files_for_strategy(
 
     return result
 
+
+def merge_required_files(files_needed_list: List[Dict[str, Dict[str, List[str]]]]) -> Dict[str, Dict[str, List[str]]]:
+    """Union several file/column requirements into one"""
+    merged = {}
+    for files_needed in files_needed_list:
+        for tf, file_dict in files_needed.items():
+            for file_path, columns in file_dict.items():
+                merged.setdefault(tf, {}).setdefault(file_path, set()).update(columns)
+
+    return {
+        tf: {fp: sorted(cols) for fp, cols in file_dict.items()}
+        for tf, file_dict in merged.items()
+    }
@@ -15,7 +15,7 @@ logger = logging.getLogger(__name__)
 def load_required_columns_from_file(file_path: str, required_columns: List[str]) -> pd.DataFrame:
     """Load only required columns from a parquet file"""
     base_cols = ["time", "open", "high", "low", "close"]
-    columns_to_load = base_cols + required_columns
+    columns_to_load = base_cols + [col for col in required_columns if col not in base_cols]
 
     try:
         df = pd.read_parquet(file_path, columns=columns_to_load)
@@ -0,0 +1,217 @@
+from typing import Any, Dict, Optional, Tuple
+import logging
+import numpy as np
+import pandas as pd
+from numba import njit
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Slots of the float64 accumulator state
+# Trades, open ones included, as the summary's PnL statistics count them
+N_TRADES, PNL_SUM, WIN_COUNT, WIN_PNL, LOSS_COUNT, LOSS_PNL, BEST_PNL, WORST_PNL, DURATION_SUM = range(9)
+# Closed trades only, as vectorbt's trade statistics count them
+CLOSED_COUNT, CLOSED_WIN_COUNT, CLOSED_WIN_PNL, CLOSED_WIN_RETURN = range(9, 13)
+CLOSED_LOSS_COUNT, CLOSED_LOSS_PNL, CLOSED_LOSS_RETURN, BEST_RETURN, WORST_RETURN = range(13, 18)
+# Equity curve of the trade PnL in close order
+EQUITY, EQUITY_PEAK, MAX_DD, DD_PEAK_EQUITY = range(18, 22)
+# Bar returns of the portfolio value: Welford mean/variance and the ratio sums
+RETURN_COUNT, RETURN_MEAN, RETURN_M2, DOWNSIDE_SQ_SUM, GAIN_SUM, LOSS_SUM = range(22, 28)
+CUM_RETURN, CUM_PEAK, CUM_MAX_DD, LAST_VALUE, VALUE_PEAK, VALUE_MAX_DD = range(28, 34)
+N_STATE = 34
+
+# Slots of the int64 timestamp state
+PEAK_TIME, DD_START, DD_END = range(3)
+N_TIMES = 3
+
+# ============================================================================
+# 19. ONLINE STATISTICS FUNCTIONS
+# ============================================================================
+
+def new_accumulator(init_value: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Empty (state, times) accumulator of a strategy starting with init_value"""
+    state = np.zeros(N_STATE, dtype=np.float64)
+    state[[BEST_PNL, BEST_RETURN]] = -np.inf
+    state[[WORST_PNL, WORST_RETURN]] = np.inf
+    state[[EQUITY_PEAK, VALUE_PEAK, CUM_PEAK]] = -np.inf
+    state[CUM_RETURN] = 1.0
+    state[LAST_VALUE] = init_value
+    return state, np.zeros(N_TIMES, dtype=np.int64)
+
+
+@njit(cache=True)
+def update_trade(state, times, pnl, trade_return, entry_ns, exit_ns, closed):
+    """Fold a trade into the accumulator; trades must arrive in close order"""
+    state[N_TRADES] += 1
+    state[PNL_SUM] += pnl
+    state[DURATION_SUM] += (exit_ns - entry_ns) / 1e9 / 60
+    state[BEST_PNL] = max(state[BEST_PNL], pnl)
+    state[WORST_PNL] = min(state[WORST_PNL], pnl)
+    if pnl > 0:
+        state[WIN_COUNT] += 1
+        state[WIN_PNL] += pnl
+    elif pnl < 0:
+        state[LOSS_COUNT] += 1
+        state[LOSS_PNL] += pnl
+
+    if closed:
+        state[CLOSED_COUNT] += 1
+        state[BEST_RETURN] = max(state[BEST_RETURN], trade_return)
+        state[WORST_RETURN] = min(state[WORST_RETURN], trade_return)
+        if pnl > 0:
+            state[CLOSED_WIN_COUNT] += 1
+            state[CLOSED_WIN_PNL] += pnl
+            state[CLOSED_WIN_RETURN] += trade_return
+        elif pnl < 0:
+            state[CLOSED_LOSS_COUNT] += 1
+            state[CLOSED_LOSS_PNL] += pnl
+            state[CLOSED_LOSS_RETURN] += trade_return
+
+    # Running equity peak and the deepest drawdown below it
+    state[EQUITY] += pnl
+    equity = state[EQUITY]
+    if equity > state[EQUITY_PEAK]:
+        state[EQUITY_PEAK] = equity
+        times[PEAK_TIME] = exit_ns
+    drawdown = equity - state[EQUITY_PEAK]
+    if state[N_TRADES] == 1 or drawdown < state[MAX_DD]:
+        state[MAX_DD] = drawdown
+        state[DD_PEAK_EQUITY] = state[EQUITY_PEAK]
+        times[DD_START] = times[PEAK_TIME]
+        times[DD_END] = exit_ns
+    elif exit_ns == times[DD_END] and equity > state[DD_PEAK_EQUITY]:
+        # Trades closing at the trough's time count towards the peak
+        state[DD_PEAK_EQUITY] = equity
+        times[DD_START] = exit_ns
+
+
+@njit(cache=True)
+def update_value(state, value):
+    """Fold the portfolio value of the next bar into the accumulator"""
+    previous = state[LAST_VALUE]
+    if previous == 0:
+        bar_return = 0.0 if value == 0 else np.inf * np.sign(value)
+    else:
+        bar_return = (value - previous) / previous
+        if previous < 0:
+            bar_return *= -1
+    state[LAST_VALUE] = value
+
+    # Drawdown of the value below its running peak
+    if value > state[VALUE_PEAK]:
+        state[VALUE_PEAK] = value
+    elif value < state[VALUE_PEAK]:
+        state[VALUE_MAX_DD] = min(state[VALUE_MAX_DD], (value - state[VALUE_PEAK]) / state[VALUE_PEAK])
+
+    if np.isnan(bar_return):
+        return
+
+    state[RETURN_COUNT] += 1
+    delta = bar_return - state[RETURN_MEAN]
+    state[RETURN_MEAN] += delta / state[RETURN_COUNT]
+    state[RETURN_M2] += delta * (bar_return - state[RETURN_MEAN])
+    if bar_return > 0:
+        state[GAIN_SUM] += bar_return
+    elif bar_return < 0:
+        state[LOSS_SUM] += bar_return
+        state[DOWNSIDE_SQ_SUM] += bar_return * bar_return
+
+    # Cumulative return from 100, as the Calmar ratio's drawdown uses it
+    state[CUM_RETURN] *= bar_return + 1
+    cum_value = state[CUM_RETURN] * 100
+    state[CUM_PEAK] = max(state[CUM_PEAK], cum_value)
+    state[CUM_MAX_DD] = min(state[CUM_MAX_DD], cum_value / state[CUM_PEAK] - 1)
+
+
+@njit(cache=True)
+def accumulate_trades(state, times, pnl, trade_return, entry_ns, exit_ns, closed):
+    for i in range(len(pnl)):
+        update_trade(state, times, pnl[i], trade_return[i], entry_ns[i], exit_ns[i], closed[i])
+
+
+@njit(cache=True)
+def accumulate_values(state, values):
+    for i in range(len(values)):
+        update_value(state, values[i])
+
+
+def _nan_if(condition: bool, value: float) -> float:
+    return np.nan if condition else value
+
+
+def accumulator_statistics(
+        state: np.ndarray,
+        times: np.ndarray,
+        strategy_name: str,
+        timeframe: str,
+        index: pd.DatetimeIndex,
+        freq: pd.Timedelta,
+        ann_factor: float,
+        benchmark_return_pct: float
+) -> Optional[Dict[str, Any]]:
+    """Summary row of an accumulator, like compute_strategy_statistics; None without trades"""
+    total_trades = int(state[N_TRADES])
+    if total_trades == 0:
+        return None
+
+    closed = state[CLOSED_COUNT]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.float64(state[CLOSED_WIN_COUNT]) / closed * 100
+        profit_factor = _nan_if(closed == 0, np.float64(state[CLOSED_WIN_PNL]) / abs(state[CLOSED_LOSS_PNL]))
+        avg_winning_pct = _nan_if(state[CLOSED_WIN_COUNT] == 0, state[CLOSED_WIN_RETURN] / state[CLOSED_WIN_COUNT] * 100)
+        avg_losing_pct = _nan_if(state[CLOSED_LOSS_COUNT] == 0, state[CLOSED_LOSS_RETURN] / state[CLOSED_LOSS_COUNT] * 100)
+    best_trade_pct = _nan_if(closed == 0, state[BEST_RETURN] * 100)
+    worst_trade_pct = _nan_if(closed == 0, state[WORST_RETURN] * 100)
+
+    # Ratios of the bar returns, with vectorbt's conventions for degenerate cases
+    n_returns = state[RETURN_COUNT]
+    mean = state[RETURN_MEAN]
+    std = np.sqrt(state[RETURN_M2] / (n_returns - 1)) if n_returns > 1 else np.nan
+    downside_risk = np.sqrt(state[DOWNSIDE_SQ_SUM] / n_returns) * np.sqrt(ann_factor) if n_returns else np.nan
+    sharpe = np.nan if n_returns < 2 else np.inf if std == 0 else mean / std * np.sqrt(ann_factor)
+    sortino = np.nan if n_returns < 2 else np.inf if downside_risk == 0 else mean * ann_factor / downside_risk
+    omega = np.inf if state[LOSS_SUM] == 0 else state[GAIN_SUM] / -state[LOSS_SUM]
+    annualized_return = state[CUM_RETURN] ** (ann_factor / n_returns) - 1 if n_returns else np.nan
+    calmar = np.nan if state[CUM_MAX_DD] == 0 else annualized_return / abs(state[CUM_MAX_DD])
+    # vectorbt reports no drawdown when the value never fell below a peak
+    max_dd_pct = _nan_if(state[VALUE_MAX_DD] == 0, -state[VALUE_MAX_DD] * 100)
+
+    avg_win = state[WIN_PNL] / state[WIN_COUNT] if state[WIN_COUNT] > 0 else 0
+    avg_loss = state[LOSS_PNL] / state[LOSS_COUNT] if state[LOSS_COUNT] > 0 else 0
+    avg_profit = state[PNL_SUM] / total_trades
+    max_dd = state[MAX_DD]
+    return_to_dd = state[PNL_SUM] / abs(max_dd) if max_dd != 0 else np.inf
+
+    return {
+        "strategy_name": strategy_name,
+        "timeframe": timeframe,
+        "start": index[0],
+        "end": index[-1],
+        "period": len(index) * freq,
+        "benchmark_return_pct": benchmark_return_pct,
+        "nbr_trades": total_trades,
+        "winrate": round(win_rate, 2),
+        "avg_trade_return": round(avg_profit, 2),
+        "avg_trade_duration": round(state[DURATION_SUM] / total_trades, 2),
+        "profit_factor": round(profit_factor, 2),
+        "expectancy": round(avg_profit, 2),
+        "avg_win": round(avg_win, 2),
+        "avg_win_pct": round(avg_winning_pct, 2),
+        "avg_loss": round(avg_loss, 2),
+        "avg_loss_pct": round(avg_losing_pct, 2),
+        "best_trade": round(state[BEST_PNL], 2),
+        "best_trade_pct": round(best_trade_pct, 2),
+        "worst_trade": round(state[WORST_PNL], 2),
+        "worst_trade_pct": round(worst_trade_pct, 2),
+        "drawdown": round(max_dd, 2),
+        "drawdown_start": pd.Timestamp(times[DD_START], unit="ns"),
+        "drawdown_end": pd.Timestamp(times[DD_END], unit="ns"),
+        "drawdown_pct": round(max_dd_pct, 2) * 100,
+        "return_to_dd": round(return_to_dd, 2),
+        "sharpe": round(sharpe, 2),
+        "calmar": round(calmar, 2),
+        "omega": round(omega, 2),
+        "sortino": round(sortino, 2),
+        "net_profit": round(state[PNL_SUM], 2),
+    }
@@ -0,0 +1,148 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+import logging
+import queue
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+# ============================================================================
+# 15. PIPELINE STAGE FUNCTIONS
+# ============================================================================
+
+def iter_prefetched(
+        items: Iterable[T],
+        load_fn: Callable[[T], R],
+        depth: int = 1
+) -> Iterator[Tuple[T, Optional[R], Optional[Exception]]]:
+    """
+    Yield (item, loaded, error) while a background thread loads up to `depth`
+    items ahead of the one being consumed.
+
+    A slot is only freed when the consumer asks for the next item, so at most
+    depth + 1 loaded items are alive at once.
+    """
+    ready: "queue.Queue" = queue.Queue()
+    slots = threading.Semaphore(depth)
+    stop = threading.Event()
+
+    def produce() -> None:
+        for item in items:
+            slots.acquire()
+            if stop.is_set():
+                return
+            try:
+                ready.put((item, load_fn(item), None))
+            except Exception as e:
+                ready.put((item, None, e))
+        ready.put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True, name="prefetch")
+    thread.start()
+    try:
+        while True:
+            entry = ready.get()
+            if entry is _DONE:
+                return
+            yield entry
+            slots.release()
+    finally:
+        stop.set()
+        slots.release()
+        thread.join()
+
+
+def iter_background(items: Iterable[T], depth: int) -> Iterator[T]:
+    """
+    Yield the items of an iterable that a background thread produces up to
+    `depth` items ahead, so producing the stream overlaps with consuming it.
+    An exception raised while producing is re-raised in the consumer.
+    """
+    ready: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                ready.put((item, None))
+        except Exception as e:
+            ready.put((None, e))
+            return
+        ready.put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True, name="generate")
+    thread.start()
+    try:
+        while True:
+            entry = ready.get()
+            if entry is _DONE:
+                return
+            item, error = entry
+            if error is not None:
+                raise error
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue
+        while thread.is_alive():
+            try:
+                ready.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+
+class WriteBehind:
+    """
+    Background thread running write jobs from a bounded queue.
+
+    submit blocks once max_pending jobs are waiting, which keeps the results
+    held in memory bounded; flush waits until every submitted job is done.
+    """
+
+    def __init__(self, max_pending: int):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="write-behind")
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                future, fn, args = job
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args))
+                    except Exception as e:
+                        future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> "WriteBehind":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,229 @@
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import logging
+import os
+
+from src.checkpoint import TASK_KEY_COLUMN
+from src.data_structure import BacktestConfig, SensitivityConfig
+from src.dataset import dataset_root, iter_dataset_trades, partition_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# 9. COST SENSITIVITY FUNCTIONS
+# ============================================================================
+
+def build_cost_scenarios(sensitivity: SensitivityConfig) -> pd.DataFrame:
+    """Build the grid of fee/slippage/point-value scenarios"""
+    rows = list(product(sensitivity.fees, sensitivity.slippages, sensitivity.point_values))
+    scenarios = pd.DataFrame(rows, columns=["fees", "slippage", "point_value"])
+    scenarios.insert(0, "scenario_id", np.arange(len(scenarios)))
+    return scenarios
+
+
+def _trade_direction_sign(trades_df: pd.DataFrame) -> np.ndarray:
+    """+1 for long trades, -1 for short trades"""
+    direction = trades_df["direction"]
+    if direction.dtype == object or pd.api.types.is_string_dtype(direction) or isinstance(direction.dtype, pd.CategoricalDtype):
+        return np.where(direction.astype(str).str.lower() == "short", -1.0, 1.0)
+    return np.where(direction.to_numpy() == 1, -1.0, 1.0)
+
+
+def _trade_is_open(trades_df: pd.DataFrame) -> np.ndarray:
+    """True for trades still open at the end of the simulation"""
+    status = trades_df["status"]
+    if status.dtype == object or pd.api.types.is_string_dtype(status) or isinstance(status.dtype, pd.CategoricalDtype):
+        return (status.astype(str).str.lower() == "open").to_numpy()
+    return status.to_numpy() == 0
+
+
+def reprice_trades(
+        trades_df: pd.DataFrame,
+        scenarios: pd.DataFrame,
+        config: BacktestConfig
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-price stored trades under every cost scenario in one vectorized pass.
+
+    Trade timings are reused as-is; the slippage of the original run is stripped
+    from the stored prices, sizes are scaled linearly with the point value and
+    fees/slippage are re-applied the way VectorBT does (no exit costs on open trades).
+
+    Returns:
+        (pnl, returns) arrays of shape (n_scenarios, n_trades).
+    """
+    size = trades_df["size"].to_numpy(dtype=float)
+    entry_price = trades_df["entry_price"].to_numpy(dtype=float)
+    exit_price = trades_df["exit_price"].to_numpy(dtype=float)
+    sign = _trade_direction_sign(trades_df)
+    is_open = _trade_is_open(trades_df)
+
+    # Strip the slippage applied by the original simulation
+    raw_entry = entry_price / (1 + sign * config.slippage)
+    raw_exit = np.where(is_open, exit_price, exit_price / (1 - sign * config.slippage))
+
+    fees = scenarios["fees"].to_numpy(dtype=float)[:, None]
+    slippage = scenarios["slippage"].to_numpy(dtype=float)[:, None]
+    size = size * (scenarios["point_value"].to_numpy(dtype=float)[:, None] / config.point_value)
+
+    entry = raw_entry * (1 + sign * slippage)
+    exit_ = np.where(is_open, raw_exit, raw_exit * (1 - sign * slippage))
+    entry_fees = size * entry * fees
+    exit_fees = np.where(is_open, 0.0, size * exit_ * fees)
+
+    pnl = sign * size * (exit_ - entry) - entry_fees - exit_fees
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = pnl / (size * entry)
+
+    return pnl, returns
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Row-wise mean of the masked values, 0 for empty rows"""
+    count = mask.sum(axis=1)
+    total = np.where(mask, values, 0.0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, total / count, 0.0)
+
+
+def compute_repriced_statistics(
+        pnl: np.ndarray,
+        returns: np.ndarray,
+        is_open: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Compute the trade-based summary metrics for every scenario row"""
+    n_trades = pnl.shape[1]
+    closed = np.broadcast_to(~is_open, pnl.shape)
+    wins = pnl > 0
+    losses = pnl < 0
+    closed_wins = wins & closed
+    closed_losses = losses & closed
+
+    n_closed = closed.sum(axis=1)
+    gross_profit = np.where(closed_wins, pnl, 0.0).sum(axis=1)
+    gross_loss = np.abs(np.where(closed_losses, pnl, 0.0).sum(axis=1))
+    net_profit = pnl.sum(axis=1)
+
+    # Trade-level drawdown on the cumulative PnL curve (trades are sorted by exit)
+    equity = np.cumsum(pnl, axis=1)
+    drawdown = (equity - np.maximum.accumulate(equity, axis=1)).min(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        winrate = np.where(n_closed > 0, closed_wins.sum(axis=1) / n_closed * 100, np.nan)
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss, np.inf)
+        return_to_dd = np.where(drawdown != 0, net_profit / np.abs(drawdown), np.inf)
+
+    avg_profit = net_profit / n_trades
+    best_return = np.where(closed, returns, -np.inf).max(axis=1)
+    worst_return = np.where(closed, returns, np.inf).min(axis=1)
+
+    return {
+        "nbr_trades": np.full(pnl.shape[0], n_trades),
+        "winrate": winrate,
+        "avg_trade_return": avg_profit,
+        "profit_factor": profit_factor,
+        "expectancy": avg_profit,
+        "avg_win": _masked_mean(pnl, wins),
+        "avg_win_pct": _masked_mean(returns, closed_wins) * 100,
+        "avg_loss": _masked_mean(pnl, losses),
+        "avg_loss_pct": _masked_mean(returns, closed_losses) * 100,
+        "best_trade": pnl.max(axis=1),
+        "best_trade_pct": np.where(n_closed > 0, best_return * 100, np.nan),
+        "worst_trade": pnl.min(axis=1),
+        "worst_trade_pct": np.where(n_closed > 0, worst_return * 100, np.nan),
+        "drawdown": drawdown,
+        "return_to_dd": return_to_dd,
+        "net_profit": net_profit,
+    }
+
+
+def reprice_strategy(
+        trades_df: pd.DataFrame,
+        scenarios: pd.DataFrame,
+        config: BacktestConfig,
+        strategy_name: str,
+        timeframe: str,
+        task_key: Optional[str] = None
+) -> pd.DataFrame:
+    """Cost sensitivity table of a single strategy, one row per scenario"""
+    if trades_df.empty:
+        return pd.DataFrame()
+
+    trades_df = trades_df.sort_values("exit_timestamp", kind="stable")
+    pnl, returns = reprice_trades(trades_df, scenarios, config)
+    stats = compute_repriced_statistics(pnl, returns, _trade_is_open(trades_df))
+
+    sensitivity_df = scenarios.copy()
+    sensitivity_df.insert(0, "timeframe", timeframe)
+    sensitivity_df.insert(0, TASK_KEY_COLUMN, task_key if task_key is not None else strategy_name)
+    sensitivity_df.insert(0, "strategy_name", strategy_name)
+    for column, values in stats.items():
+        sensitivity_df[column] = np.round(values, 2) if column != "nbr_trades" else values
+
+    return sensitivity_df
+
+
+def list_saved_trades(config: BacktestConfig) -> List[Tuple[str, str, str]]:
+    """List (strategy_name, timeframe, path) of every saved trades file"""
+    base_dir = os.path.join(config.save_path, config.indicator, config.strategy_type)
+    suffix = "_trades.parquet"
+    saved = []
+
+    if not os.path.exists(base_dir):
+        logger.warning(f"Results path does not exist: {base_dir}")
+        return saved
+
+    for timeframe in sorted(os.listdir(base_dir)):
+        tf_dir = os.path.join(base_dir, timeframe)
+        if not os.path.isdir(tf_dir) or timeframe == "summary":
+            continue
+
+        for file in sorted(os.listdir(tf_dir)):
+            if file.endswith(suffix):
+                saved.append((file[:-len(suffix)], timeframe, os.path.join(tf_dir, file)))
+
+    return saved
+
+
+def iter_saved_trades(config: BacktestConfig, columns: List[str]) -> Iterable[Tuple[str, str, str, pd.DataFrame]]:
+    """
+    Yield (task_key, strategy_name, timeframe, trades) from the result
+    dataset, or from the trades files without one, where files are per name
+    and the name is the key.
+    """
+    root = dataset_root(config)
+    if os.path.isdir(partition_dir(root, "trades", config.indicator, config.strategy_type)):
+        yield from iter_dataset_trades(root, config.indicator, config.strategy_type, columns)
+        return
+
+    for strategy_name, timeframe, path in list_saved_trades(config):
+        try:
+            yield strategy_name, strategy_name, timeframe, pd.read_parquet(path, columns=columns)
+        except Exception as e:
+            logger.warning(f"Failed to read trades of {strategy_name}: {e}")
+
+
+def run_cost_sensitivity(config: BacktestConfig, scenarios: pd.DataFrame) -> pd.DataFrame:
+    """Re-price every saved strategy of an indicator across all cost scenarios"""
+    tables = []
+    columns = ["size", "entry_price", "exit_price", "exit_timestamp", "direction", "status"]
+
+    for task_key, strategy_name, timeframe, trades_df in iter_saved_trades(config, columns):
+        try:
+            table = reprice_strategy(trades_df, scenarios, config, strategy_name, timeframe, task_key)
+            if not table.empty:
+                tables.append(table)
+        except Exception as e:
+            logger.warning(f"Failed to re-price {strategy_name}: {e}")
+
+    if not tables:
+        logger.warning("No trades to re-price")
+        return pd.DataFrame()
+
+    sensitivity_df = pd.concat(tables, ignore_index=True)
+    logger.info(f"Re-priced {len(tables)} strategies across {len(scenarios)} cost scenarios")
+    return sensitivity_df
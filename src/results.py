@@ -1,10 +1,17 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional, Tuple, Union
+import itertools
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import logging
 import os
+import threading
 
 from src.data_structure import BacktestResult, BacktestConfig
+from src.trade_records import trades_to_arrow
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,21 +21,57 @@ logger = logging.getLogger(__name__)
 # 8. RESULTS SAVING FUNCTIONS
 # ============================================================================
 
-def save_strategy_trades(result: BacktestResult, output_dir: str) -> None:
+def write_parquet_atomic(data: Union[pd.DataFrame, pa.Table], path: str, **kwargs) -> str:
+    """Write a DataFrame or arrow table through a temporary file so readers never see a partial write"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if isinstance(data, pa.Table):
+            pq.write_table(data, tmp_path, **kwargs)
+        else:
+            data.to_parquet(tmp_path, **kwargs)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def trades_output_path(config: BacktestConfig, timeframe: str, strategy_name: str) -> str:
+    """Path of a strategy's trades file"""
+    return os.path.join(
+        config.save_path, config.indicator, config.strategy_type, timeframe, f"{strategy_name}_trades.parquet"
+    )
+
+
+def summary_output_path(config: BacktestConfig, strategy_name: str) -> str:
+    """Path of a strategy's summary file"""
+    return os.path.join(
+        config.save_path,
+        config.indicator,
+        config.strategy_type,
+        "summary",
+        f"summary_{config.strategy_type}_{config.indicator}_{strategy_name}.parquet"
+    )
+
+
+def save_strategy_trades(result: BacktestResult, output_dir: str) -> Optional[str]:
     """Save trades for a single strategy"""
-    if result.trades_df.empty:
-        return
+    if not len(result.trades):
+        return None
 
     os.makedirs(output_dir, exist_ok=True)
     trades_path = os.path.join(output_dir, f"{result.strategy_name}_trades.parquet")
-    result.trades_df.to_parquet(trades_path)
+    write_parquet_atomic(pa.Table.from_batches([trades_to_arrow(result.trades)]), trades_path)
     logger.debug(f"Saved trades for {result.strategy_name}")
+    return trades_path
 
 
-def save_all_results(results: List[BacktestResult], config: BacktestConfig) -> None:
+def save_all_results(results: List[BacktestResult], config: BacktestConfig) -> List[str]:
     """Save all backtest results"""
     from collections import defaultdict
 
+    saved_paths = []
+
     # Group results by timeframe
     results_by_tf = defaultdict(list)
     for result in results:
@@ -40,38 +83,166 @@ def save_all_results(results: List[BacktestResult], config: BacktestConfig) -> N
         output_dir = os.path.join(config.save_path, config.indicator, config.strategy_type,  timeframe)
 
         for result in tf_results:
-            save_strategy_trades(result, output_dir)
+            trades_path = save_strategy_trades(result, output_dir)
+            if trades_path:
+                saved_paths.append(trades_path)
 
         logger.info(f"Saved {len(tf_results)} results for timeframe {timeframe}")
 
+    return saved_paths
+
 
-def save_summary_statistics(strategy_name:str, summary_df: pd.DataFrame, config: BacktestConfig) -> None:
+def save_summary_statistics(strategy_name:str, summary_df: pd.DataFrame, config: BacktestConfig) -> Optional[str]:
     """Save summary statistics"""
     if summary_df.empty:
-        return
+        return None
 
-    summary_path = os.path.join(
-        config.save_path,
-        config.indicator,
-        config.strategy_type,
-        "summary",
-        f"summary_{config.strategy_type}_{config.indicator}_{strategy_name}.parquet"
-    )
+    summary_path = summary_output_path(config, strategy_name)
 
     os.makedirs(os.path.dirname(summary_path), exist_ok=True)
-    summary_df.to_parquet(summary_path)
+    write_parquet_atomic(summary_df, summary_path)
 
     profitable = len(summary_df[summary_df['net_profit'] > 0])
     logger.info(f"Saved summary: {len(summary_df)} strategies, {profitable} profitable")
+    return summary_path
+
+def read_unified_schema(paths: List[str], max_workers: int = 4) -> Tuple[Optional[pa.Schema], List[str]]:
+    """Schema every file can be cast to, read from the footers in parallel; returns (schema, unreadable paths)"""
+    schemas, corrupt = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, future in zip(paths, [executor.submit(pq.read_schema, path) for path in paths]):
+            try:
+                schemas.append(future.result())
+            except Exception as e:
+                logger.error(f"Corrupt parquet file {path}: {e}")
+                corrupt.append(path)
+
+    if not schemas:
+        return None, corrupt
+    return pa.unify_schemas(schemas, promote_options="permissive").remove_metadata(), corrupt
+
+
+def conform_batch(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """Reorder and cast a batch to a schema, filling absent columns with nulls"""
+    columns = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        if index < 0:
+            columns.append(pa.nulls(batch.num_rows, field.type))
+        else:
+            columns.append(batch.column(index).cast(field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class RowGroupWriter:
+    """
+    Parquet writer that buffers small batches into row groups of about
+    row_group_size rows, casting them to its schema. The file is written
+    under a temporary name and moved into place when closed without error.
+    """
+
+    def __init__(self, path: str, schema: pa.Schema, row_group_size: int = 65_536):
+        self.path = path
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._writer = pq.ParquetWriter(self._tmp_path, schema)
+        self._pending: List[pa.RecordBatch] = []
+        self._pending_rows = 0
 
-def append_parquet_files(config: BacktestConfig):
+    def write_batch(self, batch: pa.RecordBatch) -> None:
+        self._pending.append(conform_batch(batch, self.schema))
+        self._pending_rows += batch.num_rows
+        self.rows += batch.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._writer.write_table(pa.Table.from_batches(self._pending, schema=self.schema), row_group_size=self.row_group_size)
+            self._pending, self._pending_rows = [], 0
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> "RowGroupWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _read_file_batches(path: str, batch_size: int) -> List[pa.RecordBatch]:
+    return list(pq.ParquetFile(path).iter_batches(batch_size=batch_size))
+
+
+def combine_parquet_files(
+        paths: List[str],
+        output_path: str,
+        max_workers: int = 4,
+        batch_size: int = 65_536
+) -> Tuple[int, List[str]]:
     """
-    Append all Parquet files in a folder into a single Parquet file.
+    Stream parquet files into one file; returns (rows written, corrupt paths).
 
-    Args:
-        input_folder (str): Path to the folder containing Parquet files.
-        output_path (str): Path to save the combined Parquet file.
+    Files are read by a thread pool at most 2 * max_workers files ahead of the
+    writer, and their batches are cast to the unified schema of all files and
+    appended in path order through one RowGroupWriter, so memory does not grow
+    with the number of files. Unreadable files are logged and skipped.
     """
+    schema, corrupt = read_unified_schema(paths, max_workers)
+    if schema is None:
+        return 0, corrupt
+
+    skipped = set(corrupt)
+    readable = [path for path in paths if path not in skipped]
+    with RowGroupWriter(output_path, schema, batch_size) as writer, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        files = iter(readable)
+        for path in itertools.islice(files, 2 * max_workers):
+            pending.append((path, executor.submit(_read_file_batches, path, batch_size)))
+
+        while pending:
+            path, future = pending.popleft()
+            next_path = next(files, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(_read_file_batches, next_path, batch_size)))
+            try:
+                batches = future.result()
+            except Exception as e:
+                logger.error(f"Corrupt parquet file {path}: {e}")
+                corrupt.append(path)
+                continue
+
+            for batch in batches:
+                writer.write_batch(batch)
+
+    return writer.rows, corrupt
+
+
+def consolidated_summary_path(config: BacktestConfig) -> str:
+    """Path of an indicator's consolidated summary file"""
+    return os.path.join(
+        config.save_path,
+        config.indicator,
+        config.strategy_type,
+        f"summary_{config.strategy_type}_{config.indicator}.parquet"
+    )
+
+
+def append_parquet_files(config: BacktestConfig, max_workers: int = 4) -> str:
+    """Combine the per-strategy summary files of an indicator into one summary file"""
     input_folder = os.path.join(
         config.save_path,
         config.indicator,
@@ -79,30 +250,49 @@ def append_parquet_files(config: BacktestConfig):
         "summary"
     )
 
-    parquet_files = [os.path.join(input_folder, f) for f in os.listdir(input_folder) if f.endswith(".parquet")]
+    parquet_files = sorted(os.path.join(input_folder, f) for f in os.listdir(input_folder) if f.endswith(".parquet"))
 
     if not parquet_files:
         raise FileNotFoundError(f"No Parquet files found in {input_folder}")
 
-    df_list = []
-    for file in parquet_files:
-        try:
-            df = pd.read_parquet(file)
-            df_list.append(df)
-        except Exception as e:
-            print(f"Error reading {file}: {e}")
+    output_path = consolidated_summary_path(config)
+    rows, corrupt = combine_parquet_files(parquet_files, output_path, max_workers)
+
+    if len(corrupt) == len(parquet_files):
+        raise ValueError(f"None of the {len(parquet_files)} Parquet files in {input_folder} could be read")
+    if corrupt:
+        logger.error(f"Skipped {len(corrupt)} corrupt summary files of {config.indicator}: {corrupt}")
+
+    logger.info(f"Combined {rows} summaries from {len(parquet_files) - len(corrupt)} files to {output_path}")
+    return output_path
 
-    if not df_list:
-        raise ValueError("No valid Parquet files could be read.")
 
-    combined_df = pd.concat(df_list, ignore_index=True)
+def save_cost_sensitivity(sensitivity_df: pd.DataFrame, config: BacktestConfig) -> None:
+    """Save the cost sensitivity table of an indicator"""
+    if sensitivity_df.empty:
+        return
 
-    # Save as Parquet
     output_path = os.path.join(
         config.save_path,
         config.indicator,
         config.strategy_type,
-        f"summary_{config.strategy_type}_{config.indicator}.parquet"
+        f"cost_sensitivity_{config.strategy_type}_{config.indicator}.parquet"
     )
-    combined_df.to_parquet(output_path, index=False)
-    print(f"Combined Parquet saved to {output_path}")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    sensitivity_df.to_parquet(output_path, index=False)
+    logger.info(f"Saved cost sensitivity: {len(sensitivity_df)} rows to {output_path}")
+
+
+def save_worker_rss_report(rss_df: pd.DataFrame, config: BacktestConfig) -> None:
+    """Save the per-worker RSS samples of a run"""
+    if rss_df.empty:
+        return
+
+    output_path = os.path.join(config.save_path, f"worker_rss_{config.strategy_type}.parquet")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    rss_df.to_parquet(output_path, index=False)
+
+    per_worker = rss_df.groupby("pid")["rss_peak_mb"].agg(["count", "max"])
+    for pid, row in per_worker.iterrows():
+        logger.info(f"Worker {pid}: {int(row['count'])} batches, peak RSS {row['max']:.0f} MB")
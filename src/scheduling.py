@@ -0,0 +1,284 @@
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+from math import ceil
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+import logging
+
+from src.data_structure import SweepTask
+from src.file_identifier import find_files_for_strategy, remove_matching_suffix
+from src.strategy_ir import ParsedStrategy
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Per-row float arrays allocated by signal building and the portfolio simulation
+SIMULATION_ARRAYS = 16
+MIN_ESTIMATE_SCALE = 0.1
+MAX_ESTIMATE_SCALE = 20.0
+
+# ============================================================================
+# 10. TASK SCHEDULING FUNCTIONS
+# ============================================================================
+
+def build_sweep_task(
+        indicator: str,
+        strategy_type: str,
+        strategy: ParsedStrategy,
+        file_reference: Dict[str, Dict[str, List[str]]],
+        parameters: Optional[Dict[str, Any]] = None
+) -> SweepTask:
+    """Resolve the files/columns a parsed strategy reads"""
+    required_columns = list(strategy.required_columns)
+    if strategy_type == "combined":
+        required_columns = remove_matching_suffix(required_columns)
+
+    return SweepTask(
+        indicator=indicator,
+        strategy_name=strategy.name,
+        strategy=strategy,
+        timeframes=strategy.timeframes,
+        files_needed=find_files_for_strategy(required_columns, file_reference),
+        parameters=tuple((parameters or {}).items())
+    )
+
+
+def locality_key(task: SweepTask) -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+    """Key of the data a task reads: indicator, timeframes and the files resolved for them"""
+    files = tuple(sorted(fp for file_dict in task.files_needed.values() for fp in file_dict))
+    return task.indicator, task.timeframes, files
+
+
+def estimate_memory_mb(
+        timeframes: Tuple[str, ...],
+        files_needed: Dict[str, Dict[str, List[str]]],
+        manifest: Dict[str, Dict[str, Any]]
+) -> float:
+    """
+    Rough working-set estimate of a task from the manifest row counts.
+
+    Counts the loaded frames (per-file reads plus the merged copy), the
+    multi-timeframe merge on the main timeframe and the signal/simulation
+    arrays; the scheduler corrects it with observed worker RSS.
+    """
+    base_columns = 5  # time + OHLC
+    loaded_bytes = 0
+    main_rows = 0
+    total_columns = 0
+
+    for tf in timeframes:
+        file_dict = files_needed.get(tf, {})
+        if not file_dict:
+            continue
+
+        rows = max((manifest[fp]["num_rows"] for fp in file_dict if fp in manifest), default=0)
+        columns = sum(base_columns + len(cols) for cols in file_dict.values())
+        loaded_bytes += 2 * rows * columns * 8
+        total_columns += columns
+        main_rows = main_rows or rows
+
+    merged_bytes = main_rows * total_columns * 8 if len(timeframes) > 1 else 0
+    simulation_bytes = main_rows * SIMULATION_ARRAYS * 8
+
+    return (loaded_bytes + merged_bytes + simulation_bytes) / 2 ** 20
+
+
+class MemoryBudget:
+    """
+    Admission control against a memory limit.
+
+    In-flight task estimates are scaled by a factor learned from observed
+    worker peak RSS, and the idle RSS of every known worker is reserved.
+    """
+
+    def __init__(self, limit_mb: float, smoothing: float = 0.3):
+        self.limit_mb = limit_mb
+        self.smoothing = smoothing
+        self.scale = 1.0
+        self.in_flight_mb = 0.0
+        self.worker_baseline_mb: Dict[int, float] = {}
+
+    @property
+    def available_mb(self) -> float:
+        return self.limit_mb - sum(self.worker_baseline_mb.values()) - self.in_flight_mb
+
+    def cost(self, estimate_mb: float) -> float:
+        return estimate_mb * self.scale
+
+    def fits(self, estimate_mb: float) -> bool:
+        return self.cost(estimate_mb) <= self.available_mb
+
+    def acquire(self, estimate_mb: float) -> float:
+        cost = self.cost(estimate_mb)
+        self.in_flight_mb += cost
+        return cost
+
+    def release(self, cost_mb: float) -> None:
+        self.in_flight_mb = max(0.0, self.in_flight_mb - cost_mb)
+
+    def observe(self, pid: int, estimate_mb: float, rss_start_mb: float, rss_peak_mb: float) -> None:
+        """Update the worker baseline and the estimate scale from a finished task"""
+        self.worker_baseline_mb[pid] = rss_start_mb
+        if estimate_mb > 0 and rss_peak_mb > rss_start_mb:
+            ratio = (rss_peak_mb - rss_start_mb) / estimate_mb
+            ratio = min(max(ratio, MIN_ESTIMATE_SCALE), MAX_ESTIMATE_SCALE)
+            self.scale = (1 - self.smoothing) * self.scale + self.smoothing * ratio
+
+
+def dedupe_key(task: SweepTask) -> Tuple[str, str]:
+    """Tasks with the same key run the same strategy on the same data"""
+    return task.indicator, task.strategy.content_hash
+
+
+class TaskDeduplicator:
+    """
+    Collapses tasks that compute the same strategy onto the first one seen.
+
+    Only the primary is dispatched. Aliases that arrive while it runs wait for
+    its outcome; aliases that arrive after it completed get the outcome right
+    away, as long as it is among the max_outcomes most recent ones. Older
+    outcomes are dropped, and a later alias then runs as a new primary.
+    """
+
+    def __init__(self, key_fn: Callable[[T], Hashable], on_alias: Callable[[T, Any], None], max_outcomes: int = 10_000):
+        self.key_fn = key_fn
+        self.on_alias = on_alias
+        self.max_outcomes = max_outcomes
+        self.n_tasks = 0
+        self.n_dispatched = 0
+        self._waiting: Dict[Hashable, List[T]] = {}
+        self._outcomes: Dict[Hashable, Any] = OrderedDict()
+
+    def filter(self, tasks: Iterable[T]) -> Iterator[T]:
+        """Yield the tasks to dispatch, holding back the aliases of earlier ones"""
+        for task in tasks:
+            self.n_tasks += 1
+            key = self.key_fn(task)
+            if key in self._waiting:
+                self._waiting[key].append(task)
+            elif key in self._outcomes:
+                self._outcomes.move_to_end(key)
+                self.on_alias(task, self._outcomes[key])
+            else:
+                self._waiting[key] = []
+                self.n_dispatched += 1
+                yield task
+
+    def complete(self, task: T, outcome: Any) -> None:
+        """Record a dispatched task's outcome and hand it to its waiting aliases"""
+        key = self.key_fn(task)
+        aliases = self._waiting.pop(key, [])
+        self._outcomes[key] = outcome
+        while len(self._outcomes) > self.max_outcomes:
+            self._outcomes.popitem(last=False)
+        for alias in aliases:
+            self.on_alias(alias, outcome)
+
+    @property
+    def collapse_ratio(self) -> float:
+        return self.n_tasks / self.n_dispatched if self.n_dispatched else 1.0
+
+
+def balanced_batch_size(n_tasks: int, n_workers: int, max_batch_size: int, batches_per_worker: int = 4) -> int:
+    """Largest batch size that still leaves every worker several batches to pick from"""
+    target = ceil(n_tasks / max(1, n_workers * batches_per_worker))
+    return max(1, min(max_batch_size, target))
+
+
+def iter_locality_batches(
+        tasks: Iterable[T],
+        key_fn: Callable[[T], Hashable],
+        max_batch_size: int,
+        lookahead: int
+) -> Iterator[List[T]]:
+    """
+    Group a task stream into batches reading the same data.
+
+    At most `lookahead` tasks are buffered: a group is emitted as soon as it
+    reaches max_batch_size, and when the buffer is full the largest pending
+    group is emitted early. Remaining groups are flushed largest first.
+    """
+    groups: Dict[Hashable, List[T]] = OrderedDict()
+    buffered = n_tasks = n_batches = 0
+
+    for task in tasks:
+        key = key_fn(task)
+        group = groups.setdefault(key, [])
+        group.append(task)
+        buffered += 1
+        n_tasks += 1
+
+        if len(group) < max_batch_size and buffered < lookahead:
+            continue
+
+        if len(group) < max_batch_size:
+            key = max(groups, key=lambda k: len(groups[k]))
+
+        group = groups.pop(key)
+        buffered -= len(group)
+        n_batches += 1
+        yield group
+
+    for group in sorted(groups.values(), key=len, reverse=True):
+        n_batches += 1
+        yield group
+
+    logger.info(f"Grouped {n_tasks} tasks into {n_batches} batches")
+
+
+def iter_bounded_completions(
+        executor: Executor,
+        items: Iterable[T],
+        submit_fn: Callable[[Executor, T], Future],
+        max_in_flight: int,
+        estimate_fn: Optional[Callable[[T], float]] = None,
+        budget: Optional[MemoryBudget] = None
+) -> Iterator[Tuple[T, Future]]:
+    """
+    Submit items with at most max_in_flight pending futures, yielding (item, future)
+    as they complete. Items are pulled from the iterable only when a slot frees up.
+
+    With a memory budget, an item is only admitted while its estimate fits next
+    to the in-flight ones; a single item is always admitted when nothing runs.
+    """
+    in_flight: Dict[Future, Tuple[T, float]] = {}
+
+    def drain() -> Iterator[Tuple[T, Future]]:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            item, cost = in_flight.pop(future)
+            if budget is not None:
+                budget.release(cost)
+            yield item, future
+
+    for item in items:
+        estimate = estimate_fn(item) if budget is not None else 0.0
+
+        while len(in_flight) >= max_in_flight or (
+                budget is not None and in_flight and not budget.fits(estimate)):
+            yield from drain()
+
+        cost = budget.acquire(estimate) if budget is not None else 0.0
+        in_flight[submit_fn(executor, item)] = (item, cost)
+
+    while in_flight:
+        yield from drain()
+
+
+def iter_task_groups(
+        batches: Iterable[List[T]],
+        group_size: int,
+        key_fn: Callable[[List[T]], Hashable]
+) -> Iterator[List[List[T]]]:
+    """Group consecutive batches with the same key into worker tasks of up to group_size batches"""
+    group: List[List[T]] = []
+    for batch in batches:
+        if group and (len(group) >= group_size or key_fn(group[0]) != key_fn(batch)):
+            yield group
+            group = []
+        group.append(batch)
+
+    if group:
+        yield group
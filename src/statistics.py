@@ -1,8 +1,11 @@
-from typing import List
+from typing import List, Tuple
+import numpy as np
 import pandas as pd
 import logging
+from numba import njit
 
 from src.data_structure import BacktestResult
+from src.trade_records import trade_durations
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,15 +16,13 @@ logger = logging.getLogger(__name__)
 # ============================================================================
 
 def compute_strategy_statistics(
-        trades_df: pd.DataFrame,
+        trades: np.ndarray,
         stats_df: pd.DataFrame,
         strategy_name: str,
         timeframe: str
 ) -> pd.DataFrame:
-    """Compute detailed statistics for a strategy"""
+    """Compute detailed statistics for a strategy from its compact trade records"""
     try:
-        import numpy as np
-
         total_trades = stats_df["Total Trades"]
         win_rate_pct = stats_df["Win Rate [%]"]
         best_trade_pct = stats_df["Best Trade [%]"]
@@ -30,22 +31,26 @@ def compute_strategy_statistics(
         avg_losing_pct = stats_df["Avg Losing Trade [%]"]
         profit_factor = stats_df["Profit Factor"]
 
-        wins = trades_df[trades_df['pnl'] > 0].shape[0]
-        losses = trades_df[trades_df['pnl'] < 0].shape[0]
-        avg_win = trades_df.loc[trades_df['pnl'] > 0, 'pnl'].mean() if wins > 0 else 0
-        avg_loss = trades_df.loc[trades_df['pnl'] < 0, 'pnl'].mean() if losses > 0 else 0
+        pnl = trades["pnl"]
+        is_win = pnl > 0
+        is_loss = pnl < 0
+        wins = int(is_win.sum())
+        losses = int(is_loss.sum())
+        avg_win = pnl[is_win].mean() if wins > 0 else 0
+        avg_loss = pnl[is_loss].mean() if losses > 0 else 0
 
-        largest_win = trades_df['pnl'].max() if total_trades > 0 else 0
-        largest_loss = trades_df['pnl'].min() if total_trades > 0 else 0
+        largest_win = pnl.max() if total_trades > 0 else 0
+        largest_loss = pnl.min() if total_trades > 0 else 0
 
-        avg_profit = trades_df['pnl'].mean() if total_trades > 0 else 0
-        total_net_profit = trades_df['pnl'].sum()
-        avg_duration = trades_df["duration"].mean() if total_trades > 0 else 0
+        avg_profit = pnl.mean() if total_trades > 0 else 0
+        total_net_profit = pnl.sum()
+        avg_duration = trade_durations(trades).mean() if total_trades > 0 else 0
 
         expectancy = avg_profit
 
         # Calculate max drawdown
-        max_dd, max_dd_pct, dd_start, dd_end = calculate_max_drawdown(trades_df, "exit_timestamp", "pnl")
+        max_dd, max_dd_pct, dd_start, dd_end = max_drawdown(trades["exit_timestamp"], pnl)
+        dd_start, dd_end = pd.Timestamp(dd_start, unit="ns"), pd.Timestamp(dd_end, unit="ns")
         return_to_dd = total_net_profit / abs(max_dd) if max_dd != 0 else np.inf
 
         stats_dict = {
@@ -88,61 +93,272 @@ def compute_strategy_statistics(
         return pd.DataFrame()
 
 
+@njit(cache=True)
+def _max_drawdown_kernel(times, pnl, first, last):
+    """Single pass over trades[first:last] sorted by time: (drawdown, pct, start, end) positions"""
+    equity = 0.0
+    peak = -np.inf
+    peak_pos = first
+    max_dd = np.inf
+    peak_equity = trough_equity = 0.0
+    start = end = first
+    for i in range(first, last):
+        equity += pnl[i]
+        if equity > peak:
+            peak = equity
+            peak_pos = i
+        drawdown = equity - peak
+        if drawdown < max_dd:
+            max_dd = drawdown
+            end = i
+            start = peak_pos
+            peak_equity = peak
+            trough_equity = equity
+
+    # Trades closing at the trough's time count towards the peak, like the ones before it
+    equity = trough_equity
+    for i in range(end + 1, last):
+        if times[i] != times[end]:
+            break
+        equity += pnl[i]
+        if equity > peak_equity:
+            peak_equity = equity
+            start = i
+
+    max_dd_pct = (max_dd / peak_equity) * 100 if peak_equity != 0 else 0.0
+    return max_dd, max_dd_pct, start, end
+
+
+@njit(cache=True)
+def _segmented_max_drawdown_kernel(times, pnl, counts):
+    n = len(counts)
+    max_dd = np.empty(n)
+    max_dd_pct = np.empty(n)
+    starts = np.empty(n, dtype=np.int64)
+    ends = np.empty(n, dtype=np.int64)
+    first = 0
+    for k in range(n):
+        last = first + counts[k]
+        max_dd[k], max_dd_pct[k], starts[k], ends[k] = _max_drawdown_kernel(times, pnl, first, last)
+        first = last
+    return max_dd, max_dd_pct, times[starts], times[ends]
+
+
+def _time_ordered(times: np.ndarray, pnl: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if len(times) > 1 and not (times[1:] >= times[:-1]).all():
+        order = np.argsort(times, kind="stable")
+        return times[order], pnl[order]
+    return times, pnl
+
+
+def max_drawdown(times: np.ndarray, pnl: np.ndarray) -> tuple:
+    """Maximum drawdown of the equity curve of trade PnL in time order: (drawdown, pct, start, end)"""
+    if len(pnl) == 0:
+        raise ValueError("No trades to compute a drawdown from")
+
+    times, pnl = _time_ordered(np.asarray(times, dtype=np.int64), np.asarray(pnl, dtype=np.float64))
+    max_dd, max_dd_pct, start, end = _max_drawdown_kernel(times, pnl, 0, len(pnl))
+    return max_dd, max_dd_pct, times[start], times[end]
+
+
+def segmented_max_drawdown(
+        times: np.ndarray,
+        pnl: np.ndarray,
+        counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    max_drawdown of every segment of trades sorted by time within their
+    segment, in one call: (drawdown, pct, start, end) arrays, one entry per
+    segment. Every segment needs at least one trade.
+    """
+    return _segmented_max_drawdown_kernel(
+        np.ascontiguousarray(times, dtype=np.int64),
+        np.ascontiguousarray(pnl, dtype=np.float64),
+        np.asarray(counts, dtype=np.int64)
+    )
+
+
 def calculate_max_drawdown(df: pd.DataFrame, date_col: str, profit_col: str) -> tuple:
     """Calculate maximum drawdown"""
-    import numpy as np
+    times = df[date_col].to_numpy().astype("datetime64[ns]").view(np.int64)
+    max_dd, max_dd_pct, dd_start, dd_end = max_drawdown(times, df[profit_col].to_numpy())
+    return max_dd, max_dd_pct, pd.Timestamp(dd_start, unit="ns"), pd.Timestamp(dd_end, unit="ns")
+
+
+def _segment_starts(counts: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+
 
-    # Sort by date
-    df = df.sort_values(by=date_col).copy()
-    df['equity'] = df[profit_col].cumsum()
+def _segment_reduce(ufunc: np.ufunc, values: np.ndarray, counts: np.ndarray, empty: float = 0.0) -> np.ndarray:
+    """ufunc reduction of consecutive segments of the given lengths, `empty` for empty segments"""
+    out = np.full(len(counts), empty, dtype=np.float64)
+    nonempty = counts > 0
+    if values.size:
+        # reduceat runs each start to the next one, so empty segments must be left out
+        out[nonempty] = ufunc.reduceat(values, _segment_starts(counts)[nonempty])
+    return out
 
-    # Calculate running max
-    df['peak'] = df['equity'].cummax()
 
-    # Calculate drawdown (in absolute terms)
-    df['drawdown'] = df['equity'] - df['peak']
+def compute_batch_statistics(
+        trades: np.ndarray,
+        counts: np.ndarray,
+        portfolio_stats: List[pd.Series],
+        strategy_names: List[str],
+        timeframes: List[str]
+) -> pd.DataFrame:
+    """
+    compute_strategy_statistics of many strategies in a few segmented passes.
+
+    trades holds the records of every strategy back to back, counts[i] (> 0)
+    of them for strategy i, with the vectorbt stats of strategy i in
+    portfolio_stats[i].
+    """
+    segment = np.repeat(np.arange(len(counts)), counts)
+    by_time = trades[np.lexsort((trades["exit_timestamp"], segment))]
+
+    # vectorbt reports the same metrics for every strategy; one row of them per strategy
+    metrics = portfolio_stats[0].index
+    table = np.vstack([
+        stats.to_numpy() if stats.index.equals(metrics) else stats.reindex(metrics).to_numpy()
+        for stats in portfolio_stats
+    ])
+
+    def stat(key: str, dtype=np.float64) -> np.ndarray:
+        return table[:, metrics.get_loc(key)].astype(dtype)
+
+    total_trades = stat("Total Trades", np.int64)
+    has_trades = total_trades > 0
 
-    # Find max drawdown row (most negative drawdown)
-    dd_row = df.loc[df['drawdown'].idxmin()]
-    dd_end = dd_row[date_col]
-    max_dd = dd_row['drawdown']
+    pnl = trades["pnl"]
+    is_win = pnl > 0
+    is_loss = pnl < 0
+    # Sum the compressed wins and losses so every segment is summed like pnl[is_win].sum()
+    wins = _segment_reduce(np.add, is_win.astype(np.int64), counts)
+    losses = _segment_reduce(np.add, is_loss.astype(np.int64), counts)
+    win_sum = _segment_reduce(np.add, pnl[is_win], wins.astype(np.int64))
+    loss_sum = _segment_reduce(np.add, pnl[is_loss], losses.astype(np.int64))
 
-    # Find peak before the drawdown
-    peak_df = df[df[date_col] <= dd_end]
-    peak_row = peak_df.loc[peak_df['equity'].idxmax()]
-    dd_start = peak_row[date_col]
-    peak_equity = peak_row['equity']
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_win = np.where(wins > 0, win_sum / wins, 0)
+        avg_loss = np.where(losses > 0, loss_sum / losses, 0)
+        total_net_profit = _segment_reduce(np.add, pnl, counts)
+        avg_profit = np.where(has_trades, total_net_profit / counts, 0)
+        avg_duration = np.where(has_trades, _segment_reduce(np.add, trade_durations(trades), counts) / counts, 0)
 
-    # Drawdown percentage
-    max_dd_pct = (max_dd / peak_equity) * 100 if peak_equity != 0 else 0
+        largest_win = np.where(has_trades, _segment_reduce(np.maximum, pnl, counts), 0)
+        largest_loss = np.where(has_trades, _segment_reduce(np.minimum, pnl, counts), 0)
 
-    return max_dd, max_dd_pct, dd_start, dd_end
+        max_dd, _, dd_start, dd_end = segmented_max_drawdown(by_time["exit_timestamp"], by_time["pnl"], counts)
+        return_to_dd = np.where(max_dd != 0, total_net_profit / np.abs(max_dd), np.inf)
+
+    return pd.DataFrame({
+        "strategy_name": strategy_names,
+        "timeframe": timeframes,
+        "start": list(stat("Start", object)),
+        "end": list(stat("End", object)),
+        "period": list(stat("Period", object)),
+        "benchmark_return_pct": stat("Benchmark Return [%]"),
+        "nbr_trades": total_trades,
+        "winrate": np.round(stat("Win Rate [%]"), 2),
+        "avg_trade_return": np.round(avg_profit, 2),
+        "avg_trade_duration": np.round(avg_duration, 2),
+        "profit_factor": np.round(stat("Profit Factor"), 2),
+        "expectancy": np.round(avg_profit, 2),
+        "avg_win": np.round(avg_win, 2),
+        "avg_win_pct": np.round(stat("Avg Winning Trade [%]"), 2),
+        "avg_loss": np.round(avg_loss, 2),
+        "avg_loss_pct": np.round(stat("Avg Losing Trade [%]"), 2),
+        "best_trade": np.round(largest_win, 2),
+        "best_trade_pct": np.round(stat("Best Trade [%]"), 2),
+        "worst_trade": np.round(largest_loss, 2),
+        "worst_trade_pct": np.round(stat("Worst Trade [%]"), 2),
+        "drawdown": np.round(max_dd, 2),
+        "drawdown_start": pd.to_datetime(dd_start, unit="ns"),
+        "drawdown_end": pd.to_datetime(dd_end, unit="ns"),
+        "drawdown_pct": np.round(stat("Max Drawdown [%]"), 2) * 100,
+        "return_to_dd": np.round(return_to_dd, 2),
+        "sharpe": np.round(stat("Sharpe Ratio"), 2),
+        "calmar": np.round(stat("Calmar Ratio"), 2),
+        "omega": np.round(stat("Omega Ratio"), 2),
+        "sortino": np.round(stat("Sortino Ratio"), 2),
+        "net_profit": np.round(total_net_profit, 2),
+    })
+
+
+def _summary_from_trades(results: List[BacktestResult]) -> pd.DataFrame:
+    try:
+        return compute_batch_statistics(
+            np.concatenate([result.trades for result in results]),
+            np.array([len(result.trades) for result in results], dtype=np.int64),
+            [result.stats_df for result in results],
+            [result.strategy_name for result in results],
+            [result.timeframe for result in results]
+        )
+    except Exception as e:
+        # Fall back to one strategy at a time, so only the broken ones are dropped
+        logger.warning(f"Batch statistics failed, computing strategies one by one: {e}")
+        summary_stats = []
+        for result in results:
+            stats_df = compute_strategy_statistics(result.trades, result.stats_df, result.strategy_name, result.timeframe)
+            if not stats_df.empty:
+                summary_stats.append(stats_df)
+        return pd.concat(summary_stats, ignore_index=True) if summary_stats else pd.DataFrame()
 
 
 def create_summary_statistics(results: List[BacktestResult]) -> pd.DataFrame:
     """Create summary statistics from all results"""
-    summary_stats = []
-
-    for result in results:
-        if result.success and not result.trades_df.empty:
-            try:
-                stats_df = compute_strategy_statistics(
-                    result.trades_df,
-                    result.stats_df,
-                    result.strategy_name,
-                    result.timeframe
-                )
-                if not stats_df.empty:
-                    summary_stats.append(stats_df)
-            except Exception as e:
-                logger.warning(f"Failed to compute stats for {result.strategy_name}: {e}")
-
-    if summary_stats:
-        summary_df = pd.concat(summary_stats, ignore_index=True)
-        logger.info(f"Created summary with {len(summary_df)} strategies")
-        return summary_df
-    else:
+    # Results simulated without trade-level output carry their summary row already
+    online_rows = [result.summary for result in results if result.success and result.summary is not None]
+    results = [result for result in results if result.success and len(result.trades)]
+    if not results and not online_rows:
         logger.warning("No statistics to summarize")
         return pd.DataFrame()
 
+    summaries = [pd.DataFrame(online_rows)] if online_rows else []
+    if results:
+        summaries.append(_summary_from_trades(results))
+    summaries = [df for df in summaries if not df.empty]
+    if not summaries:
+        return pd.DataFrame()
+    summary_df = summaries[0] if len(summaries) == 1 else pd.concat(summaries, ignore_index=True)
+
+    logger.info(f"Created summary with {len(summary_df)} strategies")
+    return summary_df
+
 
+def summary_rows_by_result(results: List[BacktestResult]) -> List[pd.DataFrame]:
+    """
+    Summary row of each result, in order: empty for failed results and
+    results without trades. Rows are matched by position, since several
+    strategies of a batch can share a name.
+    """
+    rows = [pd.DataFrame() for _ in results]
+    traded = []
+    for i, result in enumerate(results):
+        if not result.success:
+            continue
+        if result.summary is not None:
+            rows[i] = pd.DataFrame([result.summary])
+        elif len(result.trades):
+            traded.append(i)
+
+    if not traded:
+        return rows
+
+    try:
+        summary_df = compute_batch_statistics(
+            np.concatenate([results[i].trades for i in traded]),
+            np.array([len(results[i].trades) for i in traded], dtype=np.int64),
+            [results[i].stats_df for i in traded],
+            [results[i].strategy_name for i in traded],
+            [results[i].timeframe for i in traded]
+        )
+        for row, i in enumerate(traded):
+            rows[i] = summary_df.iloc[[row]].reset_index(drop=True)
+    except Exception as e:
+        # Fall back to one strategy at a time, so only the broken ones are dropped
+        logger.warning(f"Batch statistics failed, computing strategies one by one: {e}")
+        for i in traded:
+            result = results[i]
+            rows[i] = compute_strategy_statistics(result.trades, result.stats_df, result.strategy_name, result.timeframe)
+    return rows
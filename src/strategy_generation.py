@@ -1,34 +1,55 @@
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Any, Iterator, Tuple
 import logging
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 from itertools import product
+import pyarrow as pa
+import yaml
 
 from src.data_structure import IndicatorConfig, StrategyTemplate
+from src.file_identifier import strategy_required_columns
+from src.strategy_ir import ParsedStrategy, build_parsed_strategy
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Context keys renamed so they do not clash with the summary's own columns
+PARAMETER_COLUMN_NAMES = {"timeframe": "timeframe_minutes"}
+# Context keys left out of the parameter columns
+SKIPPED_PARAMETER_KEYS = {"signal_name"}
+
 # ============================================================================
 # 3. STRATEGY GENERATION FUNCTIONS
 # ============================================================================
 
-def generate_simple_strategy_contexts(indicator_config: IndicatorConfig) -> List[Dict[str, Any]]:
-    """Generate all parameter combinations for strategies."""
-    contexts = []
+class ContextGrid:
+    """Parameter grid of an indicator that regenerates its contexts on every pass and knows its size upfront"""
+
+    def __init__(self, factory: Callable[[], Iterator[Dict[str, Any]]], size: int):
+        self.factory = factory
+        self.size = size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.factory()
 
-    # Safely get oversold and overbought lists (wrap single values in lists)
-    oversold_values = indicator_config.additional_params.get("oversold_value")
-    if oversold_values is None:
-        oversold_values = [None]
-    elif not isinstance(oversold_values, (list, tuple)):
-        oversold_values = [oversold_values]
+    def __len__(self) -> int:
+        return self.size
 
-    overbought_values = indicator_config.additional_params.get("overbought_value")
-    if overbought_values is None:
-        overbought_values = [None]
-    elif not isinstance(overbought_values, (list, tuple)):
-        overbought_values = [overbought_values]
+
+def _as_values(value: Any) -> List[Any]:
+    """Threshold values as a list: None becomes [None] and single values are wrapped"""
+    if value is None:
+        return [None]
+    if not isinstance(value, (list, tuple)):
+        return [value]
+    return list(value)
+
+
+def iter_simple_strategy_contexts(indicator_config: IndicatorConfig) -> Iterator[Dict[str, Any]]:
+    """Lazily yield all parameter combinations for strategies."""
+    oversold_values = _as_values(indicator_config.additional_params.get("oversold_value"))
+    overbought_values = _as_values(indicator_config.additional_params.get("overbought_value"))
 
     # Create all combinations of periods, timeframes, oversold, overbought
     for period, timeframe, ovsold, ovbought in product(
@@ -50,18 +71,23 @@ def generate_simple_strategy_contexts(indicator_config: IndicatorConfig) -> List
             if k not in context:
                 context[k] = v
 
-        contexts.append(context)
+        yield context
 
-    logger.info(f"Generated {len(contexts)} strategy contexts")
-    return contexts
 
-def generate_combined_strategy_contexts(indicator_config: IndicatorConfig) -> List[Dict[str, Any]]:
+def count_simple_strategy_contexts(indicator_config: IndicatorConfig) -> int:
+    return (
+        len(indicator_config.periods)
+        * len(indicator_config.timeframes)
+        * len(_as_values(indicator_config.additional_params.get("oversold_value")))
+        * len(_as_values(indicator_config.additional_params.get("overbought_value")))
+    )
+
+
+def iter_combined_strategy_contexts(indicator_config: IndicatorConfig) -> Iterator[Dict[str, Any]]:
     """
-    Generate all parameter combinations for multi-timeframe strategies.
+    Lazily yield all parameter combinations for multi-timeframe strategies.
     Ensures that higher_timeframe > lower_timeframe.
     """
-    contexts = []
-
     # Convert timeframes to integers for proper comparison
     sorted_timeframes = sorted(indicator_config.timeframes, key=lambda x: int(x))
 
@@ -85,44 +111,182 @@ def generate_combined_strategy_contexts(indicator_config: IndicatorConfig) -> Li
 
         # Add any extra parameters from config
         context.update(indicator_config.additional_params)
-        contexts.append(context)
+        yield context
+
+
+def count_combined_strategy_contexts(indicator_config: IndicatorConfig) -> int:
+    minutes = [int(tf) for tf in indicator_config.timeframes]
+    n_pairs = sum(higher > lower for higher, lower in product(minutes, minutes))
+    return len(indicator_config.periods) ** 2 * n_pairs
+
 
+def strategy_context_grid(indicator_config: IndicatorConfig, strategy_type: str) -> ContextGrid:
+    """Lazy context grid of an indicator for the strategy type"""
+    if strategy_type == "combined":
+        grid = ContextGrid(
+            lambda: iter_combined_strategy_contexts(indicator_config),
+            count_combined_strategy_contexts(indicator_config)
+        )
+    else:
+        grid = ContextGrid(
+            lambda: iter_simple_strategy_contexts(indicator_config),
+            count_simple_strategy_contexts(indicator_config)
+        )
+    logger.info(f"Strategy grid of {indicator_config.name} has {len(grid)} {strategy_type} contexts")
+    return grid
+
+
+def generate_simple_strategy_contexts(indicator_config: IndicatorConfig) -> List[Dict[str, Any]]:
+    """Generate all parameter combinations for strategies."""
+    contexts = list(iter_simple_strategy_contexts(indicator_config))
+    logger.info(f"Generated {len(contexts)} strategy contexts")
+    return contexts
+
+def generate_combined_strategy_contexts(indicator_config: IndicatorConfig) -> List[Dict[str, Any]]:
+    """
+    Generate all parameter combinations for multi-timeframe strategies.
+    Ensures that higher_timeframe > lower_timeframe.
+    """
+    contexts = list(iter_combined_strategy_contexts(indicator_config))
     logger.info(f"Generated {len(contexts)} combined (multi-timeframe) strategy contexts")
     return contexts
 
 
+@lru_cache(maxsize=None)
+def template_environment(template_path: str) -> Environment:
+    """Jinja environment of a template folder, built once per process; compiled templates stay cached in it"""
+    return Environment(loader=FileSystemLoader(template_path), auto_reload=False)
+
+
+def compile_template(template: StrategyTemplate, template_path: str) -> Template:
+    """Compiled Jinja template, from the environment's cache after the first call"""
+    return template_environment(template_path).get_template(template.name)
+
+
 def render_strategy_from_template(template: StrategyTemplate, context: Dict[str, Any], template_path: str) -> str:
     """Render a strategy YAML from template and context"""
     try:
-        # Setup Jinja environment
-        env = Environment(loader=FileSystemLoader(template_path))
-        jinja_template = env.get_template(template.name)
-
-        # Render the template
-        rendered_yaml = jinja_template.render(context)
-        return rendered_yaml
+        return compile_template(template, template_path).render(context)
 
     except Exception as e:
         logger.error(f"Failed to render template {template.name}: {e}")
         raise
 
 
-def generate_all_strategies(
+def parse_rendered_strategy(strategy_yaml: str) -> ParsedStrategy:
+    """Parse a rendered strategy once into the typed form tasks carry to workers"""
+    strategy = yaml.safe_load(strategy_yaml)
+    return build_parsed_strategy(strategy, strategy_required_columns(strategy))
+
+
+def iter_rendered_strategies(
         templates: List[StrategyTemplate],
-        contexts: List[Dict[str, Any]],
+        contexts: Iterable[Dict[str, Any]],
         template_path: str
-) -> List[str]:
-    """Generate all strategy YAML strings"""
-    strategies = []
-
+) -> Iterator[Tuple[StrategyTemplate, Dict[str, Any], str]]:
+    """Lazily render (template, context, strategy YAML), one at a time, compiling each template once"""
     for template in templates:
+        try:
+            jinja_template = compile_template(template, template_path)
+        except Exception as e:
+            logger.warning(f"Failed to load template {template.name}: {e}")
+            continue
+
         for context in contexts:
             try:
-                strategy_yaml = render_strategy_from_template(template, context, template_path)
-                strategies.append(strategy_yaml)
+                strategy_yaml = jinja_template.render(context)
             except Exception as e:
                 logger.warning(f"Failed to generate strategy from {template.name}: {e}")
+                continue
+            yield template, context, strategy_yaml
+
+
+def iter_parsed_strategies(
+        templates: List[StrategyTemplate],
+        contexts: Iterable[Dict[str, Any]],
+        template_path: str
+) -> Iterator[Tuple[StrategyTemplate, Dict[str, Any], ParsedStrategy]]:
+    """Lazily render and parse (template, context, strategy), one at a time"""
+    for template, context, strategy_yaml in iter_rendered_strategies(templates, contexts, template_path):
+        try:
+            yield template, context, parse_rendered_strategy(strategy_yaml)
+        except Exception as e:
+            logger.warning(f"Failed to parse strategy from {template.name}: {e}")
+
+
+def iter_all_strategies(
+        templates: List[StrategyTemplate],
+        contexts: Iterable[Dict[str, Any]],
+        template_path: str
+) -> Iterator[str]:
+    """Lazily render strategy YAML strings, one at a time"""
+    for _, _, strategy_yaml in iter_rendered_strategies(templates, contexts, template_path):
+        yield strategy_yaml
+
+
+def _parse_number(text: str) -> Any:
+    """int or float of a period component, the text itself when it is neither"""
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def strategy_parameters(template: StrategyTemplate, context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Typed parameters of a rendered strategy: the template name, each "_"
+    separated component of the periods (period_1, period_htf_2, ...), the
+    timeframes in minutes and the scalar thresholds and extra parameters.
+    """
+    parameters = {"template": template.name.split(".")[0]}
+    for key, value in context.items():
+        if key in SKIPPED_PARAMETER_KEYS:
+            continue
+        if key.startswith("period"):
+            for i, component in enumerate(str(value).split("_"), start=1):
+                parameters[f"{key}_{i}"] = _parse_number(component)
+        elif key.endswith("timeframe"):
+            parameters[PARAMETER_COLUMN_NAMES.get(key, key)] = int(value)
+        elif value is None or isinstance(value, (bool, int, float, str)):
+            parameters[PARAMETER_COLUMN_NAMES.get(key, key)] = value
+    return parameters
+
+
+def strategy_parameter_schema(templates: List[StrategyTemplate], contexts: Iterable[Dict[str, Any]]) -> pa.Schema:
+    """One arrow type per parameter column across all strategies, so every summary row shares a schema"""
+    seen: Dict[str, set] = {}
+    for template, context in product(templates[:1], contexts):
+        for name, value in strategy_parameters(template, context).items():
+            types = seen.setdefault(name, set())
+            if value is not None:
+                types.add(type(value))
+
+    fields = []
+    for name, types in seen.items():
+        if types == {bool}:
+            arrow_type = pa.bool_()
+        elif types == {int}:
+            arrow_type = pa.int64()
+        elif types <= {int, float}:
+            # Includes parameters that are always None, like unset thresholds
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def generate_all_strategies(
+        templates: List[StrategyTemplate],
+        contexts: Iterable[Dict[str, Any]],
+        template_path: str
+) -> List[str]:
+    """Generate all strategy YAML strings"""
+    strategies = list(iter_all_strategies(templates, contexts, template_path))
 
     logger.info(f"Generated {len(strategies)} strategy configurations")
     return strategies
-
@@ -0,0 +1,258 @@
+from enum import IntEnum
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import logging
+import struct
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+NO_STRING = 0xFFFF
+HASH_BYTES = 16
+
+
+class Operator(IntEnum):
+    CROSSES_ABOVE = 0
+    CROSSES_BELOW = 1
+    CHANGES_TO = 2
+    REMAINS = 3
+    GT = 4
+    GTE = 5
+    LT = 6
+    LTE = 7
+    EQ = 8
+    NE = 9
+
+
+class CombineMode(IntEnum):
+    ALL = 0
+    ANY = 1
+
+
+class ValueKind(IntEnum):
+    # A name: the column when the data has it, otherwise a literal
+    NAME = 0
+    NUMBER = 1
+    NONE = 2
+
+
+# Spellings accepted in strategy YAML
+OPERATOR_NAMES = {
+    "crosses_above": Operator.CROSSES_ABOVE,
+    "crosses_below": Operator.CROSSES_BELOW,
+    "changes_to": Operator.CHANGES_TO,
+    "remains": Operator.REMAINS,
+    "gt": Operator.GT, ">": Operator.GT,
+    "gte": Operator.GTE, ">=": Operator.GTE,
+    "lt": Operator.LT, "<": Operator.LT,
+    "lte": Operator.LTE, "<=": Operator.LTE,
+    "eq": Operator.EQ, "==": Operator.EQ,
+    "ne": Operator.NE, "!=": Operator.NE
+}
+MODE_NAMES = {"all": CombineMode.ALL, "any": CombineMode.ANY}
+
+
+class Condition(NamedTuple):
+    """A condition of a signal rule; literal is the value used when reference is not a data column"""
+    signal: str
+    operator: Operator
+    reference: Optional[str]
+    literal: Any
+    timeframe: Optional[str]
+
+
+class SignalRule(NamedTuple):
+    mode: CombineMode
+    conditions: Tuple[Condition, ...]
+
+
+class ParsedStrategy(NamedTuple):
+    """
+    A rendered strategy parsed once in the parent into its long entry and exit
+    rules. content_hash covers what the engine reads (timeframes and rules),
+    not the name. Pickles as its compact binary encoding.
+    """
+    name: str
+    timeframes: Tuple[str, ...]
+    entry: SignalRule
+    exit: SignalRule
+    required_columns: Tuple[Tuple[str, Optional[str]], ...]
+    content_hash: str
+
+    def __reduce__(self):
+        return decode_strategy, (encode_strategy(self),)
+
+# ============================================================================
+# 20. STRATEGY IR FUNCTIONS
+# ============================================================================
+
+def _literal_of(text: str) -> Any:
+    """A name's literal value when it is not a column: its float when numeric, else the text"""
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_condition(cond: Dict[str, Any]) -> Condition:
+    """Condition from its YAML mapping, with the operator resolved and the value pre-parsed"""
+    operator = OPERATOR_NAMES.get(cond["operator"])
+    if operator is None:
+        raise ValueError(f"Unsupported operator: {cond['operator']}")
+
+    value = cond["value"]
+    timeframe = cond.get("timeframe")
+    timeframe = str(timeframe) if timeframe is not None else None
+    if isinstance(value, str):
+        return Condition(cond["signal"], operator, value, _literal_of(value), timeframe)
+    if value is None:
+        return Condition(cond["signal"], operator, None, None, timeframe)
+    if isinstance(value, (bool, int, float)):
+        return Condition(cond["signal"], operator, None, float(value), timeframe)
+    raise ValueError(f"Unsupported condition value: {value!r}")
+
+
+def parse_signal_rule(rule: Dict[str, Any]) -> SignalRule:
+    mode = MODE_NAMES.get(rule["mode"])
+    if mode is None:
+        raise ValueError(f"Unsupported mode: {rule['mode']}")
+    conditions = tuple(parse_condition(cond) for cond in rule["conditions"])
+    if not conditions:
+        raise ValueError("No conditions to combine")
+    return SignalRule(mode, conditions)
+
+
+def _rule_identity(rule: SignalRule) -> List[Any]:
+    """Canonical form of a rule: its conditions combine commutatively, so they are sorted and deduplicated"""
+    conditions = {
+        json.dumps([cond.signal, int(cond.operator), cond.reference, cond.literal, cond.timeframe])
+        for cond in rule.conditions
+    }
+    # A single condition reads the same under either mode
+    mode = CombineMode.ALL if len(conditions) == 1 else rule.mode
+    return [int(mode), sorted(conditions)]
+
+
+def strategy_content_hash(timeframes: Tuple[str, ...], entry: SignalRule, exit: SignalRule) -> str:
+    """
+    Stable hash of what a strategy computes, independent of its name and of
+    the order of its conditions. The risk section is left out: the engine
+    sizes positions from the backtest settings, not from the strategy.
+    """
+    payload = json.dumps([list(timeframes), _rule_identity(entry), _rule_identity(exit)], separators=(",", ":"))
+    return hashlib.blake2b(payload.encode(), digest_size=HASH_BYTES).hexdigest()
+
+
+def build_parsed_strategy(
+        definition: Dict[str, Any],
+        required_columns: List[Tuple[str, Optional[str]]]
+) -> ParsedStrategy:
+    """ParsedStrategy of a strategy's YAML mapping; only the long side is traded"""
+    timeframes = tuple(str(tf) for tf in definition.get("timeframes", []))
+    entry = parse_signal_rule(definition["entry"]["long"])
+    exit = parse_signal_rule(definition["exit"]["long"])
+    return ParsedStrategy(
+        name=definition.get("name", "unknown_strategy"),
+        timeframes=timeframes,
+        entry=entry,
+        exit=exit,
+        required_columns=tuple(required_columns),
+        content_hash=strategy_content_hash(timeframes, entry, exit)
+    )
+
+
+def encode_strategy(strategy: ParsedStrategy) -> bytes:
+    """
+    Compact binary form: a table of the distinct strings, then the rules with
+    strings as uint16 indices, operators and modes as uint8 and numeric
+    literals as float64, then the required columns and the raw content hash.
+    """
+    strings: Dict[str, int] = {}
+
+    def ref(text: Optional[str]) -> int:
+        return NO_STRING if text is None else strings.setdefault(text, len(strings))
+
+    body = bytearray(struct.pack("<HB", ref(strategy.name), len(strategy.timeframes)))
+    for tf in strategy.timeframes:
+        body += struct.pack("<H", ref(tf))
+
+    for rule in (strategy.entry, strategy.exit):
+        body += struct.pack("<BB", rule.mode, len(rule.conditions))
+        for cond in rule.conditions:
+            body += struct.pack("<HBH", ref(cond.signal), cond.operator, ref(cond.timeframe))
+            if cond.reference is not None:
+                body += struct.pack("<BH", ValueKind.NAME, ref(cond.reference))
+            elif cond.literal is not None:
+                body += struct.pack("<Bd", ValueKind.NUMBER, cond.literal)
+            else:
+                body += struct.pack("<B", ValueKind.NONE)
+
+    body += struct.pack("<H", len(strategy.required_columns))
+    for column, tf in strategy.required_columns:
+        body += struct.pack("<HH", ref(column), ref(tf))
+    body += bytes.fromhex(strategy.content_hash)
+
+    header = bytearray(struct.pack("<BH", FORMAT_VERSION, len(strings)))
+    for text in strings:
+        encoded = text.encode()
+        header += struct.pack("<H", len(encoded)) + encoded
+    return bytes(header + body)
+
+
+def decode_strategy(data: bytes) -> ParsedStrategy:
+    """ParsedStrategy from encode_strategy's bytes"""
+    view = memoryview(data)
+    version, n_strings = struct.unpack_from("<BH", view, 0)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported strategy encoding version {version}")
+
+    offset = 3
+    strings: List[Optional[str]] = []
+    for _ in range(n_strings):
+        (length,) = struct.unpack_from("<H", view, offset)
+        strings.append(bytes(view[offset + 2:offset + 2 + length]).decode())
+        offset += 2 + length
+
+    def read(fmt: str) -> Tuple:
+        nonlocal offset
+        values = struct.unpack_from(fmt, view, offset)
+        offset += struct.calcsize(fmt)
+        return values
+
+    def text(index: int) -> Optional[str]:
+        return None if index == NO_STRING else strings[index]
+
+    name_index, n_timeframes = read("<HB")
+    timeframes = tuple(text(read("<H")[0]) for _ in range(n_timeframes))
+
+    rules = []
+    for _ in range(2):
+        mode, n_conditions = read("<BB")
+        conditions = []
+        for _ in range(n_conditions):
+            signal, operator, timeframe = read("<HBH")
+            (kind,) = read("<B")
+            if kind == ValueKind.NAME:
+                reference = text(read("<H")[0])
+                conditions.append(Condition(text(signal), Operator(operator), reference, _literal_of(reference), text(timeframe)))
+            elif kind == ValueKind.NUMBER:
+                conditions.append(Condition(text(signal), Operator(operator), None, read("<d")[0], text(timeframe)))
+            else:
+                conditions.append(Condition(text(signal), Operator(operator), None, None, text(timeframe)))
+        rules.append(SignalRule(CombineMode(mode), tuple(conditions)))
+
+    (n_columns,) = read("<H")
+    required_columns = tuple((text(column), text(tf)) for column, tf in (read("<HH") for _ in range(n_columns)))
+    content_hash = bytes(view[offset:offset + HASH_BYTES]).hex()
+
+    return ParsedStrategy(
+        name=text(name_index),
+        timeframes=timeframes,
+        entry=rules[0],
+        exit=rules[1],
+        required_columns=required_columns,
+        content_hash=content_hash
+    )
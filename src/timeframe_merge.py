@@ -1,68 +1,130 @@
+from typing import Optional
+import hashlib
+import logging
+import os
+import threading
+import numpy as np
 import pandas as pd
 
+from src.data_structure import BacktestConfig
 
-def merge_timeframes(dataframes: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+OHLC_COLUMNS = {"open", "high", "low", "close"}
+
+# (ltf, htf, digest of both time columns) -> HTF row of each LTF row, shared by the threads of a process
+_ALIGNMENTS: dict[tuple, np.ndarray] = {}
+
+
+def alignment_cache_dir(config: BacktestConfig) -> str:
+    """Folder of a symbol's cached timeframe alignments"""
+    return os.path.join(config.save_path, "alignment_cache")
+
+
+def _as_datetime(times: pd.Series) -> pd.Series:
+    return times if pd.api.types.is_datetime64_dtype(times) else pd.to_datetime(times)
+
+
+def _time_ns(times: pd.Series) -> np.ndarray:
+    return _as_datetime(times).to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def alignment_index(ltf_times: np.ndarray, htf_times: np.ndarray, htf_minutes: int) -> np.ndarray:
+    """
+    Row of the last higher timeframe candle closed at each lower timeframe
+    time, -1 where none has closed yet. Times are epoch nanoseconds; the
+    lower timeframe ones must be sorted.
+    """
+    close_times = htf_times + htf_minutes * 60 * 10 ** 9
+    order = np.argsort(close_times, kind="stable")
+    positions = np.searchsorted(close_times[order], ltf_times, side="right") - 1
+    return np.where(positions >= 0, order[np.maximum(positions, 0)], -1)
+
+
+def cached_alignment_index(
+        ltf_times: np.ndarray,
+        htf_times: np.ndarray,
+        ltf_minutes: int,
+        htf_minutes: int,
+        cache_dir: Optional[str] = None
+) -> np.ndarray:
+    """alignment_index, computed once per pair of time columns and kept in memory and in cache_dir"""
+    digest = hashlib.blake2b(ltf_times.tobytes(), digest_size=16)
+    digest.update(htf_times.tobytes())
+    key = (ltf_minutes, htf_minutes, digest.hexdigest())
+    if key in _ALIGNMENTS:
+        return _ALIGNMENTS[key]
+
+    path = os.path.join(cache_dir, f"{ltf_minutes}_{htf_minutes}_{key[2]}.npy") if cache_dir else None
+    index = None
+    if path is not None and os.path.exists(path):
+        try:
+            index = np.load(path)
+            if len(index) != len(ltf_times):
+                index = None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable alignment {path}: {e}")
+
+    if index is None:
+        index = alignment_index(ltf_times, htf_times, htf_minutes)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, index)
+            os.replace(tmp_path, path)
+
+    _ALIGNMENTS[key] = index
+    return index
+
+
+def _suffixed(df: pd.DataFrame, tf: int) -> pd.DataFrame:
+    # Add suffix to non-OHLC columns
+    return df.rename(columns={col: f"{col}_{tf}" for col in df.columns if col != "time" and col not in OHLC_COLUMNS})
+
+
+def merge_timeframes(dataframes: dict[str, pd.DataFrame], alignment_dir: Optional[str] = None) -> dict[str, pd.DataFrame]:
     """
     Merge multiple timeframe DataFrames so that each row in the lower timeframe
     has the latest closed candle values from higher timeframes.
 
+    Each higher timeframe is attached with one gather through its alignment
+    index, which is cached per pair of timeframes (and in alignment_dir).
+
     Args:
         dataframes: dict where key is timeframe in minutes (str or int),
                     value is the corresponding DataFrame with a 'time' column.
+        alignment_dir: optional folder to persist alignment indices in.
 
     Returns:
         pd.DataFrame with aligned multi-timeframe data.
     """
 
     # Ensure keys are int and sort from smallest to largest TF
-    tf_map = {int(tf): df.copy() for tf, df in dataframes.items()}
+    tf_map = {int(tf): df for tf, df in dataframes.items()}
     timeframes = sorted(tf_map.keys())
 
-    # Prepare all dataframes
-    for tf in timeframes:
-        df = tf_map[tf]
-        df["time"] = pd.to_datetime(df["time"])
-
-        # Add suffix to non-OHLC columns
-        ohlc_cols = {"open", "high", "low", "close"}
-        df.rename(columns={col: f"{col}_{tf}" for col in df.columns if col not in {"time"} and col not in ohlc_cols},
-                  inplace=True)
+    # Lowest TF: suffixed columns, parsed times, sorted by time
+    merged_df = _suffixed(tf_map[timeframes[0]], timeframes[0])
+    merged_df["time"] = _as_datetime(merged_df["time"])
+    if not merged_df["time"].is_monotonic_increasing:
+        merged_df = merged_df.sort_values("time", kind="stable")
+    merged_df = merged_df.reset_index(drop=True)
+    ltf_times = _time_ns(merged_df["time"])
 
-        # For higher TFs, create merge_time as close time
-        if tf != timeframes[0]:
-            df["merge_time"] = df["time"] + pd.Timedelta(minutes=tf)
-            # Drop OHLC for higher TFs
-            df.drop(columns=["time", "open", "high", "low", "close"], inplace=True, errors="ignore")
-
-        tf_map[tf] = df.sort_values("time" if tf == timeframes[0] else "merge_time")
+    parts = [merged_df]
+    for tf in timeframes[1:]:
+        df = tf_map[tf]
+        rows = cached_alignment_index(ltf_times, _time_ns(df["time"]), timeframes[0], tf, alignment_dir)
 
-    # Start with lowest TF dataframe
-    merged_df = tf_map[timeframes[0]].copy()
+        # Drop time and OHLC for higher TFs; rows with no closed candle (-1) come out as NaN
+        htf = _suffixed(df.drop(columns=["time", *OHLC_COLUMNS], errors="ignore"), tf).reset_index(drop=True)
+        parts.append(htf.reindex(rows).set_axis(merged_df.index))
 
-    # Merge each higher TF
-    for tf in timeframes[1:]:
-        merged_df = pd.merge_asof(
-            merged_df,
-            tf_map[tf],
-            left_on="time",
-            right_on="merge_time",
-            direction="backward"
-        ).drop(columns=["merge_time"])
+    merged_df = pd.concat(parts, axis=1) if len(parts) > 1 else merged_df
 
     main_timeframe = "_".join(dataframes.keys() )
 
     return {main_timeframe: merged_df}
-
-
-
-# Example usage:
-df_240 = pd.read_parquet(
-    r'C:/Users/zak/Desktop/workspace/datalake/gold/xauusd/indicators/macd_16/xauusd_240_macd_16.parquet')
-df_60 = pd.read_parquet(
-    r'C:/Users/zak/Desktop/workspace/datalake/gold/xauusd/indicators/macd_16/xauusd_60_macd_16.parquet')
-
-merged = merge_timeframes({
-    "60": df_60,
-    "240": df_240
-})
-
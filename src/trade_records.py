@@ -0,0 +1,105 @@
+from typing import Optional
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Compact trades of a strategy: epoch nanosecond times, int8 enums, float64 prices
+TRADE_RECORD_DTYPE = np.dtype([
+    ("exit_trade_id", np.int64),
+    ("column", np.int32),
+    ("size", np.float64),
+    ("entry_timestamp", np.int64),
+    ("entry_price", np.float64),
+    ("entry_fees", np.float64),
+    ("exit_timestamp", np.int64),
+    ("exit_price", np.float64),
+    ("exit_fees", np.float64),
+    ("pnl", np.float64),
+    ("return", np.float64),
+    ("direction", np.int8),
+    ("status", np.int8),
+    ("position_id", np.int64)
+])
+
+# Labels of the enum codes, in vectorbt's TradeDirection and TradeStatus order
+DIRECTION_LABELS = ("Long", "Short")
+STATUS_LABELS = ("Open", "Closed")
+ENUM_LABELS = {"direction": DIRECTION_LABELS, "status": STATUS_LABELS}
+TIMESTAMP_FIELDS = ("entry_timestamp", "exit_timestamp")
+
+NS_PER_MINUTE = 60 * 10 ** 9
+
+# ============================================================================
+# 18. TRADE RECORD FUNCTIONS
+# ============================================================================
+
+def empty_trade_records() -> np.ndarray:
+    return np.empty(0, dtype=TRADE_RECORD_DTYPE)
+
+
+def trade_records_from_vbt(records: np.ndarray, index: pd.DatetimeIndex) -> np.ndarray:
+    """Compact trade records from vectorbt's raw trade records, resolving bar indices to epoch times"""
+    times = index.as_unit("ns").asi8
+    trades = np.empty(len(records), dtype=TRADE_RECORD_DTYPE)
+    trades["exit_trade_id"] = records["id"]
+    trades["column"] = records["col"]
+    trades["size"] = records["size"]
+    trades["entry_timestamp"] = times[records["entry_idx"]]
+    trades["entry_price"] = records["entry_price"]
+    trades["entry_fees"] = records["entry_fees"]
+    trades["exit_timestamp"] = times[records["exit_idx"]]
+    trades["exit_price"] = records["exit_price"]
+    trades["exit_fees"] = records["exit_fees"]
+    trades["pnl"] = records["pnl"]
+    trades["return"] = records["return"]
+    trades["direction"] = records["direction"]
+    trades["status"] = records["status"]
+    trades["position_id"] = records["parent_id"]
+    return trades
+
+
+def trade_durations(trades: np.ndarray) -> np.ndarray:
+    """Trade durations in minutes"""
+    return (trades["exit_timestamp"] - trades["entry_timestamp"]) / 1e9 / 60
+
+
+def trades_to_frame(trades: np.ndarray) -> pd.DataFrame:
+    """Trades as the readable DataFrame: datetime timestamps, enum labels and a duration column"""
+    columns = {}
+    for name in TRADE_RECORD_DTYPE.names:
+        values = trades[name]
+        if name in TIMESTAMP_FIELDS:
+            columns[name] = pd.to_datetime(values, unit="ns")
+        elif name in ENUM_LABELS:
+            columns[name] = pd.Categorical.from_codes(values, categories=list(ENUM_LABELS[name]))
+        else:
+            columns[name] = values
+    columns["duration"] = trade_durations(trades)
+    return pd.DataFrame(columns)
+
+
+def trades_to_arrow(trades: np.ndarray, strategy_name: Optional[str] = None) -> pa.RecordBatch:
+    """Trades as a record batch for storage: timestamp columns, int8-coded dictionary enums and the duration"""
+    arrays, names = [], []
+    if strategy_name is not None:
+        arrays.append(pa.array([strategy_name] * len(trades), type=pa.string()))
+        names.append("strategy_name")
+
+    for name in TRADE_RECORD_DTYPE.names:
+        values = np.ascontiguousarray(trades[name])
+        if name in TIMESTAMP_FIELDS:
+            arrays.append(pa.array(values).cast(pa.timestamp("ns")))
+        elif name in ENUM_LABELS:
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(values), pa.array(ENUM_LABELS[name])))
+        else:
+            arrays.append(pa.array(values))
+        names.append(name)
+
+    arrays.append(pa.array(trade_durations(trades)))
+    names.append("duration")
+    return pa.RecordBatch.from_arrays(arrays, names=names)
@@ -0,0 +1,297 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import gc
+import logging
+import os
+import threading
+import time
+import pandas as pd
+
+from src.backtest import prepare_backtest_batch, compute_backtest_batch, build_failure_summary, SharedDataStore
+from src.cache import ResultCache
+from src.pipeline import WriteBehind, iter_prefetched
+from src.data_structure import WorkerContext, TaskRecord, BatchResult
+from src.strategy_ir import ParsedStrategy
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# 11. POOL WORKER FUNCTIONS
+# ============================================================================
+
+# Shared context of this worker process, keyed by indicator
+_WORKER_CONTEXTS: Dict[str, WorkerContext] = {}
+
+# Prepared data shared by the threads of a thread-mode pool
+_SHARED_DATA = SharedDataStore()
+
+RSS_SAMPLE_INTERVAL_S = 0.05
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of the current process in MB, None when it cannot be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RssSampler:
+    """Track the peak RSS of the process while a block runs"""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.start_mb = current_rss_mb() or 0.0
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        rss = current_rss_mb()
+        if rss is not None and rss > self.peak_mb:
+            self.peak_mb = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Disable the generational GC for a hot section, restoring its previous state"""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class WorkerPool(Executor):
+    """
+    Process pool that recycles its workers.
+
+    Once a worker has run max_tasks_per_worker tasks or reports an RSS above
+    the high-water mark, the whole pool is rotated: new batches go to a fresh
+    pool while the old one drains. Rotation keeps the default fork start
+    method (max_tasks_per_child would switch the pool to spawn), so fresh
+    workers inherit the parent's imports.
+    """
+
+    def __init__(
+            self,
+            max_workers: int,
+            initializer: Callable,
+            initargs: Tuple,
+            max_tasks_per_worker: Optional[int] = None,
+            rss_high_water_mb: Optional[float] = None
+    ):
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.rss_high_water_mb = rss_high_water_mb
+        self.rss_history: List[Tuple[float, int, int, float, float, float]] = []
+        self.generation = 0
+        self._started = time.monotonic()
+        self._recycle: Optional[str] = None
+        self._tasks_per_pid: Dict[int, int] = {}
+        self._retired: List[ProcessPoolExecutor] = []
+        self._generation_pids: set = set()
+        self._retired_pids: set = set()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=self.initializer,
+            initargs=self.initargs
+        )
+
+    def _rotate(self) -> None:
+        logger.info(f"Recycling worker pool generation {self.generation} ({self._recycle})")
+        self._executor.shutdown(wait=False)
+        self._retired.append(self._executor)
+        self._retired_pids |= self._generation_pids
+        self._generation_pids = set()
+        self._tasks_per_pid = {}
+        self._executor = self._new_executor()
+        self.generation += 1
+        self._recycle = None
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        if self._recycle:
+            self._rotate()
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def record(self, result: BatchResult) -> None:
+        """Track a finished batch's worker RSS and flag the pool for recycling at the RSS or task limit"""
+        self.rss_history.append((
+            time.monotonic() - self._started,
+            self.generation,
+            result.pid,
+            result.rss_start_mb,
+            result.rss_peak_mb,
+            result.rss_end_mb
+        ))
+        # Late results from a retired generation must not trigger another rotation
+        if result.pid in self._retired_pids:
+            return
+
+        self._generation_pids.add(result.pid)
+        self._tasks_per_pid[result.pid] = self._tasks_per_pid.get(result.pid, 0) + 1
+        if self.rss_high_water_mb is not None and result.rss_end_mb > self.rss_high_water_mb:
+            self._recycle = "RSS high-water mark reached"
+        elif self.max_tasks_per_worker is not None and self._tasks_per_pid[result.pid] >= self.max_tasks_per_worker:
+            self._recycle = f"a worker ran {self.max_tasks_per_worker} tasks"
+
+    def rss_report(self) -> pd.DataFrame:
+        """Per-batch RSS samples of every worker over the run"""
+        return pd.DataFrame(
+            self.rss_history,
+            columns=["elapsed_s", "generation", "pid", "rss_start_mb", "rss_peak_mb", "rss_end_mb"]
+        )
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        for executor in self._retired + [self._executor]:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        self._retired.clear()
+
+
+class ThreadWorkerPool(ThreadPoolExecutor):
+    """
+    Thread pool running batches in the current process.
+
+    All threads read one shared copy of the prepared data and reuse the
+    already warmed-up vectorbt/numba state; nothing is pickled.
+    """
+
+    def __init__(self, max_workers: int, contexts: Dict[str, WorkerContext], shared_data_mb: float = 1024):
+        init_worker(contexts)
+        _SHARED_DATA.max_mb = shared_data_mb
+        super().__init__(max_workers=max_workers, thread_name_prefix="backtest")
+        self.rss_history: List[Tuple[float, int, int, float, float, float]] = []
+        self._started = time.monotonic()
+
+    def record(self, result: BatchResult) -> None:
+        """Track the process RSS while a batch ran"""
+        self.rss_history.append((
+            time.monotonic() - self._started,
+            0,
+            result.pid,
+            result.rss_start_mb,
+            result.rss_peak_mb,
+            result.rss_end_mb
+        ))
+
+    def rss_report(self) -> pd.DataFrame:
+        """Per-batch RSS samples of the process over the run"""
+        return pd.DataFrame(
+            self.rss_history,
+            columns=["elapsed_s", "generation", "pid", "rss_start_mb", "rss_peak_mb", "rss_end_mb"]
+        )
+
+
+def init_worker(contexts: Dict[str, WorkerContext]) -> None:
+    """Pool initializer: receive the shared file reference and configs once per process"""
+    _WORKER_CONTEXTS.clear()
+    _WORKER_CONTEXTS.update(contexts)
+    logger.debug(f"Worker {os.getpid()} initialized for {sorted(contexts)}")
+
+
+def get_worker_context(indicator: str) -> WorkerContext:
+    """Shared context of an indicator in the current worker"""
+    try:
+        return _WORKER_CONTEXTS[indicator]
+    except KeyError:
+        raise RuntimeError(f"Worker {os.getpid()} has no context for indicator '{indicator}'") from None
+
+
+def run_batch_pipeline(
+        context: WorkerContext,
+        batches: List[List[ParsedStrategy]],
+        shared_data: Optional[SharedDataStore] = None
+) -> List[dict]:
+    """
+    Run batches through three stages: a prefetch thread plans and loads the
+    next batch while the current one computes, and a write-behind thread saves
+    results from a bounded queue. Writes are flushed before a batch is reported.
+    """
+    config = context.backtest_config
+    cache = (
+        ResultCache(context.cache_dir, context.file_fingerprints, context.result_layout)
+        if context.cache_dir else None
+    )
+
+    def prepare(strategies: List[ParsedStrategy]):
+        return prepare_backtest_batch(
+            context.strategy_type, strategies, context.file_reference, config, cache, shared_data
+        )
+
+    summaries = []
+    with WriteBehind(context.write_queue_size) as writer:
+        for strategies, prepared, error in iter_prefetched(batches, prepare):
+            if error is not None:
+                logger.error(f"Batch planning failed: {error}")
+                summaries.extend(build_failure_summary(str(error)) for _ in strategies)
+                continue
+            plan, data = prepared
+            summaries.extend(compute_backtest_batch(plan, data, config, cache, writer, context.result_layout))
+
+    return summaries
+
+
+def run_backtest_batch_task(indicator: str, batches: List[List[ParsedStrategy]]) -> BatchResult:
+    """Pool task: run a group of batches against the worker's shared context"""
+    context = get_worker_context(indicator)
+
+    with RssSampler() as sampler, gc_paused():
+        summaries = run_batch_pipeline(context, batches)
+
+    # Collect once per task instead of once per strategy
+    gc.collect()
+
+    return BatchResult(
+        pid=os.getpid(),
+        rss_start_mb=sampler.start_mb,
+        rss_peak_mb=sampler.peak_mb,
+        rss_end_mb=current_rss_mb() or sampler.peak_mb,
+        records=[TaskRecord(**summary) for summary in summaries]
+    )
+
+
+def run_backtest_batch_thread_task(indicator: str, batches: List[List[ParsedStrategy]]) -> BatchResult:
+    """Thread pool task: run a group of batches on the process-wide shared data"""
+    context = get_worker_context(indicator)
+
+    # The GC is process-wide, so it is left alone while other threads run
+    with RssSampler() as sampler:
+        summaries = run_batch_pipeline(context, batches, _SHARED_DATA)
+
+    return BatchResult(
+        pid=os.getpid(),
+        rss_start_mb=sampler.start_mb,
+        rss_peak_mb=sampler.peak_mb,
+        rss_end_mb=current_rss_mb() or sampler.peak_mb,
+        records=[TaskRecord(**summary) for summary in summaries]
+    )
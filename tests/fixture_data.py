@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+import yaml
+
+SYMBOL = "xauusd"
+AUTHKEY = "test-secret"
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "optimiser", "strategies")
+
+
+def _ema(values: pd.Series, span: int) -> pd.Series:
+    return values.ewm(span=span, adjust=False).mean()
+
+
+def write_macd_fixture(data_path: str, periods: list, timeframes: list) -> None:
+    """Two days of random-walk minute candles resampled per timeframe, with the macd columns of each period"""
+    rng = np.random.default_rng(0)
+    n = 2 * 1440
+    close = 2000 + np.cumsum(rng.normal(0, 0.5, n))
+    base = pd.DataFrame(
+        {"open": close, "high": close + 0.3, "low": close - 0.3, "close": close},
+        index=pd.date_range("2024-01-01", periods=n, freq="1min", name="time")
+    )
+    for tf in timeframes:
+        candles = base.resample(f"{tf}min").agg({"open": "first", "high": "max", "low": "min", "close": "last"}).dropna()
+        for period in periods:
+            fast, slow, signal_span = map(int, period.split("_"))
+            df = candles.copy()
+            macd = _ema(df.close, fast) - _ema(df.close, slow)
+            df[f"macd_{period}"] = macd
+            df[f"macd_{period}_signal"] = _ema(macd, signal_span)
+            df[f"macd_{period}_hist"] = macd - _ema(macd, signal_span)
+            folder = os.path.join(data_path, SYMBOL, "indicators", f"macd_{fast}")
+            os.makedirs(folder, exist_ok=True)
+            df.reset_index().to_parquet(os.path.join(folder, f"{SYMBOL}_{tf}_macd_{fast}.parquet"), index=False)
+
+
+def write_config(path: str, data_path: str, save_path: str) -> str:
+    timeframes = ["5", "15"]
+    periods = ["8_20_6", "12_26_9"]
+    write_macd_fixture(data_path, periods, timeframes)
+    config = {
+        "backtest": {
+            "initial_capital": 100000.0,
+            "fees": 0.0,
+            "slippage": 0.0,
+            "point_value": 100.0,
+            "cutoff_date": None,
+            "timeframe_names": {tf: f"M{tf}" for tf in timeframes},
+            "frequency_map": {tf: f"{tf}min" for tf in timeframes}
+        },
+        "indicators": {
+            "macd": {
+                "periods": periods,
+                "timeframes": timeframes,
+                "templates": ["macd.yaml.j2", "macd_reversal.yaml.j2", "macd_histogram.yaml.j2"],
+                "additional_params": {"atr_distance": 0.0}
+            }
+        },
+        "paths": {"base_data_path": data_path, "base_save_path": save_path, "template_dir_path": TEMPLATE_DIR},
+        "system": {
+            "max_workers": 2,
+            "cache_enabled": False,
+            "max_batch_size": 1,
+            "pipeline_batches": 1,
+            "result_layout": "summary"
+        },
+        # Port 0: the coordinator binds an ephemeral port
+        "cluster": {
+            "host": "127.0.0.1",
+            "port": 0,
+            "authkey": AUTHKEY,
+            "expected_workers": 2,
+            "prefetch": 2,
+            "heartbeat_interval_s": 0.5,
+            "heartbeat_timeout_s": 60
+        }
+    }
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return path
@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+from src.backtest import run_backtest_batch
+from src.checkpoint import task_key
+from src.configuration import create_backtest_config, read_yaml_config
+from src.data_structure import SweepTask, TaskRecord
+from src.dataset import DatasetWriter, iter_dataset_trades, with_task_key
+from src.file_identifier import build_file_column_reference
+from src.strategy_generation import parse_rendered_strategy
+from tests.fixture_data import SYMBOL, write_config
+
+STATS = ["nbr_trades", "net_profit", "drawdown", "winrate"]
+
+# Two templates rendering the same name with opposite cross rules, like sar and sar_pullback
+STRATEGY_YAML = """
+name: "macd_12_26_9_5"
+timeframes: ["5"]
+entry:
+  long:
+    mode: "all"
+    conditions:
+      - signal: "macd_12_26_9"
+        operator: "{entry}"
+        value: "macd_12_26_9_signal"
+        timeframe: "5"
+exit:
+  long:
+    mode: "any"
+    conditions:
+      - signal: "macd_12_26_9"
+        operator: "{exit}"
+        value: "macd_12_26_9_signal"
+        timeframe: "5"
+"""
+
+
+def opposite_strategies() -> tuple:
+    above = parse_rendered_strategy(STRATEGY_YAML.format(entry="crosses_above", exit="crosses_below"))
+    below = parse_rendered_strategy(STRATEGY_YAML.format(entry="crosses_below", exit="crosses_above"))
+    assert above.name == below.name and above.content_hash != below.content_hash
+    return above, below
+
+
+def summary_stats(summary: dict) -> list:
+    batch = dict(summary["batches"])["summary"]
+    return pd.DataFrame(batch.to_pydict())[STATS].iloc[0].tolist()
+
+
+@pytest.mark.parametrize("layout", ["dataset", "summary"])
+def test_same_named_strategies_keep_their_own_stats(tmp_path, layout):
+    """Strategies of a batch sharing a name each get the summary row of their own rules"""
+    data_path = str(tmp_path / "data")
+    config_data = read_yaml_config(write_config(str(tmp_path / "config.yaml"), data_path, str(tmp_path / "out")))
+    config = create_backtest_config(SYMBOL, "macd", "simple", config_data)
+    file_reference = build_file_column_reference(SYMBOL, config.data_path, config.timeframe_names)
+
+    above, below = opposite_strategies()
+    batched = run_backtest_batch("simple", [above, below], file_reference, config, layout=layout)
+    alone = [run_backtest_batch("simple", [strategy], file_reference, config, layout=layout)[0] for strategy in (above, below)]
+
+    assert all(summary["success"] for summary in batched + alone)
+    assert summary_stats(alone[0]) != summary_stats(alone[1])
+    assert [summary_stats(summary) for summary in batched] == [summary_stats(summary) for summary in alone]
+
+
+def test_dataset_keeps_same_named_strategies_apart(tmp_path):
+    """Dataset trades of strategies sharing a name are read back per task key, not merged by name"""
+    data_path = str(tmp_path / "data")
+    config_data = read_yaml_config(write_config(str(tmp_path / "config.yaml"), data_path, str(tmp_path / "out")))
+    config = create_backtest_config(SYMBOL, "macd", "simple", config_data)
+    file_reference = build_file_column_reference(SYMBOL, config.data_path, config.timeframe_names)
+
+    strategies = opposite_strategies()
+    summaries = run_backtest_batch("simple", list(strategies), file_reference, config, layout="dataset")
+    keys = [
+        task_key(SweepTask("macd", strategy.name, strategy, ("5",), {}, (("template", template),)))
+        for strategy, template in zip(strategies, ["macd_above", "macd_below"])
+    ]
+
+    root = str(tmp_path / "dataset")
+    with DatasetWriter(root, on_commit=lambda indicator, record: None) as writer:
+        for summary, key in zip(summaries, keys):
+            batches = with_task_key(summary["batches"], key)
+            writer.submit("macd", "simple", TaskRecord(summary["strategy_name"], summary["timeframe"], True, None, batches=batches))
+
+    read_back = {key: trades for key, _, _, trades in iter_dataset_trades(root, "macd", "simple", ["entry_price"])}
+    assert sorted(read_back) == sorted(keys)
+    for summary, key in zip(summaries, keys):
+        expected = dict(summary["batches"])["trades"].column("entry_price").to_pylist()
+        assert read_back[key]["entry_price"].tolist() == expected
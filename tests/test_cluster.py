@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import parallel
+from src.cluster import ClusterExecutor, run_cluster_node
+from src.configuration import create_backtest_config, read_yaml_config
+from src.data_structure import ClusterConfig
+from src.results import consolidated_summary_path
+from tests.fixture_data import AUTHKEY, SYMBOL, write_config
+
+TIMEOUT_S = 600
+
+
+def read_summary(config_path: str) -> pd.DataFrame:
+    backtest_config = create_backtest_config(SYMBOL, "macd", "simple", read_yaml_config(config_path))
+    return pd.read_parquet(consolidated_summary_path(backtest_config))
+
+
+def start_nodes(port: int, n_nodes: int) -> list:
+    """Localhost cluster_worker nodes of one worker process each"""
+    nodes = [
+        multiprocessing.Process(target=run_cluster_node, args=("127.0.0.1", port, AUTHKEY.encode(), 0.5, 1))
+        for _ in range(n_nodes)
+    ]
+    for node in nodes:
+        node.start()
+    return nodes
+
+
+def stop_nodes(nodes: list) -> None:
+    for node in nodes:
+        node.join(timeout=30)
+        if node.is_alive():
+            node.terminate()
+            node.join()
+
+
+def worker_pid(name: str) -> int:
+    # Worker names are host:pid
+    return int(name.rsplit(":", 1)[1])
+
+
+def sleep_and_report(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+@pytest.fixture
+def fixture_configs(tmp_path):
+    data_path = str(tmp_path / "data")
+    local = write_config(str(tmp_path / "local.yaml"), data_path, str(tmp_path / "local"))
+    cluster = write_config(str(tmp_path / "cluster.yaml"), data_path, str(tmp_path / "cluster"))
+    return local, cluster
+
+
+def test_cluster_survives_worker_death(fixture_configs, monkeypatch):
+    """A worker killed after its first task has its tasks re-queued; the summary matches a local pool run"""
+    local_config, cluster_config = fixture_configs
+    parallel.run_all_indicators_global_streaming(SYMBOL, ["macd"], "simple", local_config, resume=False, backend="process")
+    expected = read_summary(local_config)
+
+    coordinators: "queue.Queue" = queue.Queue()
+    killed = []
+
+    class KillingClusterExecutor(ClusterExecutor):
+        """Coordinator that SIGKILLs the first worker to report a result, once a peer is connected"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            coordinators.put(self)
+
+        def _handle(self, link, message):
+            super()._handle(link, message)
+            if message[0] == "result" and not killed and len(self._workers) > 1:
+                killed.append(link.name)
+                os.kill(worker_pid(link.name), signal.SIGKILL)
+
+    monkeypatch.setattr(parallel, "ClusterExecutor", KillingClusterExecutor)
+
+    errors = []
+
+    def sweep():
+        try:
+            parallel.run_all_indicators_global_streaming(
+                SYMBOL, ["macd"], "simple", cluster_config, resume=False, backend="cluster"
+            )
+        except Exception as e:
+            errors.append(e)
+
+    runner = threading.Thread(target=sweep, daemon=True)
+    runner.start()
+    coordinator = coordinators.get(timeout=TIMEOUT_S)
+    nodes = start_nodes(coordinator.address[1], 2)
+    try:
+        runner.join(timeout=TIMEOUT_S)
+        assert not runner.is_alive(), "cluster sweep did not finish"
+    finally:
+        stop_nodes(nodes)
+
+    assert not errors
+    assert len(killed) == 1
+    summary = read_summary(cluster_config)
+    assert len(summary) == len(expected)
+    assert sorted(summary["strategy_name"]) == sorted(expected["strategy_name"])
+
+
+def test_cluster_steals_queued_task_for_idle_worker():
+    """A worker running dry revokes the last queued task of a busy peer and runs it"""
+    config = ClusterConfig(
+        host="127.0.0.1", port=0, authkey=AUTHKEY, expected_workers=2,
+        prefetch=2, heartbeat_interval_s=0.5, heartbeat_timeout_s=60
+    )
+    executor = ClusterExecutor(config)
+    nodes = []
+    try:
+        # Three slow tasks fill the first worker (running + prefetch), the fourth waits
+        futures = [executor.submit(sleep_and_report, 3.0) for _ in range(3)]
+        futures.append(executor.submit(sleep_and_report, 0.1))
+        nodes += start_nodes(executor.address[1], 1)
+        deadline = time.monotonic() + TIMEOUT_S
+        while not futures[2].running():
+            assert time.monotonic() < deadline, "first worker never received its tasks"
+            time.sleep(0.05)
+        assert not futures[3].running()
+
+        # The second worker takes the waiting task, then steals from the busy one
+        nodes += start_nodes(executor.address[1], 1)
+        pids = [future.result(timeout=TIMEOUT_S) for future in futures]
+    finally:
+        executor.shutdown(wait=False)
+        stop_nodes(nodes)
+
+    busy_pid, idle_pid = pids[0], pids[3]
+    assert busy_pid != idle_pid
+    # The last task queued on the busy worker ran on the idle one
+    assert pids[2] == idle_pid